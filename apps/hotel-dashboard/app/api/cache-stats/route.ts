@@ -0,0 +1,14 @@
+/**
+ * API Route: Query Cache Statistics
+ * Returns hit rate, entry count and eviction counters of the API query cache
+ */
+
+import { NextResponse } from 'next/server';
+import { cacheStats } from '@/lib/queryCache';
+
+// Counters change on every request, so never prerender this route
+export const dynamic = 'force-dynamic';
+
+export async function GET() {
+  return NextResponse.json(cacheStats());
+}
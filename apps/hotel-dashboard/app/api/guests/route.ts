@@ -4,7 +4,7 @@
  */
 
 import { NextRequest, NextResponse } from 'next/server';
-import pool from '@/lib/db';
+import { cachedQuery } from '@/lib/queryCache';
 
 export async function GET(request: NextRequest) {
   try {
@@ -97,12 +97,12 @@ export async function GET(request: NextRequest) {
         return NextResponse.json({ error: 'Invalid dimension' }, { status: 400 });
     }
 
-    const result = await pool.query(query);
+    const result = await cachedQuery('guests', { dimension }, ['guest_profiles'], query);
     
     return NextResponse.json({
       dimension,
       data: result.rows,
-    });
+    }, { headers: { 'X-Cache': result.cache } });
   } catch (error) {
     console.error('Error fetching guest data:', error);
     return NextResponse.json(
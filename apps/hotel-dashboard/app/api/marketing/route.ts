@@ -4,7 +4,7 @@
  */
 
 import { NextRequest, NextResponse } from 'next/server';
-import pool from '@/lib/db';
+import { cachedQuery } from '@/lib/queryCache';
 
 export async function GET(request: NextRequest) {
   try {
@@ -62,14 +62,20 @@ export async function GET(request: NextRequest) {
       `;
     }
 
-    const result = await pool.query(query, [startDate, endDate]);
+    const result = await cachedQuery(
+      'marketing',
+      { group_by: groupBy, start_date: startDate, end_date: endDate },
+      ['marketing_performance'],
+      query,
+      [startDate, endDate]
+    );
     
     return NextResponse.json({
       group_by: groupBy,
       start_date: startDate,
       end_date: endDate,
       data: result.rows,
-    });
+    }, { headers: { 'X-Cache': result.cache } });
   } catch (error) {
     console.error('Error fetching marketing data:', error);
     return NextResponse.json(
@@ -4,7 +4,7 @@
  */
 
 import { NextRequest, NextResponse } from 'next/server';
-import pool from '@/lib/db';
+import { cachedQuery } from '@/lib/queryCache';
 
 export async function GET(request: NextRequest) {
   try {
@@ -65,14 +65,20 @@ export async function GET(request: NextRequest) {
       `;
     }
 
-    const result = await pool.query(query, [startDate, endDate]);
+    const result = await cachedQuery(
+      'occupancy',
+      { group_by: groupBy, start_date: startDate, end_date: endDate },
+      ['daily_occupancy'],
+      query,
+      [startDate, endDate]
+    );
     
     return NextResponse.json({
       group_by: groupBy,
       start_date: startDate,
       end_date: endDate,
       data: result.rows,
-    });
+    }, { headers: { 'X-Cache': result.cache } });
   } catch (error) {
     console.error('Error fetching occupancy data:', error);
     return NextResponse.json(
@@ -1,10 +1,11 @@
 /**
  * API Route: Revenue Analytics
  * Returns revenue breakdown by various dimensions
+ * Reads the booking_revenue_daily and charge_revenue_daily rollups refreshed by the ETL
  */
 
 import { NextRequest, NextResponse } from 'next/server';
-import pool from '@/lib/db';
+import { cachedQuery } from '@/lib/queryCache';
 
 export async function GET(request: NextRequest) {
   try {
@@ -21,15 +22,14 @@ export async function GET(request: NextRequest) {
         query = `
           SELECT 
             booking_channel as dimension_value,
-            COUNT(DISTINCT booking_id) as total_bookings,
+            SUM(bookings) as total_bookings,
             SUM(room_revenue_eur) as room_revenue,
             SUM(fb_revenue_eur) as fb_revenue,
             SUM(activities_revenue_eur) as activities_revenue,
             SUM(net_revenue_eur) as total_revenue,
-            AVG(nights) as avg_nights
-          FROM bookings_with_charges
-          WHERE booking_status = 'Stayed'
-            AND check_in_date BETWEEN $1 AND $2
+            SUM(room_nights)::numeric / SUM(bookings) as avg_nights
+          FROM booking_revenue_daily
+          WHERE check_in_date BETWEEN $1 AND $2
           GROUP BY booking_channel
           ORDER BY total_revenue DESC
         `;
@@ -40,15 +40,14 @@ export async function GET(request: NextRequest) {
         query = `
           SELECT 
             room_type as dimension_value,
-            COUNT(DISTINCT booking_id) as total_bookings,
+            SUM(bookings) as total_bookings,
             SUM(room_revenue_eur) as room_revenue,
             SUM(fb_revenue_eur) as fb_revenue,
             SUM(activities_revenue_eur) as activities_revenue,
             SUM(net_revenue_eur) as total_revenue,
-            AVG(nights) as avg_nights
-          FROM bookings_with_charges
-          WHERE booking_status = 'Stayed'
-            AND check_in_date BETWEEN $1 AND $2
+            SUM(room_nights)::numeric / SUM(bookings) as avg_nights
+          FROM booking_revenue_daily
+          WHERE check_in_date BETWEEN $1 AND $2
           GROUP BY room_type
           ORDER BY total_revenue DESC
         `;
@@ -59,15 +58,14 @@ export async function GET(request: NextRequest) {
         query = `
           SELECT 
             country as dimension_value,
-            COUNT(DISTINCT booking_id) as total_bookings,
+            SUM(bookings) as total_bookings,
             SUM(room_revenue_eur) as room_revenue,
             SUM(fb_revenue_eur) as fb_revenue,
             SUM(activities_revenue_eur) as activities_revenue,
             SUM(net_revenue_eur) as total_revenue,
-            AVG(nights) as avg_nights
-          FROM bookings_with_charges
-          WHERE booking_status = 'Stayed'
-            AND check_in_date BETWEEN $1 AND $2
+            SUM(room_nights)::numeric / SUM(bookings) as avg_nights
+          FROM booking_revenue_daily
+          WHERE check_in_date BETWEEN $1 AND $2
           GROUP BY country
           ORDER BY total_revenue DESC
           LIMIT 20
@@ -79,14 +77,12 @@ export async function GET(request: NextRequest) {
         query = `
           SELECT 
             charge_date as dimension_value,
-            SUM(CASE WHEN charge_category = 'Room' THEN line_subtotal_eur ELSE 0 END) as room_revenue,
-            SUM(CASE WHEN charge_category = 'F&B' THEN line_subtotal_eur ELSE 0 END) as fb_revenue,
-            SUM(CASE WHEN charge_category IN ('SkiPass', 'EquipmentRental', 'Spa', 'AirportTransfer') 
-                THEN line_subtotal_eur ELSE 0 END) as activities_revenue,
-            SUM(line_subtotal_eur) as total_revenue
-          FROM bookings_with_charges
-          WHERE booking_status = 'Stayed'
-            AND charge_date BETWEEN $1 AND $2
+            SUM(room_revenue_eur) as room_revenue,
+            SUM(fb_revenue_eur) as fb_revenue,
+            SUM(activities_revenue_eur) as activities_revenue,
+            SUM(total_revenue_eur) as total_revenue
+          FROM charge_revenue_daily
+          WHERE charge_date BETWEEN $1 AND $2
           GROUP BY charge_date
           ORDER BY charge_date
         `;
@@ -97,14 +93,20 @@ export async function GET(request: NextRequest) {
         return NextResponse.json({ error: 'Invalid dimension' }, { status: 400 });
     }
 
-    const result = await pool.query(query, params);
+    const result = await cachedQuery(
+      'revenue',
+      { dimension, start_date: startDate, end_date: endDate },
+      [dimension === 'date' ? 'charge_revenue_daily' : 'booking_revenue_daily'],
+      query,
+      params
+    );
     
     return NextResponse.json({
       dimension,
       start_date: startDate,
       end_date: endDate,
       data: result.rows,
-    });
+    }, { headers: { 'X-Cache': result.cache } });
   } catch (error) {
     console.error('Error fetching revenue data:', error);
     return NextResponse.json(
@@ -1,10 +1,11 @@
 /**
  * API Route: Weather Correlation Analysis
  * Analyzes correlation between weather/snow and ski-related revenue
+ * Reads the weather_occupancy_daily rollup refreshed by the ETL
  */
 
 import { NextRequest, NextResponse } from 'next/server';
-import pool from '@/lib/db';
+import { cachedQuery } from '@/lib/queryCache';
 
 export async function GET(request: NextRequest) {
   try {
@@ -14,37 +15,31 @@ export async function GET(request: NextRequest) {
 
     const query = `
       SELECT 
-        o.date,
-        o.weather_condition,
-        o.snow_depth_cm,
-        o.avg_temperature_c,
-        o.occupancy_pct,
-        SUM(CASE 
-          WHEN b.charge_category IN ('SkiPass', 'EquipmentRental') 
-          THEN b.line_subtotal_eur 
-          ELSE 0 
-        END) as ski_revenue,
-        COUNT(DISTINCT CASE 
-          WHEN b.charge_category IN ('SkiPass', 'EquipmentRental') 
-          THEN b.booking_id 
-        END) as bookings_with_ski_charges
-      FROM daily_occupancy o
-      LEFT JOIN bookings_with_charges b 
-        ON b.charge_date = o.date 
-        AND b.booking_status = 'Stayed'
-      WHERE o.date BETWEEN $1 AND $2
-        AND o.room_type = 'All'
-      GROUP BY o.date, o.weather_condition, o.snow_depth_cm, o.avg_temperature_c, o.occupancy_pct
-      ORDER BY o.date
+        date,
+        weather_condition,
+        snow_depth_cm,
+        avg_temperature_c,
+        occupancy_pct,
+        ski_revenue,
+        bookings_with_ski_charges
+      FROM weather_occupancy_daily
+      WHERE date BETWEEN $1 AND $2
+      ORDER BY date
     `;
 
-    const result = await pool.query(query, [startDate, endDate]);
+    const result = await cachedQuery(
+      'weather-correlation',
+      { start_date: startDate, end_date: endDate },
+      ['weather_occupancy_daily'],
+      query,
+      [startDate, endDate]
+    );
     
     return NextResponse.json({
       start_date: startDate,
       end_date: endDate,
       data: result.rows,
-    });
+    }, { headers: { 'X-Cache': result.cache } });
   } catch (error) {
     console.error('Error fetching weather correlation data:', error);
     return NextResponse.json(
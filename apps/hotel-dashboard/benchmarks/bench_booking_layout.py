@@ -0,0 +1,190 @@
+"""
+Booking table layout benchmark
+Generates one set of bookings and loads it twice: into the former
+denormalized bookings_with_charges layout (booking fields repeated on every
+charge line) and into the bookings + booking_charges tables. Reports CSV
+size, COPY load time and on-disk size (tables plus indexes) for each. Runs
+against a throwaway database on the PostgreSQL server configured by the
+DB_* env vars.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'scripts'))
+
+import etl_pipeline  # noqa: E402
+import generate_data  # noqa: E402
+from bench_etl_load import create_scratch_db, drop_scratch_db  # noqa: E402
+
+# The former single fact table and its indexes, as a separately named table
+WIDE_TABLE_DDL = """
+CREATE TABLE bookings_wide (
+    line_id VARCHAR(100) PRIMARY KEY,
+    booking_id VARCHAR(50) NOT NULL,
+    guest_id VARCHAR(50) NOT NULL,
+    check_in_date DATE NOT NULL,
+    check_out_date DATE NOT NULL,
+    nights INTEGER,
+    num_guests INTEGER,
+    num_adults INTEGER,
+    num_children INTEGER,
+    room_type VARCHAR(50),
+    board_type VARCHAR(50),
+    booking_status VARCHAR(50),
+    booking_channel VARCHAR(100),
+    booking_created_date DATE,
+    country VARCHAR(100),
+    charge_date DATE NOT NULL,
+    charge_category VARCHAR(50),
+    charge_item VARCHAR(200),
+    unit_price_eur DECIMAL(10, 2),
+    quantity DECIMAL(10, 2) DEFAULT 1.00,
+    line_subtotal_eur DECIMAL(10, 2),
+    tax_rate DECIMAL(5, 4) DEFAULT 0.10,
+    line_tax_eur DECIMAL(10, 2),
+    line_total_eur DECIMAL(10, 2),
+    room_revenue_eur DECIMAL(12, 2),
+    fb_revenue_eur DECIMAL(12, 2),
+    activities_revenue_eur DECIMAL(12, 2),
+    total_revenue_eur DECIMAL(12, 2),
+    discount_eur DECIMAL(10, 2) DEFAULT 0.00,
+    net_revenue_eur DECIMAL(12, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (guest_id) REFERENCES guest_profiles(guest_id),
+    FOREIGN KEY (booking_channel) REFERENCES marketing_channels(channel)
+);
+CREATE INDEX idx_wide_guest_id ON bookings_wide(guest_id);
+CREATE INDEX idx_wide_booking_id ON bookings_wide(booking_id);
+CREATE INDEX idx_wide_check_in_date ON bookings_wide(check_in_date);
+CREATE INDEX idx_wide_check_out_date ON bookings_wide(check_out_date);
+CREATE INDEX idx_wide_charge_date ON bookings_wide(charge_date);
+CREATE INDEX idx_wide_channel ON bookings_wide(booking_channel);
+CREATE INDEX idx_wide_status ON bookings_wide(booking_status);
+"""
+
+
+def wide_rows(bookings):
+    """Flatten Booking records into one formatted BOOKING_FIELDS row per charge line"""
+    for booking in bookings:
+        header = dict(zip(generate_data.BOOKING_HEADER_FIELDS,
+                          generate_data.booking_header_row(booking.header)))
+        for line in booking.lines:
+            row = {**header, **dict(zip(generate_data.CHARGE_FIELDS, generate_data.charge_line_row(line)))}
+            yield [row[name] for name in generate_data.BOOKING_FIELDS]
+
+
+def generate_files(data_dir, num_bookings, seed):
+    """Write guests plus the wide and the normalized booking CSVs into data_dir"""
+    generate_data.NUM_GUESTS = max(num_bookings * 5 // 8, 1)
+    generate_data.NUM_BOOKINGS = num_bookings
+    rng = random.Random(seed)
+    paths = {name: os.path.join(data_dir, f'{name}.csv')
+             for name in ('guest_profiles', 'bookings_wide', 'bookings', 'booking_charges')}
+    guests = generate_data.generate_guest_profiles(rng)
+    generate_data.write_csv(paths['guest_profiles'], guests, generate_data.GUEST_FIELDS)
+    bookings = generate_data.generate_bookings_with_charges(guests, rng)
+    generate_data.write_csv(paths['bookings_wide'], wide_rows(bookings), generate_data.BOOKING_FIELDS)
+    generate_data.write_booking_files(paths['bookings'], paths['booking_charges'], bookings)
+    return paths
+
+
+def load_wide(conn, csv_path):
+    staging, columns, _ = etl_pipeline.copy_csv_to_staging(conn, csv_path, 'bookings_wide')
+    column_list = ', '.join(columns)
+    etl_pipeline.merge_from_staging(conn, staging, f"""
+        INSERT INTO bookings_wide ({column_list}) SELECT {column_list} FROM {staging}
+    """)
+
+
+def load_normalized(conn, paths):
+    etl_pipeline.bulk_load_bookings(conn, paths['bookings'])
+    etl_pipeline.bulk_load_booking_charges(conn, paths['booking_charges'])
+
+
+def time_load(conn, tables, load, repeat):
+    """Best of repeat loads into emptied tables, in seconds"""
+    best = None
+    for _ in range(repeat):
+        with conn.cursor() as cur:
+            cur.execute(f"TRUNCATE {', '.join(tables)}")
+        conn.commit()
+        start = time.perf_counter()
+        load()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def relation_bytes(conn, tables):
+    """Heap, TOAST and index bytes of tables (and their partitions) after a VACUUM"""
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for table in tables:
+            cur.execute(f"VACUUM ANALYZE {table}")
+        cur.execute("""
+            SELECT SUM(pg_total_relation_size(r.relid))::BIGINT
+            FROM unnest(%s::TEXT[]) t,
+                 LATERAL (SELECT relid FROM pg_partition_tree(t::regclass)
+                          UNION SELECT t::regclass) r
+        """, (list(tables),))
+        size = cur.fetchone()[0]
+    conn.autocommit = False
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Loads per layout; the fastest is reported (default: %(default)s)')
+    parser.add_argument('--database', default='hotel_analytics_bench',
+                        help='Scratch database name; it is dropped and recreated')
+    args = parser.parse_args()
+    
+    layouts = {
+        'wide': (['bookings_wide'], ['bookings_wide']),
+        'normalized': (['booking_charges', 'bookings'], ['bookings', 'booking_charges']),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_files(tmp, args.bookings, args.seed)
+        
+        conn = create_scratch_db(args.database)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(WIDE_TABLE_DDL)
+            conn.commit()
+            etl_pipeline.load_marketing_channels(conn)
+            etl_pipeline.bulk_load_guest_profiles(conn, paths['guest_profiles'])
+            
+            loads = {
+                'wide': lambda: load_wide(conn, paths['bookings_wide']),
+                'normalized': lambda: load_normalized(conn, paths),
+            }
+            for layout, (truncate_order, files) in layouts.items():
+                seconds = time_load(conn, truncate_order, loads[layout], args.repeat)
+                csv_bytes = sum(os.path.getsize(paths[name]) for name in files)
+                results[layout] = (csv_bytes, seconds, relation_bytes(conn, truncate_order))
+        finally:
+            conn.close()
+            drop_scratch_db(args.database)
+    
+    print(f"\n{'layout':<12} {'csv MB':>8} {'load s':>8} {'on-disk MB':>11}")
+    for layout, (csv_bytes, seconds, disk_bytes) in results.items():
+        print(f"{layout:<12} {csv_bytes / 1e6:>8.1f} {seconds:>8.2f} {disk_bytes / 1e6:>11.1f}")
+    wide, normalized = results['wide'], results['normalized']
+    print(f"\nnormalized / wide: csv {normalized[0] / wide[0]:.2f}x, "
+          f"load {normalized[1] / wide[1]:.2f}x, on-disk {normalized[2] / wide[2]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Charge line engine benchmark
+Compares rows/sec of the record-per-row Python generator against the
+column-wise NumPy engine, both with and without CSV output
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_data  # noqa: E402
+
+
+def time_python(guests, seed, prefix):
+    """Run the Python engine, returning (generate seconds, write seconds, charge lines)"""
+    start = time.perf_counter()
+    bookings = generate_data.generate_bookings_with_charges(guests, random.Random(seed))
+    generated = time.perf_counter()
+    _, num_lines = generate_data.write_booking_files(f'{prefix}_bookings.csv',
+                                                     f'{prefix}_charges.csv', bookings)
+    return generated - start, time.perf_counter() - generated, num_lines
+
+
+def time_numpy(guests, seed, prefix):
+    """Run the NumPy engine, returning (generate seconds, write seconds, charge lines)"""
+    start = time.perf_counter()
+    columns = generate_data.generate_bookings_columnar(guests, seed)
+    generated = time.perf_counter()
+    generate_data.write_columns_csv(f'{prefix}_bookings.csv', generate_data.booking_header_columns(columns),
+                                    generate_data.BOOKING_HEADER_FIELDS)
+    generate_data.write_columns_csv(f'{prefix}_charges.csv', columns, generate_data.CHARGE_FIELDS)
+    return generated - start, time.perf_counter() - generated, len(columns['line_id'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=100000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    generate_data.NUM_GUESTS = args.bookings
+    generate_data.NUM_BOOKINGS = args.bookings
+    guests = generate_data.generate_guest_profiles(random.Random(args.seed))
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine, run in (('python', time_python), ('numpy', time_numpy)):
+            results[engine] = run(guests, args.seed, os.path.join(tmp, engine))
+    
+    print(f"\n{'engine':>8} {'rows':>10} {'generate rows/s':>16} {'end-to-end rows/s':>18}")
+    for engine, (generate_s, write_s, rows) in results.items():
+        print(f"{engine:>8} {rows:>10} {rows / generate_s:>16,.0f} {rows / (generate_s + write_s):>18,.0f}")
+    
+    python_generate, python_write, python_rows = results['python']
+    numpy_generate, numpy_write, numpy_rows = results['numpy']
+    generate_speedup = (numpy_rows / numpy_generate) / (python_rows / python_generate)
+    total_speedup = ((numpy_rows / (numpy_generate + numpy_write))
+                     / (python_rows / (python_generate + python_write)))
+    print(f"\nSpeedup (generate): {generate_speedup:.1f}x")
+    print(f"Speedup (end-to-end): {total_speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Compressed CSV benchmark
+Generates a dataset as plain CSV, then writes it through compressed_io with
+each codec, level and thread count and reports the compressed size, the
+write throughput and the read throughput (decompressing and splitting the
+stream into lines, as the ETL's CSV readers do). Throughputs are in MB of
+uncompressed CSV per second. Plain CSV and a single-stream gzip.open() are
+included for reference. bench_file_formats.py times generating and loading
+each format end to end.
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'scripts'))
+
+import compressed_io  # noqa: E402
+from bench_etl_load import generate_dataset  # noqa: E402
+
+LEVELS = {'gzip': [1, 6], 'zstd': [1, 3, 9]}
+EXTENSIONS = {'gzip': 'gz', 'zstd': 'zst'}
+WRITE_CHUNK = 1 << 16
+
+
+def write_file(open_path, path, data):
+    """Write data to path in WRITE_CHUNK pieces, as a generator streams rows"""
+    with open_path(path) as f:
+        for start in range(0, len(data), WRITE_CHUNK):
+            f.write(data[start:start + WRITE_CHUNK])
+
+
+def read_lines(open_path, path):
+    """Read path line by line; returns the number of lines"""
+    with open_path(path) as f:
+        return sum(1 for _ in f)
+
+
+def best_time(repeat, func, *args):
+    """Fastest of repeat runs of func(*args), in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def variants(threads):
+    """(name, extension, open for writing, open for reading) per configuration"""
+    yield 'csv', 'csv', lambda path: open(path, 'wb'), lambda path: open(path, 'rb')
+    yield ('gzip.open 6', 'csv.gz', lambda path: gzip.open(path, 'wb', compresslevel=6),
+           lambda path: gzip.open(path, 'rb'))
+    for codec, levels in LEVELS.items():
+        for level in levels:
+            for count in threads:
+                yield (f'{codec} {level} x{count}', f'csv.{EXTENSIONS[codec]}',
+                       lambda path, level=level, count=count: compressed_io.open_file(
+                           path, 'wb', level=level, threads=count),
+                       lambda path: compressed_io.open_file(path, 'rb'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=sorted({1, os.cpu_count() or 1}),
+                        help='Compression thread counts to compare (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per measurement; the fastest is reported (default: %(default)s)')
+    args = parser.parse_args()
+    
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_dataset(tmp, args.bookings, args.seed)
+        files = {table: open(path, 'rb').read() for table, path in paths.items()}
+        raw_bytes = sum(len(data) for data in files.values())
+        
+        for name, extension, open_write, open_read in variants(args.threads):
+            write_s = read_s = 0.0
+            size = 0
+            for table, data in files.items():
+                path = os.path.join(tmp, f'{table}.bench.{extension}')
+                write_s += best_time(args.repeat, write_file, open_write, path, data)
+                read_s += best_time(args.repeat, read_lines, open_read, path)
+                size += os.path.getsize(path)
+            results.append((name, size, write_s, read_s))
+    
+    print(f"\n{len(files)} files, {raw_bytes / 1e6:.2f} MB of CSV, {os.cpu_count()} CPUs\n")
+    print(f"{'codec level xthreads':<22} {'MB':>8} {'ratio':>6} {'write MB/s':>11} {'read MB/s':>10}")
+    for name, size, write_s, read_s in results:
+        print(f"{name:<22} {size / 1e6:>8.2f} {raw_bytes / size:>6.2f} "
+              f"{raw_bytes / 1e6 / write_s:>11.1f} {raw_bytes / 1e6 / read_s:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+ETL load benchmark
+Loads the same generated dataset with the row-by-row execute_values loaders
+and with the COPY bulk loaders, and reports rows/sec per table. Runs against
+a throwaway database on the PostgreSQL server configured by the DB_* env vars.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import psycopg2
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+
+import etl_pipeline  # noqa: E402
+import generate_data  # noqa: E402
+
+TABLES = ['guest_profiles', 'bookings', 'booking_charges', 'daily_occupancy', 'marketing_performance']
+LOADERS = {
+    'row': {
+        'guest_profiles': etl_pipeline.load_guest_profiles,
+        'bookings': etl_pipeline.load_bookings,
+        'booking_charges': etl_pipeline.load_booking_charges,
+        'daily_occupancy': etl_pipeline.load_occupancy,
+        'marketing_performance': etl_pipeline.load_marketing,
+    },
+    'bulk': {
+        'guest_profiles': etl_pipeline.bulk_load_guest_profiles,
+        'bookings': etl_pipeline.bulk_load_bookings,
+        'booking_charges': etl_pipeline.bulk_load_booking_charges,
+        'daily_occupancy': etl_pipeline.bulk_load_occupancy,
+        'marketing_performance': etl_pipeline.bulk_load_marketing,
+    },
+}
+
+
+def create_scratch_db(name):
+    """(Re)create a scratch database with the project schema and connect to it"""
+    admin = psycopg2.connect(**{**etl_pipeline.DB_CONFIG, 'database': 'postgres'})
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {name}')
+        cur.execute(f'CREATE DATABASE {name}')
+    admin.close()
+    
+    conn = psycopg2.connect(**{**etl_pipeline.DB_CONFIG, 'database': name})
+    with open(os.path.join(PROJECT_ROOT, 'database', 'schema.sql'), encoding='utf-8') as f:
+        with conn.cursor() as cur:
+            cur.execute(f.read())
+    conn.commit()
+    return conn
+
+
+def drop_scratch_db(name):
+    admin = psycopg2.connect(**{**etl_pipeline.DB_CONFIG, 'database': 'postgres'})
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {name}')
+    admin.close()
+
+
+def generate_dataset(data_dir, num_bookings, seed, fmt='csv'):
+    """Write the CSV (or Parquet) files for num_bookings bookings into data_dir"""
+    generate_data.NUM_GUESTS = max(num_bookings * 5 // 8, 1)
+    generate_data.NUM_BOOKINGS = num_bookings
+    cwd = os.getcwd()
+    os.makedirs(os.path.join(data_dir, 'data'), exist_ok=True)
+    os.chdir(data_dir)
+    try:
+        generate_data.generate_streaming(random.Random(seed), fmt)
+    finally:
+        os.chdir(cwd)
+    return {table: os.path.join(data_dir, 'data', f'{table}.{fmt}') for table in TABLES}
+
+
+def count_rows(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f) - 1
+
+
+def time_path(conn, mode, paths):
+    """Load every table with one loader family, returning seconds per table"""
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join(TABLES)} CASCADE")
+    conn.commit()
+    etl_pipeline.load_marketing_channels(conn)
+    
+    timings = {}
+    for table in TABLES:
+        start = time.perf_counter()
+        LOADERS[mode][table](conn, paths[table])
+        timings[table] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', default='hotel_analytics_bench',
+                        help='Scratch database name; it is dropped and recreated')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_dataset(tmp, args.bookings, args.seed)
+        rows = {table: count_rows(path) for table, path in paths.items()}
+        
+        conn = create_scratch_db(args.database)
+        try:
+            results = {mode: time_path(conn, mode, paths) for mode in ('row', 'bulk')}
+        finally:
+            conn.close()
+            drop_scratch_db(args.database)
+    
+    print(f"\n{'table':<24} {'rows':>10} {'row rows/s':>12} {'bulk rows/s':>12} {'speedup':>8}")
+    for table in TABLES:
+        row_rate = rows[table] / results['row'][table]
+        bulk_rate = rows[table] / results['bulk'][table]
+        print(f"{table:<24} {rows[table]:>10} {row_rate:>12,.0f} {bulk_rate:>12,.0f} "
+              f"{bulk_rate / row_rate:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Parallel ETL benchmark
+Loads the same generated dataset sequentially over one connection and with
+the --parallel stage scheduler, and reports the wall-clock speedup. Runs
+against a throwaway database on the PostgreSQL server configured by the
+DB_* env vars.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'scripts'))
+
+import etl_pipeline  # noqa: E402
+from bench_etl_load import TABLES, LOADERS, create_scratch_db, drop_scratch_db, generate_dataset  # noqa: E402
+
+
+def truncate(conn):
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join(TABLES)} CASCADE")
+    conn.commit()
+
+
+def time_sequential(conn, loaders):
+    truncate(conn)
+    start = time.perf_counter()
+    etl_pipeline.load_marketing_channels(conn)
+    etl_pipeline.run_sequential(conn, loaders)
+    return time.perf_counter() - start
+
+
+def time_parallel(conn, loaders, workers):
+    truncate(conn)
+    return etl_pipeline.run_parallel(loaders, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4],
+                        help='Pool sizes to try (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', default='hotel_analytics_bench',
+                        help='Scratch database name; it is dropped and recreated')
+    args = parser.parse_args()
+    
+    # run_parallel opens its own pooled connections from DB_CONFIG
+    etl_pipeline.DB_CONFIG = {**etl_pipeline.DB_CONFIG, 'database': args.database}
+    
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_dataset(tmp, args.bookings, args.seed)
+        conn = create_scratch_db(args.database)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for mode in ('row', 'bulk'):
+                loaders = tuple(LOADERS[mode][table] for table in TABLES)
+                sequential = time_sequential(conn, loaders)
+                for workers in args.workers:
+                    results.append((mode, workers, sequential, time_parallel(conn, loaders, workers)))
+        finally:
+            os.chdir(cwd)
+            conn.close()
+            drop_scratch_db(args.database)
+    
+    print(f"\n{'loaders':<8} {'workers':>7} {'sequential':>11} {'parallel':>9} {'speedup':>8}")
+    for mode, workers, sequential, parallel in results:
+        print(f"{mode:<8} {workers:>7} {sequential:>10.2f}s {parallel:>8.2f}s {sequential / parallel:>7.2f}x")
+    print(f"({os.cpu_count()} CPUs; the PostgreSQL server shares them)")
+
+
+if __name__ == '__main__':
+    main()
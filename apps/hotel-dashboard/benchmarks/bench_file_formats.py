@@ -0,0 +1,76 @@
+"""
+Output format benchmark
+Generates the same dataset as CSV, as gzip and zstd compressed CSV, and as
+Parquet (typed, zstd-compressed, dictionary-encoded categoricals) and
+reports, per format, file size, generation time and the time to bulk load
+every table through COPY. Runs against a throwaway database on the
+PostgreSQL server configured by the DB_* env vars.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'scripts'))
+
+from bench_etl_load import TABLES, create_scratch_db, drop_scratch_db, generate_dataset, time_path  # noqa: E402
+
+FORMATS = ['csv', 'csv.gz', 'csv.zst', 'parquet']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Loads per format; the fastest is reported (default: %(default)s)')
+    parser.add_argument('--database', default='hotel_analytics_bench',
+                        help='Scratch database name; it is dropped and recreated')
+    args = parser.parse_args()
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for fmt in FORMATS:
+            start = time.perf_counter()
+            paths[fmt] = generate_dataset(tmp, args.bookings, args.seed, fmt)
+            generate_seconds = time.perf_counter() - start
+            file_bytes = {table: os.path.getsize(path) for table, path in paths[fmt].items()}
+            results[fmt] = [generate_seconds, file_bytes, None]
+        
+        conn = create_scratch_db(args.database)
+        try:
+            for fmt in FORMATS:
+                for _ in range(args.repeat):
+                    timings = time_path(conn, 'bulk', paths[fmt])
+                    best = results[fmt][2]
+                    results[fmt][2] = timings if best is None else {
+                        table: min(best[table], timings[table]) for table in TABLES
+                    }
+        finally:
+            conn.close()
+            drop_scratch_db(args.database)
+    
+    print(f"\n{'table':<22} " + ' '.join(f"{fmt + ' MB':>11} {fmt + ' load s':>14}" for fmt in FORMATS))
+    for table in TABLES:
+        print(f"{table:<22} " + ' '.join(
+            f"{results[fmt][1][table] / 1e6:>11.2f} {results[fmt][2][table]:>14.2f}" for fmt in FORMATS
+        ))
+    print(f"\n{'format':<10} {'MB':>8} {'generate s':>11} {'load s':>8}")
+    for fmt in FORMATS:
+        generate_seconds, file_bytes, timings = results[fmt]
+        print(f"{fmt:<10} {sum(file_bytes.values()) / 1e6:>8.2f} {generate_seconds:>11.2f} "
+              f"{sum(timings.values()):>8.2f}")
+    csv_result, parquet_result = results['csv'], results['parquet']
+    print(f"\nparquet / csv: size {sum(parquet_result[1].values()) / sum(csv_result[1].values()):.2f}x, "
+          f"generate {parquet_result[0] / csv_result[0]:.2f}x, "
+          f"load {sum(parquet_result[2].values()) / sum(csv_result[2].values()):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
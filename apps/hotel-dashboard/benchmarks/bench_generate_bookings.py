@@ -0,0 +1,63 @@
+"""
+Scaling benchmark for generate_bookings_with_charges
+Times booking generation at increasing NUM_BOOKINGS and checks that the
+cost per generated booking stays flat (linear total runtime)
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_data  # noqa: E402
+
+DEFAULT_SCALES = [800, 10000, 100000, 1000000]
+BASE_ROOM_DISTRIBUTION = dict(generate_data.ROOM_DISTRIBUTION)
+
+
+def run_scale(num_bookings):
+    """Generate up to num_bookings bookings and return (seconds, bookings, line count)"""
+    # The default hotel fills up long before 100000 bookings, so grow it with the
+    # scale; guests and rooms can still run out, so report what was generated
+    generate_data.NUM_GUESTS = num_bookings
+    generate_data.NUM_BOOKINGS = num_bookings
+    generate_data.ROOM_DISTRIBUTION = {
+        room_type: max(rooms * num_bookings // 800, rooms)
+        for room_type, rooms in BASE_ROOM_DISTRIBUTION.items()
+    }
+    guests = generate_data.generate_guest_profiles()
+    
+    start = time.perf_counter()
+    bookings = generate_data.generate_bookings_with_charges(guests)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(bookings), sum(len(booking.lines) for booking in bookings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='Booking counts to benchmark (default: %(default)s)')
+    parser.add_argument('--max-ratio', type=float, default=2.0,
+                        help='Fail if per-booking time at the largest scale exceeds '
+                             'the smallest scale by more than this factor')
+    args = parser.parse_args()
+    
+    print(f"{'requested':>10} {'bookings':>10} {'lines':>11} {'seconds':>9} {'us/booking':>11}")
+    per_booking = []
+    for num_bookings in args.scales:
+        elapsed, bookings, lines = run_scale(num_bookings)
+        per_booking.append(elapsed / bookings * 1e6)
+        print(f"{num_bookings:>10} {bookings:>10} {lines:>11} {elapsed:>9.2f} {per_booking[-1]:>11.1f}")
+    
+    ratio = per_booking[-1] / per_booking[0]
+    print(f"\nPer-booking cost ratio (largest / smallest scale): {ratio:.2f}")
+    if ratio > args.max_ratio:
+        print("FAIL: booking generation is no longer linear in NUM_BOOKINGS")
+        sys.exit(1)
+    print("OK: runtime scales linearly")
+
+
+if __name__ == '__main__':
+    main()
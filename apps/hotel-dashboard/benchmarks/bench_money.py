@@ -0,0 +1,110 @@
+"""
+Money arithmetic benchmark
+Runs the generator's per-line charge arithmetic (unit price, subtotal, tax,
+line total, booking total, formatting) over the same stream of random prices
+twice: with Decimal(str(float)) values at unbounded precision, as the
+generator used to, and with integer cents rounded per line. Reports lines/sec
+and bytes of formatted output for each, then times the full Python booking,
+occupancy and marketing generation.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_data  # noqa: E402
+
+
+def decimal_lines(prices):
+    """Charge lines with Decimal amounts, formatted with str()"""
+    output = []
+    total_revenue = Decimal('0.00')
+    for price in prices:
+        unit_price = Decimal(str(price))
+        quantity = Decimal('1.00')
+        subtotal = unit_price * quantity
+        tax = subtotal * generate_data.TAX_RATE
+        total = subtotal + tax
+        total_revenue += total
+        output.extend((str(unit_price), str(quantity), str(subtotal), str(tax), str(total)))
+    output.append(str(total_revenue))
+    return output
+
+
+def cents_lines(prices):
+    """Charge lines with integer cents, formatted with format_fixed()"""
+    to_cents = generate_data.to_cents
+    format_fixed = generate_data.format_fixed
+    basis_points = generate_data.TAX_RATE_BASIS_POINTS
+    quantity = 1
+    quantity_text = format_fixed(quantity * 100)
+    output = []
+    total_revenue = 0
+    for price in prices:
+        unit_price = to_cents(price)
+        subtotal = unit_price * quantity
+        tax = (subtotal * basis_points + 5000) // 10000
+        total = subtotal + tax
+        total_revenue += total
+        output.extend((format_fixed(unit_price), quantity_text, format_fixed(subtotal),
+                       format_fixed(tax), format_fixed(total)))
+    output.append(format_fixed(total_revenue))
+    return output
+
+
+def best_of(repeat, run, *args):
+    """Fastest of repeat runs, in seconds, and the last run's result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(*args)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=1000000,
+                        help='Charge lines for the arithmetic kernels (default: %(default)s)')
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Bookings for the full generation run (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per kernel; the fastest is reported (default: %(default)s)')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    prices = [rng.uniform(15, 45) * rng.randint(1, 6) for _ in range(args.lines)]
+    
+    results = {}
+    for name, kernel in (('decimal', decimal_lines), ('cents', cents_lines)):
+        seconds, output = best_of(args.repeat, kernel, prices)
+        results[name] = (seconds, sum(len(value) for value in output))
+    
+    print(f"\n{'money':<8} {'lines/s':>12} {'output MB':>10}")
+    for name, (seconds, output_bytes) in results.items():
+        print(f"{name:<8} {args.lines / seconds:>12,.0f} {output_bytes / 1e6:>10.1f}")
+    print(f"\nSpeedup (cents over decimal): {results['decimal'][0] / results['cents'][0]:.2f}x")
+    
+    generate_data.NUM_GUESTS = max(args.bookings * 5 // 8, 1)
+    generate_data.NUM_BOOKINGS = args.bookings
+    guests = generate_data.generate_guest_profiles(random.Random(args.seed))
+    start = time.perf_counter()
+    bookings = generate_data.generate_bookings_with_charges(guests, random.Random(args.seed))
+    generated = time.perf_counter()
+    generate_data.generate_daily_occupancy(bookings, random.Random(args.seed))
+    generate_data.generate_marketing_performance(bookings, random.Random(args.seed))
+    aggregated = time.perf_counter()
+    num_lines = sum(len(booking.lines) for booking in bookings)
+    print(f"\nFull generation of {num_lines} lines: bookings {generated - start:.2f}s, "
+          f"occupancy and marketing {aggregated - generated:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Partition pruning benchmark
+Generates bookings over several seasons, loads them into the monthly
+partitioned fact tables and into unpartitioned copies with the same
+indexes, and times the dashboard's date-bounded revenue-by-date and
+occupancy queries against both. Runs against a throwaway database on the
+PostgreSQL server configured by the DB_* env vars.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'scripts'))
+
+import etl_pipeline  # noqa: E402
+import generate_data  # noqa: E402
+from bench_etl_load import TABLES, LOADERS, create_scratch_db, drop_scratch_db, generate_dataset  # noqa: E402
+
+# Unpartitioned copies of the partitioned tables, with the same indexes
+HEAP_TABLES_DDL = """
+CREATE TABLE booking_charges_heap AS SELECT * FROM booking_charges;
+ALTER TABLE booking_charges_heap ADD PRIMARY KEY (line_id);
+CREATE INDEX ON booking_charges_heap(booking_id);
+CREATE INDEX ON booking_charges_heap(charge_date);
+CREATE TABLE daily_occupancy_heap AS SELECT * FROM daily_occupancy;
+ALTER TABLE daily_occupancy_heap ADD PRIMARY KEY (id);
+ALTER TABLE daily_occupancy_heap ADD UNIQUE (date, room_type);
+CREATE INDEX ON daily_occupancy_heap(date);
+CREATE INDEX ON daily_occupancy_heap(room_type);
+"""
+
+QUERIES = {
+    # The revenue API's daily breakdown, as it reads the fact tables
+    'revenue_by_date': """
+        SELECT
+            c.charge_date,
+            SUM(CASE WHEN c.charge_category = 'Room' THEN c.line_subtotal_eur ELSE 0 END) as room_revenue,
+            SUM(CASE WHEN c.charge_category = 'F&B' THEN c.line_subtotal_eur ELSE 0 END) as fb_revenue,
+            SUM(c.line_subtotal_eur) as total_revenue
+        FROM {booking_charges} c
+        JOIN bookings b ON b.booking_id = c.booking_id
+        WHERE b.booking_status = 'Stayed'
+          AND c.charge_date BETWEEN %(start)s AND %(end)s
+        GROUP BY c.charge_date
+        ORDER BY c.charge_date
+    """,
+    'occupancy_trend': """
+        SELECT date, occupancy_pct, adr_eur, revpar_eur
+        FROM {daily_occupancy}
+        WHERE room_type = 'All' AND date BETWEEN %(start)s AND %(end)s
+        ORDER BY date
+    """,
+}
+
+
+def time_query(conn, sql, params, repeat):
+    """Median milliseconds over repeat runs, after one warm-up run"""
+    timings = []
+    with conn.cursor() as cur:
+        for _ in range(repeat + 1):
+            start = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings[1:])
+
+
+def partitions_scanned(conn, sql, params):
+    with conn.cursor() as cur:
+        cur.execute(f"EXPLAIN {sql}", params)
+        plan = '\n'.join(row[0] for row in cur.fetchall())
+    return sum(plan.count(f'{table}_y') for table in etl_pipeline.PARTITION_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=50000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seasons', type=int, default=4,
+                        help='Winter seasons to spread them over, ending April 2025 '
+                             '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Timed runs per query; the median is reported (default: %(default)s)')
+    parser.add_argument('--database', default='hotel_analytics_bench',
+                        help='Scratch database name; it is dropped and recreated')
+    args = parser.parse_args()
+
+    generate_data.START_DATE = datetime(2025 - args.seasons, 12, 1)
+    windows = {
+        'one month': {'start': '2025-01-01', 'end': '2025-01-31'},
+        'one season': {'start': '2024-12-01', 'end': '2025-04-30'},
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_dataset(tmp, args.bookings, args.seed)
+
+        conn = create_scratch_db(args.database)
+        try:
+            etl_pipeline.load_marketing_channels(conn)
+            for table in TABLES:
+                LOADERS['bulk'][table](conn, paths[table])
+            with conn.cursor() as cur:
+                cur.execute(HEAP_TABLES_DDL)
+            conn.commit()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("VACUUM ANALYZE")
+                cur.execute("SELECT COUNT(*) FROM booking_charges")
+                lines = cur.fetchone()[0]
+                cur.execute("SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'booking_charges'::regclass")
+                months = cur.fetchone()[0]
+            print(f"\n{lines} charge lines in {months} monthly partitions")
+
+            for query, template in QUERIES.items():
+                partitioned = template.format(booking_charges='booking_charges',
+                                              daily_occupancy='daily_occupancy')
+                heap = template.format(booking_charges='booking_charges_heap',
+                                       daily_occupancy='daily_occupancy_heap')
+                for window, params in windows.items():
+                    results.append((
+                        query, window,
+                        time_query(conn, heap, params, args.repeat),
+                        time_query(conn, partitioned, params, args.repeat),
+                        partitions_scanned(conn, partitioned, params),
+                    ))
+        finally:
+            conn.close()
+            drop_scratch_db(args.database)
+
+    print(f"\n{'query':<16} {'window':<11} {'heap ms':>8} {'partitioned ms':>15} "
+          f"{'partitions':>11} {'speedup':>8}")
+    for query, window, heap_ms, partitioned_ms, scanned in results:
+        print(f"{query:<16} {window:<11} {heap_ms:>8.2f} {partitioned_ms:>15.2f} "
+              f"{scanned:>11} {heap_ms / partitioned_ms:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Record memory benchmark
+Uses tracemalloc to report the bytes per booking held by the generator's
+in-memory guests and bookings: first as GuestProfile/Booking namedtuple
+records, then rebuilt as the dict-per-guest and 30-key dict-per-charge-line
+layout the generator used before. The dicts share the records' value
+objects, so the "dicts" figure only counts container overhead and is a lower
+bound on the old layout, which also held a fresh string per line for every
+date and repeated categorical value.
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_data  # noqa: E402
+
+
+def traced(func):
+    """Call func under tracemalloc, returning (result, bytes still allocated)"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, allocated
+
+
+def generate_records(seed):
+    """Guests and bookings as generated (namedtuple records)"""
+    rng = random.Random(seed)
+    guests = generate_data.generate_guest_profiles(rng)
+    return guests, generate_data.generate_bookings_with_charges(guests, rng)
+
+
+def as_dicts(guests, bookings):
+    """The same data as one dict per guest and one wide dict per charge line"""
+    guest_dicts = [guest._asdict() for guest in guests]
+    line_dicts = []
+    for booking in bookings:
+        header = booking.header._asdict()
+        for line in booking.lines:
+            line_dicts.append({**header, **line._asdict()})
+    return guest_dicts, line_dicts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    generate_data.NUM_GUESTS = max(args.bookings * 5 // 8, 1)
+    generate_data.NUM_BOOKINGS = args.bookings
+    
+    (guests, bookings), record_bytes = traced(lambda: generate_records(args.seed))
+    _, dict_bytes = traced(lambda: as_dicts(guests, bookings))
+    num_bookings = len(bookings)
+    num_lines = sum(len(booking.lines) for booking in bookings)
+    
+    print(f"{len(guests)} guests, {num_bookings} bookings, {num_lines} charge lines\n")
+    print(f"{'layout':<10} {'MB':>8} {'bytes/booking':>14} {'bytes/line':>11}")
+    for name, allocated in (('records', record_bytes), ('dicts', dict_bytes)):
+        print(f"{name:<10} {allocated / 1e6:>8.1f} {allocated / num_bookings:>14,.0f} "
+              f"{allocated / num_lines:>11,.0f}")
+    print(f"\ndicts / records: {dict_bytes / record_bytes:.2f}x "
+          f"(dict containers only, excluding the values they share)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+Benchmark suite
+For each scale (number of bookings) it:
+- times the four generator stages, recording rows/sec and peak RSS for each;
+- loads the generated files into a throwaway database one table at a time;
+- times every SQL statement used by the dashboard API routes;
+- times the same queries in the in-process analytics engine, on the files.
+
+The SQL is read from app/api/*/route.ts, so it is always the SQL the
+routes actually run. Results are written as JSON. Pass --baseline with an
+earlier result file to print the change in each timing. Runs against the
+PostgreSQL server configured by the DB_* env vars.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts'))
+
+import analytics_engine  # noqa: E402
+import etl_pipeline  # noqa: E402
+import generate_data  # noqa: E402
+from bench_etl_load import TABLES, LOADERS, create_scratch_db, drop_scratch_db  # noqa: E402
+
+DEFAULT_SCALES = [800, 10000, 100000, 1000000]
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+# Default date range of the API routes
+QUERY_PARAMS = {'start': '2024-12-01', 'end': '2025-04-30'}
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter (Linux only; elsewhere the peak is process-wide)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Peak resident set size since the last reset_peak_rss(), in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def timed_stage(func, *args):
+    """Run one stage, returning (result, seconds, peak RSS in MB while it ran)"""
+    reset_peak_rss()
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start, peak_rss_mb()
+
+
+def stage_result(rows, seconds, rss_mb=None, **extra):
+    result = {'rows': rows, 'seconds': round(seconds, 4), 'rows_per_sec': round(rows / seconds, 1)}
+    if rss_mb is not None:
+        result['peak_rss_mb'] = round(rss_mb, 1)
+    result.update(extra)
+    return result
+
+
+def bench_generator(num_bookings, seed, data_dir):
+    """Time the generator stages and write their output into data_dir"""
+    generate_data.NUM_GUESTS = max(num_bookings * 5 // 8, 1)
+    generate_data.NUM_BOOKINGS = num_bookings
+    rng = random.Random(seed)
+    results = {}
+    
+    guests, seconds, rss = timed_stage(generate_data.generate_guest_profiles, rng)
+    results['generate_guest_profiles'] = stage_result(len(guests), seconds, rss)
+    
+    bookings, seconds, rss = timed_stage(generate_data.generate_bookings_with_charges, guests, rng)
+    num_lines = sum(len(booking.lines) for booking in bookings)
+    results['generate_bookings_with_charges'] = stage_result(num_lines, seconds, rss,
+                                                             bookings=len(bookings))
+    
+    occupancy, seconds, rss = timed_stage(generate_data.generate_daily_occupancy, bookings, rng)
+    results['generate_daily_occupancy'] = stage_result(len(occupancy), seconds, rss)
+    
+    marketing, seconds, rss = timed_stage(generate_data.generate_marketing_performance, bookings, rng)
+    results['generate_marketing_performance'] = stage_result(len(marketing), seconds, rss)
+    
+    paths = {table: os.path.join(data_dir, f'{table}.csv') for table in TABLES}
+    start = time.perf_counter()
+    generate_data.write_rows(paths['guest_profiles'], guests, generate_data.GUEST_FIELDS)
+    generate_data.write_booking_files(paths['bookings'], paths['booking_charges'], bookings)
+    generate_data.write_rows(paths['daily_occupancy'], occupancy, generate_data.OCCUPANCY_FIELDS)
+    generate_data.write_rows(paths['marketing_performance'], marketing, generate_data.MARKETING_FIELDS)
+    rows = len(guests) + len(bookings) + num_lines + len(occupancy) + len(marketing)
+    results['write_csv'] = stage_result(rows, time.perf_counter() - start)
+    return results, paths
+
+
+def count_rows(conn, table):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        return cur.fetchone()[0]
+
+
+def bench_etl(conn, paths, mode):
+    """Load each table in dependency order, then refresh the derived tables"""
+    etl_pipeline.load_marketing_channels(conn)
+    results = {}
+    for table in TABLES:
+        start = time.perf_counter()
+        LOADERS[mode][table](conn, paths[table])
+        results[table] = stage_result(count_rows(conn, table), time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    guests = etl_pipeline.refresh_guest_lifetime_stats(conn)
+    conn.commit()
+    results['guest_lifetime_stats'] = stage_result(guests, time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    etl_pipeline.refresh_rollups(conn)
+    rows = sum(count_rows(conn, view) for view in etl_pipeline.ROLLUP_VIEWS)
+    results['rollups'] = stage_result(rows, time.perf_counter() - start)
+    return results
+
+
+def timed_runs(func, repeat):
+    """Median and max milliseconds of func() over repeat runs, after one warm-up run"""
+    timings = []
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        rows = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'rows': rows,
+        'median_ms': round(statistics.median(timings[1:]), 3),
+        'max_ms': round(max(timings[1:]), 3),
+    }
+
+
+def bench_queries(conn, queries, repeat):
+    """Time each route's SQL statement"""
+    results = {}
+    with conn.cursor() as cur:
+        def run(sql):
+            cur.execute(sql, QUERY_PARAMS)
+            return len(cur.fetchall())
+        
+        for name, sql in queries.items():
+            results[name] = timed_runs(lambda: run(sql), repeat)
+    return results
+
+
+def bench_engine(data_dir, repeat):
+    """Time loading the CSVs into the analytics engine, then each route query in it"""
+    ds = analytics_engine.Dataset(data_dir)
+    loads = {}
+    for table in analytics_engine.TABLE_COLUMNS:
+        start = time.perf_counter()
+        loads[table] = stage_result(ds.table(table).num_rows, time.perf_counter() - start)
+    queries = {}
+    for name in analytics_engine.QUERIES:
+        queries[name] = timed_runs(lambda: len(analytics_engine.run_query(
+            ds, name, QUERY_PARAMS['start'], QUERY_PARAMS['end'])), repeat)
+    return loads, queries
+
+
+def run_scale(num_bookings, args, queries):
+    with tempfile.TemporaryDirectory() as tmp:
+        generator, paths = bench_generator(num_bookings, args.seed, tmp)
+        engine_load, engine = bench_engine(tmp, args.repeat)
+        results = {'generator': generator, 'engine_load': engine_load, 'engine': engine}
+        if args.skip_db:
+            return results
+        
+        conn = create_scratch_db(args.database)
+        try:
+            results['etl'] = bench_etl(conn, paths, args.etl_mode)
+            conn.commit()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("VACUUM ANALYZE")
+            results['queries'] = bench_queries(conn, queries, args.repeat)
+            return results
+        finally:
+            conn.close()
+            drop_scratch_db(args.database)
+
+
+def iter_timings(results):
+    """Yield (key, milliseconds) for every timing in a result file, for comparisons"""
+    for scale, sections in results['scales'].items():
+        for section, stages in sections.items():
+            for stage, values in stages.items():
+                yield (scale, section, stage), values.get('median_ms', values.get('seconds', 0) * 1000)
+
+
+def print_summary(results):
+    for scale, sections in results['scales'].items():
+        print(f"\n=== {scale} bookings")
+        print(f"{'stage':<44} {'rows':>10} {'seconds':>9} {'rows/s':>12} {'peak MB':>8}")
+        for section in ('generator', 'etl', 'engine_load'):
+            for stage, values in sections.get(section, {}).items():
+                rss = values.get('peak_rss_mb')
+                print(f"{section + '.' + stage:<44} {values['rows']:>10} {values['seconds']:>9.3f} "
+                      f"{values['rows_per_sec']:>12,.0f} {'' if rss is None else f'{rss:.1f}':>8}")
+        for section in ('queries', 'engine'):
+            if section in sections:
+                print(f"\n{section + ' query':<44} {'rows':>10} {'median ms':>10} {'max ms':>9}")
+                for name, values in sections[section].items():
+                    print(f"{name:<44} {values['rows']:>10} {values['median_ms']:>10.2f} "
+                          f"{values['max_ms']:>9.2f}")
+
+
+def print_comparison(results, baseline):
+    previous = dict(iter_timings(baseline))
+    print(f"\n{'scale':>8} {'stage':<44} {'baseline ms':>12} {'current ms':>11} {'change':>8}")
+    for key, ms in iter_timings(results):
+        if previous.get(key):
+            scale, section, stage = key
+            print(f"{scale:>8} {section + '.' + stage:<44} {previous[key]:>12.2f} {ms:>11.2f} "
+                  f"{(ms / previous[key] - 1) * 100:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help='Booking counts to benchmark (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--etl-mode', choices=sorted(LOADERS), default='bulk',
+                        help='Loader family to time (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Timed runs per query; the median is reported (default: %(default)s)')
+    parser.add_argument('--database', default='hotel_analytics_bench',
+                        help='Scratch database name; it is dropped and recreated')
+    parser.add_argument('--skip-db', action='store_true',
+                        help='Only benchmark the generator and the analytics engine (no PostgreSQL needed)')
+    parser.add_argument('--output',
+                        help='Result file (default: benchmarks/results/suite-<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier result file to compare timings against')
+    args = parser.parse_args()
+    
+    queries = analytics_engine.route_queries()
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'etl_mode': None if args.skip_db else args.etl_mode,
+        'scales': {},
+    }
+    for num_bookings in args.scales:
+        print(f"\nBenchmarking {num_bookings} bookings...")
+        scale = run_scale(num_bookings, args, queries)
+        # Label each scale with the bookings actually generated: a full hotel
+        # or too few guests can leave fewer than were asked for
+        generated = scale['generator']['generate_bookings_with_charges']['bookings']
+        label = str(generated) if generated == num_bookings else f"{generated} of {num_bookings}"
+        results['scales'][label] = scale
+    
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"suite-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    
+    print_summary(results)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
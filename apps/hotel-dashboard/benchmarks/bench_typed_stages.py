@@ -0,0 +1,166 @@
+"""
+Typed intermediates benchmark
+Times the stages after booking generation on the same bookings twice: with
+the typed records the generator now passes between stages (datetimes and
+integer cents, formatted only by the writer), and with the ISO-string and
+2-decimal-string records it used to pass, which the occupancy and marketing
+stages parsed back with strptime/fromisoformat and per-line amount parsing.
+The string records' formatting cost is reported as its own stage, since the
+generator used to pay it while building the records. CSV and (with pyarrow)
+Parquet writing are timed for both; the Parquet writer takes typed records
+without formatting and re-parsing them.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import generate_data  # noqa: E402
+from generate_data import parse_cents, parse_iso_date  # noqa: E402
+
+
+def as_strings(bookings):
+    """The same bookings with every date and amount formatted, as records used to hold them"""
+    return [
+        generate_data.Booking(
+            generate_data.BookingHeader(*generate_data.booking_header_row(booking.header)),
+            [generate_data.ChargeLine(*generate_data.charge_line_row(line)) for line in booking.lines]
+        )
+        for booking in bookings
+    ]
+
+
+def parse_occupancy(occupancy_index, booking):
+    """accumulate_occupancy over string records, parsing dates and amounts"""
+    header = booking.header
+    if header.booking_status != 'Stayed':
+        return
+    start = generate_data.START_DATE.date()
+    num_days = len(occupancy_index['room_revenue'][generate_data.ROOM_TYPES[0]])
+    check_in = max((parse_iso_date(header.check_in_date) - start).days, 0)
+    check_out = min((parse_iso_date(header.check_out_date) - start).days, num_days)
+    if check_in < check_out:
+        rooms_sold = occupancy_index['rooms_sold'][header.room_type]
+        rooms_sold[check_in] += 1
+        rooms_sold[check_out] -= 1
+    room_revenue = occupancy_index['room_revenue'][header.room_type]
+    for line in booking.lines:
+        if line.charge_category == 'Room':
+            day = (parse_iso_date(line.charge_date) - start).days
+            if 0 <= day < num_days:
+                room_revenue[day] += parse_cents(line.line_subtotal_eur)
+
+
+def parse_marketing(channel_performance, booking):
+    """accumulate_marketing over string records, summing parsed line totals"""
+    header = booking.header
+    if header.booking_status != 'Stayed':
+        return
+    check_in = parse_iso_date(header.check_in_date)
+    perf = channel_performance.setdefault(check_in, {}).setdefault(
+        header.booking_channel, {'bookings': 0, 'room_nights': 0, 'revenue': 0})
+    perf['bookings'] += 1
+    perf['room_nights'] += header.nights
+    for line in booking.lines:
+        perf['revenue'] += parse_cents(line.line_total_eur)
+
+
+def format_all(bookings):
+    """Format every date and amount of typed records, as string records were built"""
+    for booking in bookings:
+        generate_data.booking_header_row(booking.header)
+        for line in booking.lines:
+            generate_data.charge_line_row(line)
+
+
+def fold(accumulate, totals, bookings):
+    """Run an occupancy or marketing accumulator over every booking into totals"""
+    for booking in bookings:
+        accumulate(totals, booking)
+    return totals
+
+
+def write_strings(directory, bookings, fmt):
+    """Write string records as they are, the way the writer used to"""
+    with generate_data.open_writer(os.path.join(directory, f'bookings.{fmt}'),
+                                   generate_data.BOOKING_HEADER_FIELDS, fmt) as booking_writer, \
+            generate_data.open_writer(os.path.join(directory, f'charges.{fmt}'),
+                                      generate_data.CHARGE_FIELDS, fmt) as charge_writer:
+        for booking in bookings:
+            booking_writer.writerow(booking.header)
+            charge_writer.writerows(booking.lines)
+
+
+def write_typed(directory, bookings, fmt):
+    """Write typed records with write_booking, which formats them for CSV"""
+    with generate_data.open_writer(os.path.join(directory, f'bookings.{fmt}'),
+                                   generate_data.BOOKING_HEADER_FIELDS, fmt) as booking_writer, \
+            generate_data.open_writer(os.path.join(directory, f'charges.{fmt}'),
+                                      generate_data.CHARGE_FIELDS, fmt) as charge_writer:
+        for booking in bookings:
+            generate_data.write_booking(booking_writer, charge_writer, booking)
+
+
+def has_pyarrow():
+    """Whether the Parquet writer can run"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def timed(run, *args):
+    """Seconds taken by run(*args), and its result"""
+    start = time.perf_counter()
+    result = run(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=20000,
+                        help='Number of bookings to generate (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    generate_data.NUM_GUESTS = max(args.bookings * 5 // 8, 1)
+    generate_data.NUM_BOOKINGS = args.bookings
+    rng = random.Random(args.seed)
+    guests = generate_data.generate_guest_profiles(rng)
+    bookings = generate_data.generate_bookings_with_charges(guests, rng)
+    num_lines = sum(len(booking.lines) for booking in bookings)
+    
+    string_bookings = as_strings(bookings)
+    format_s, _ = timed(format_all, bookings)
+    stages = []
+    for name, new_totals, parse, accumulate in (
+            ('occupancy', generate_data.new_occupancy_index, parse_occupancy,
+             generate_data.accumulate_occupancy),
+            ('marketing', dict, parse_marketing, generate_data.accumulate_marketing)):
+        string_s, string_totals = timed(fold, parse, new_totals(), string_bookings)
+        typed_s, typed_totals = timed(fold, accumulate, new_totals(), bookings)
+        assert string_totals == typed_totals, f"{name} totals differ"
+        stages.append((name, string_s, typed_s))
+    stages.append(('format', format_s, 0.0))
+    for fmt in ('csv', 'parquet') if has_pyarrow() else ('csv',):
+        with tempfile.TemporaryDirectory() as tmp:
+            string_write_s, _ = timed(write_strings, tmp, string_bookings, fmt)
+            typed_write_s, _ = timed(write_typed, tmp, bookings, fmt)
+        stages.append((f'write {fmt}', string_write_s, typed_write_s))
+    
+    print(f"\n{len(bookings)} bookings, {num_lines} charge lines\n")
+    print(f"{'stage':<13} {'strings s':>10} {'typed s':>9} {'saved s':>9}")
+    for name, string_s, typed_s in stages:
+        print(f"{name:<13} {string_s:>10.3f} {typed_s:>9.3f} {string_s - typed_s:>9.3f}")
+    print("\nformat: formatting every date and amount, which string records paid at generation;"
+          "\ntyped records pay it in 'write csv' and skip it for Parquet, whose columns are typed")
+
+
+if __name__ == '__main__':
+    main()
@@ -64,12 +64,61 @@ CREATE TABLE IF NOT EXISTS date_dimension (
 -- FACT TABLES
 -- ============================================
 
--- Bookings and Charges Fact Table
-CREATE TABLE IF NOT EXISTS bookings_with_charges (
-    line_id VARCHAR(100) PRIMARY KEY,
-    booking_id VARCHAR(50) NOT NULL,
+-- booking_charges, daily_occupancy and marketing_performance are range
+-- partitioned by month on their date column, so date-bounded queries only
+-- scan the months they cover and old seasons can be detached. Partitions
+-- are named <table>_yYYYYmMM and created by ensure_month_partitions, which
+-- etl_pipeline.py calls for the months in every file it loads.
+CREATE OR REPLACE FUNCTION ensure_month_partitions(parent TEXT, first_date DATE, last_date DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month DATE := date_trunc('month', first_date)::DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month <= last_date LOOP
+        partition_name := format('%s_y%sm%s', parent, to_char(month, 'YYYY'), to_char(month, 'MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Create then attach: ATTACH PARTITION only needs a SHARE UPDATE
+            -- EXCLUSIVE lock, so loads already writing to parent carry on.
+            -- Check again once locked, another load may have just created it
+            EXECUTE format('LOCK TABLE %I IN SHARE UPDATE EXCLUSIVE MODE', parent);
+            IF to_regclass(partition_name) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                               partition_name, parent);
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               parent, partition_name, month, (month + INTERVAL '1 month')::DATE);
+                created := created + 1;
+            END IF;
+        END IF;
+        month := (month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Set aside the rows of fact tables created before partitioning; they are
+-- copied into the partitioned tables below
+DO $$
+DECLARE
+    fact_table TEXT;
+BEGIN
+    FOREACH fact_table IN ARRAY ARRAY['booking_charges', 'daily_occupancy', 'marketing_performance'] LOOP
+        IF EXISTS (
+            SELECT 1 FROM pg_class
+            WHERE oid = to_regclass(fact_table) AND relkind = 'r'
+        ) THEN
+            EXECUTE format('CREATE TABLE %I AS SELECT * FROM %I', fact_table || '_unpartitioned', fact_table);
+            -- Dependent views are recreated further down
+            EXECUTE format('DROP TABLE %I CASCADE', fact_table);
+        END IF;
+    END LOOP;
+END $$;
+
+-- Bookings Fact Table (one row per booking)
+CREATE TABLE IF NOT EXISTS bookings (
+    booking_id VARCHAR(50) PRIMARY KEY,
     guest_id VARCHAR(50) NOT NULL,
-    -- Booking-level fields
     check_in_date DATE NOT NULL,
     check_out_date DATE NOT NULL,
     nights INTEGER,
@@ -82,17 +131,7 @@ CREATE TABLE IF NOT EXISTS bookings_with_charges (
     booking_channel VARCHAR(100),
     booking_created_date DATE,
     country VARCHAR(100),
-    -- Charge line-item fields
-    charge_date DATE NOT NULL,
-    charge_category VARCHAR(50),
-    charge_item VARCHAR(200),
-    unit_price_eur DECIMAL(10, 2),
-    quantity DECIMAL(10, 2) DEFAULT 1.00,
-    line_subtotal_eur DECIMAL(10, 2),
-    tax_rate DECIMAL(5, 4) DEFAULT 0.10,
-    line_tax_eur DECIMAL(10, 2),
-    line_total_eur DECIMAL(10, 2),
-    -- Booking-level revenue summaries (precomputed)
+    -- Revenue summaries (precomputed)
     room_revenue_eur DECIMAL(12, 2),
     fb_revenue_eur DECIMAL(12, 2),
     activities_revenue_eur DECIMAL(12, 2),
@@ -104,16 +143,80 @@ CREATE TABLE IF NOT EXISTS bookings_with_charges (
     FOREIGN KEY (booking_channel) REFERENCES marketing_channels(channel)
 );
 
+-- Booking Charges Fact Table (one row per charge line item)
+CREATE TABLE IF NOT EXISTS booking_charges (
+    line_id VARCHAR(100) NOT NULL,
+    booking_id VARCHAR(50) NOT NULL,
+    charge_date DATE NOT NULL,
+    charge_category VARCHAR(50),
+    charge_item VARCHAR(200),
+    unit_price_eur DECIMAL(10, 2),
+    quantity DECIMAL(10, 2) DEFAULT 1.00,
+    line_subtotal_eur DECIMAL(10, 2),
+    tax_rate DECIMAL(5, 4) DEFAULT 0.10,
+    line_tax_eur DECIMAL(10, 2),
+    line_total_eur DECIMAL(10, 2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- The partition key has to be part of the primary key
+    PRIMARY KEY (line_id, charge_date),
+    FOREIGN KEY (booking_id) REFERENCES bookings(booking_id)
+) PARTITION BY RANGE (charge_date);
+
+-- Move data from the old denormalized bookings_with_charges table, which is
+-- replaced by a view over the two tables above
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = current_schema()
+          AND table_name = 'bookings_with_charges' AND table_type = 'BASE TABLE'
+    ) THEN
+        INSERT INTO bookings (
+            booking_id, guest_id, check_in_date, check_out_date, nights, num_guests,
+            num_adults, num_children, room_type, board_type, booking_status,
+            booking_channel, booking_created_date, country, room_revenue_eur,
+            fb_revenue_eur, activities_revenue_eur, total_revenue_eur, discount_eur,
+            net_revenue_eur
+        )
+        SELECT DISTINCT ON (booking_id)
+            booking_id, guest_id, check_in_date, check_out_date, nights, num_guests,
+            num_adults, num_children, room_type, board_type, booking_status,
+            booking_channel, booking_created_date, country, room_revenue_eur,
+            fb_revenue_eur, activities_revenue_eur, total_revenue_eur, discount_eur,
+            net_revenue_eur
+        FROM bookings_with_charges
+        ORDER BY booking_id, line_id
+        ON CONFLICT (booking_id) DO NOTHING;
+        
+        PERFORM ensure_month_partitions('booking_charges', MIN(charge_date), MAX(charge_date))
+        FROM bookings_with_charges;
+        INSERT INTO booking_charges (
+            line_id, booking_id, charge_date, charge_category, charge_item,
+            unit_price_eur, quantity, line_subtotal_eur, tax_rate, line_tax_eur,
+            line_total_eur
+        )
+        SELECT
+            line_id, booking_id, charge_date, charge_category, charge_item,
+            unit_price_eur, quantity, line_subtotal_eur, tax_rate, line_tax_eur,
+            line_total_eur
+        FROM bookings_with_charges
+        ON CONFLICT (line_id, charge_date) DO NOTHING;
+        
+        -- Dependent views are recreated further down
+        DROP TABLE bookings_with_charges CASCADE;
+    END IF;
+END $$;
+
 -- Daily Occupancy Fact Table
 CREATE TABLE IF NOT EXISTS daily_occupancy (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     date DATE NOT NULL,
     room_type VARCHAR(50) DEFAULT 'All',
     total_rooms INTEGER NOT NULL,
     rooms_sold INTEGER DEFAULT 0,
     rooms_out_of_service INTEGER DEFAULT 0,
     rooms_blocked INTEGER DEFAULT 0,
-    occupancy_pct DECIMAL(5, 2),
+    occupancy_pct DECIMAL(7, 2), -- At most 100: bookings are allocated around out-of-service and blocked rooms
     room_revenue_eur DECIMAL(12, 2) DEFAULT 0.00,
     adr_eur DECIMAL(10, 2), -- Average Daily Rate
     revpar_eur DECIMAL(10, 2), -- Revenue per Available Room
@@ -121,12 +224,13 @@ CREATE TABLE IF NOT EXISTS daily_occupancy (
     avg_temperature_c DECIMAL(5, 2),
     snow_depth_cm INTEGER,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date),
     UNIQUE(date, room_type)
-);
+) PARTITION BY RANGE (date);
 
 -- Marketing Performance Fact Table
 CREATE TABLE IF NOT EXISTS marketing_performance (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     date DATE NOT NULL,
     channel VARCHAR(100) NOT NULL,
     campaign_name VARCHAR(200),
@@ -146,21 +250,68 @@ CREATE TABLE IF NOT EXISTS marketing_performance (
     roas DECIMAL(10, 4), -- Return on ad spend
     conversion_rate DECIMAL(5, 4), -- bookings / sessions
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, date),
     FOREIGN KEY (channel) REFERENCES marketing_channels(channel),
     UNIQUE(date, channel, campaign_name)
+) PARTITION BY RANGE (date);
+
+-- Copy the rows set aside above into monthly partitions (INSERT casts them to
+-- the new column types, such as the wider occupancy_pct)
+DO $$
+DECLARE
+    fact_table TEXT;
+    date_column TEXT;
+BEGIN
+    FOR fact_table, date_column IN
+        VALUES ('booking_charges', 'charge_date'), ('daily_occupancy', 'date'),
+               ('marketing_performance', 'date')
+    LOOP
+        IF to_regclass(fact_table || '_unpartitioned') IS NOT NULL THEN
+            EXECUTE format('SELECT ensure_month_partitions(%L, MIN(%I), MAX(%I)) FROM %I',
+                           fact_table, date_column, date_column, fact_table || '_unpartitioned');
+            EXECUTE format('INSERT INTO %I SELECT * FROM %I', fact_table, fact_table || '_unpartitioned');
+            IF fact_table <> 'booking_charges' THEN
+                EXECUTE format('SELECT setval(pg_get_serial_sequence(%L, ''id''), MAX(id)) FROM %I',
+                               fact_table, fact_table);
+            END IF;
+            EXECUTE format('DROP TABLE %I', fact_table || '_unpartitioned');
+        END IF;
+    END LOOP;
+END $$;
+
+-- ETL Watermarks (one row per source file, maintained by etl_pipeline.py --incremental)
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    source VARCHAR(200) PRIMARY KEY,
+    file_size BIGINT NOT NULL,
+    file_sha256 CHAR(64) NOT NULL,
+    row_count BIGINT NOT NULL,
+    max_booking_created_date DATE,
+    max_charge_date DATE,
+    max_date DATE,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Data versions (one row per table or rollup, bumped by etl_pipeline.py after each
+-- successful load that changed it; the API's query cache compares them to decide
+-- whether a cached result is still current)
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- ============================================
 -- INDEXES FOR PERFORMANCE
 -- ============================================
 
-CREATE INDEX IF NOT EXISTS idx_bookings_guest_id ON bookings_with_charges(guest_id);
-CREATE INDEX IF NOT EXISTS idx_bookings_booking_id ON bookings_with_charges(booking_id);
-CREATE INDEX IF NOT EXISTS idx_bookings_check_in_date ON bookings_with_charges(check_in_date);
-CREATE INDEX IF NOT EXISTS idx_bookings_check_out_date ON bookings_with_charges(check_out_date);
-CREATE INDEX IF NOT EXISTS idx_bookings_charge_date ON bookings_with_charges(charge_date);
-CREATE INDEX IF NOT EXISTS idx_bookings_channel ON bookings_with_charges(booking_channel);
-CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings_with_charges(booking_status);
+CREATE INDEX IF NOT EXISTS idx_bookings_guest_id ON bookings(guest_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_check_in_date ON bookings(check_in_date);
+CREATE INDEX IF NOT EXISTS idx_bookings_check_out_date ON bookings(check_out_date);
+CREATE INDEX IF NOT EXISTS idx_bookings_channel ON bookings(booking_channel);
+CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings(booking_status);
+
+CREATE INDEX IF NOT EXISTS idx_charges_booking_id ON booking_charges(booking_id);
+CREATE INDEX IF NOT EXISTS idx_charges_charge_date ON booking_charges(charge_date);
 
 CREATE INDEX IF NOT EXISTS idx_occupancy_date ON daily_occupancy(date);
 CREATE INDEX IF NOT EXISTS idx_occupancy_room_type ON daily_occupancy(room_type);
@@ -175,6 +326,45 @@ CREATE INDEX IF NOT EXISTS idx_guests_loyalty ON guest_profiles(loyalty_tier);
 -- VIEWS FOR ANALYTICS
 -- ============================================
 
+-- Denormalized Bookings and Charges View
+-- One row per charge line with the booking's fields repeated, in the column
+-- order of the former bookings_with_charges table, so existing queries work
+CREATE OR REPLACE VIEW bookings_with_charges AS
+SELECT 
+    c.line_id,
+    b.booking_id,
+    b.guest_id,
+    b.check_in_date,
+    b.check_out_date,
+    b.nights,
+    b.num_guests,
+    b.num_adults,
+    b.num_children,
+    b.room_type,
+    b.board_type,
+    b.booking_status,
+    b.booking_channel,
+    b.booking_created_date,
+    b.country,
+    c.charge_date,
+    c.charge_category,
+    c.charge_item,
+    c.unit_price_eur,
+    c.quantity,
+    c.line_subtotal_eur,
+    c.tax_rate,
+    c.line_tax_eur,
+    c.line_total_eur,
+    b.room_revenue_eur,
+    b.fb_revenue_eur,
+    b.activities_revenue_eur,
+    b.total_revenue_eur,
+    b.discount_eur,
+    b.net_revenue_eur,
+    c.created_at
+FROM booking_charges c
+JOIN bookings b ON b.booking_id = c.booking_id;
+
 -- Booking Summary View
 CREATE OR REPLACE VIEW booking_summary AS
 SELECT 
@@ -189,28 +379,102 @@ SELECT
     booking_status,
     booking_channel,
     country,
-    MAX(room_revenue_eur) as room_revenue_eur,
-    MAX(fb_revenue_eur) as fb_revenue_eur,
-    MAX(activities_revenue_eur) as activities_revenue_eur,
-    MAX(total_revenue_eur) as total_revenue_eur,
-    MAX(discount_eur) as discount_eur,
-    MAX(net_revenue_eur) as net_revenue_eur
-FROM bookings_with_charges
-GROUP BY booking_id, guest_id, check_in_date, check_out_date, nights, 
-         num_guests, room_type, board_type, booking_status, booking_channel, country;
-
--- Revenue by Channel View
+    room_revenue_eur,
+    fb_revenue_eur,
+    activities_revenue_eur,
+    total_revenue_eur,
+    discount_eur,
+    net_revenue_eur
+FROM bookings;
+
+-- ============================================
+-- MATERIALIZED ROLLUPS FOR THE DASHBOARD
+-- ============================================
+-- Refreshed by etl_pipeline.py after each load (REFRESH ... CONCURRENTLY,
+-- which needs the unique indexes below). Only Stayed bookings are counted.
+
+-- Booking-level revenue by check-in day x channel x room type x country
+CREATE MATERIALIZED VIEW IF NOT EXISTS booking_revenue_daily AS
+SELECT 
+    check_in_date,
+    booking_channel,
+    room_type,
+    country,
+    COUNT(*) as bookings,
+    SUM(nights) as room_nights,
+    SUM(room_revenue_eur) as room_revenue_eur,
+    SUM(fb_revenue_eur) as fb_revenue_eur,
+    SUM(activities_revenue_eur) as activities_revenue_eur,
+    SUM(total_revenue_eur) as total_revenue_eur,
+    SUM(discount_eur) as discount_eur,
+    SUM(net_revenue_eur) as net_revenue_eur
+FROM bookings
+WHERE booking_status = 'Stayed'
+GROUP BY check_in_date, booking_channel, room_type, country;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_booking_revenue_daily_key
+    ON booking_revenue_daily(check_in_date, booking_channel, room_type, country);
+
+-- Charge-line revenue by charge day x channel x room type x country
+CREATE MATERIALIZED VIEW IF NOT EXISTS charge_revenue_daily AS
+SELECT 
+    c.charge_date,
+    b.booking_channel,
+    b.room_type,
+    b.country,
+    SUM(CASE WHEN c.charge_category = 'Room' THEN c.line_subtotal_eur ELSE 0 END) as room_revenue_eur,
+    SUM(CASE WHEN c.charge_category = 'F&B' THEN c.line_subtotal_eur ELSE 0 END) as fb_revenue_eur,
+    SUM(CASE WHEN c.charge_category IN ('SkiPass', 'EquipmentRental', 'Spa', 'AirportTransfer') 
+        THEN c.line_subtotal_eur ELSE 0 END) as activities_revenue_eur,
+    SUM(c.line_subtotal_eur) as total_revenue_eur,
+    COUNT(*) as charge_lines
+FROM booking_charges c
+JOIN bookings b ON b.booking_id = c.booking_id
+WHERE b.booking_status = 'Stayed'
+GROUP BY c.charge_date, b.booking_channel, b.room_type, b.country;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_charge_revenue_daily_key
+    ON charge_revenue_daily(charge_date, booking_channel, room_type, country);
+
+-- Hotel-wide occupancy and weather per day, with ski revenue on that day
+CREATE MATERIALIZED VIEW IF NOT EXISTS weather_occupancy_daily AS
+SELECT 
+    o.date,
+    o.weather_condition,
+    o.snow_depth_cm,
+    o.avg_temperature_c,
+    o.occupancy_pct,
+    o.rooms_sold,
+    o.room_revenue_eur,
+    COALESCE(ski.ski_revenue, 0) as ski_revenue,
+    COALESCE(ski.bookings_with_ski_charges, 0) as bookings_with_ski_charges
+FROM daily_occupancy o
+LEFT JOIN (
+    SELECT 
+        c.charge_date,
+        SUM(c.line_subtotal_eur) as ski_revenue,
+        COUNT(DISTINCT c.booking_id) as bookings_with_ski_charges
+    FROM booking_charges c
+    JOIN bookings b ON b.booking_id = c.booking_id
+    WHERE b.booking_status = 'Stayed'
+      AND c.charge_category IN ('SkiPass', 'EquipmentRental')
+    GROUP BY c.charge_date
+) ski ON ski.charge_date = o.date
+WHERE o.room_type = 'All';
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_weather_occupancy_daily_date
+    ON weather_occupancy_daily(date);
+
+-- Revenue by Channel View (reads the booking_revenue_daily rollup)
 CREATE OR REPLACE VIEW revenue_by_channel AS
 SELECT 
     booking_channel,
-    COUNT(DISTINCT booking_id) as total_bookings,
+    SUM(bookings)::BIGINT as total_bookings,
     SUM(room_revenue_eur) as total_room_revenue,
     SUM(fb_revenue_eur) as total_fb_revenue,
     SUM(activities_revenue_eur) as total_activities_revenue,
     SUM(net_revenue_eur) as total_net_revenue,
-    AVG(nights) as avg_nights,
-    SUM(nights) as total_room_nights
-FROM booking_summary
-WHERE booking_status = 'Stayed'
+    SUM(room_nights)::NUMERIC / SUM(bookings) as avg_nights,
+    SUM(room_nights)::BIGINT as total_room_nights
+FROM booking_revenue_daily
 GROUP BY booking_channel;
-
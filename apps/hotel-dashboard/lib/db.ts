@@ -5,12 +5,17 @@
 
 import { Pool } from 'pg';
 
-const pool = new Pool({
+// Shared with the query cache's LISTEN connection (lib/queryCache.ts)
+export const dbConfig = {
   host: process.env.DB_HOST || 'localhost',
   database: process.env.DB_NAME || 'hotel_analytics',
   user: process.env.DB_USER || 'postgres',
   password: process.env.DB_PASSWORD || 'postgres',
   port: parseInt(process.env.DB_PORT || '5432'),
+};
+
+const pool = new Pool({
+  ...dbConfig,
   max: 20,
   idleTimeoutMillis: 30000,
   connectionTimeoutMillis: 2000,
@@ -0,0 +1,200 @@
+/**
+ * Query result cache for the API routes
+ * Results are cached per endpoint and normalized query parameters, together
+ * with the data_versions of the tables the query reads. The ETL bumps those
+ * versions (and sends NOTIFY data_version) after each load that changed a
+ * table, so a cached result is served exactly until its tables change.
+ * Entries are also evicted least-recently-used and after a TTL.
+ */
+
+import { Client } from 'pg';
+import pool, { dbConfig } from '@/lib/db';
+
+const TTL_MS = parseInt(process.env.QUERY_CACHE_TTL_SECONDS || '3600') * 1000;
+const MAX_ENTRIES = parseInt(process.env.QUERY_CACHE_MAX_ENTRIES || '500');
+// Must match DATA_VERSION_CHANNEL in scripts/etl_pipeline.py
+const CHANNEL = 'data_version';
+const LISTEN_RETRY_MS = 5000;
+
+type Versions = { [table: string]: number };
+
+interface Entry {
+  rows: any[];
+  versions: Versions;
+  expires: number;
+}
+
+export interface CachedResult {
+  rows: any[];
+  cache: 'HIT' | 'MISS';
+}
+
+// A Map iterates in insertion order, so re-inserting on every hit keeps the
+// least recently used entry first
+const entries = new Map<string, Entry>();
+const inFlight = new Map<string, Promise<Entry>>();
+const stats = { hits: 0, misses: 0, invalidations: 0, expirations: 0, evictions: 0 };
+
+// Versions kept current by the LISTEN connection; null while it is down, in
+// which case every lookup reads the versions from data_versions
+let knownVersions: Versions | null = null;
+let listener: Client | null = null;
+
+function startListener() {
+  if (listener) return;
+  const client = new Client(dbConfig);
+  listener = client;
+
+  const restart = (error?: Error) => {
+    if (listener !== client) return;
+    if (error) console.error('Query cache listener failed:', error);
+    listener = null;
+    knownVersions = null;
+    client.end().catch(() => undefined);
+    setTimeout(startListener, LISTEN_RETRY_MS);
+  };
+
+  client.on('error', restart);
+  client.on('end', () => restart());
+  client.on('notification', (message) => {
+    if (message.channel !== CHANNEL || !knownVersions || !message.payload) return;
+    const bumped: Versions = JSON.parse(message.payload);
+    Object.keys(bumped).forEach((table) => {
+      knownVersions![table] = Number(bumped[table]);
+    });
+  });
+
+  // LISTEN before reading the versions, so no bump between the two is missed
+  client
+    .connect()
+    .then(() => client.query(`LISTEN ${CHANNEL}`))
+    .then(() => client.query('SELECT table_name, version FROM data_versions'))
+    .then((result) => {
+      const versions: Versions = {};
+      result.rows.forEach((row) => {
+        versions[row.table_name] = Number(row.version);
+      });
+      if (listener === client) knownVersions = versions;
+    })
+    .catch(restart);
+}
+
+async function currentVersions(tables: string[]): Promise<Versions> {
+  startListener();
+  const versions: Versions = {};
+  if (knownVersions) {
+    tables.forEach((table) => {
+      versions[table] = knownVersions![table] || 0;
+    });
+    return versions;
+  }
+
+  const result = await pool.query(
+    'SELECT table_name, version FROM data_versions WHERE table_name = ANY($1)',
+    [tables]
+  );
+  tables.forEach((table) => {
+    versions[table] = 0;
+  });
+  result.rows.forEach((row) => {
+    versions[row.table_name] = Number(row.version);
+  });
+  return versions;
+}
+
+function sameVersions(a: Versions, b: Versions) {
+  return Object.keys(b).every((table) => a[table] === b[table]);
+}
+
+/**
+ * Cache key for an endpoint and its parameters: keys sorted, values
+ * trimmed, and dates zero-padded, so equivalent requests share an entry
+ */
+export function cacheKey(endpoint: string, params: { [name: string]: string }) {
+  const parts = Object.keys(params)
+    .sort()
+    .map((name) => {
+      let value = String(params[name]).trim();
+      const date = value.match(/^(\d{4})-(\d{1,2})-(\d{1,2})$/);
+      if (date) {
+        value = `${date[1]}-${('0' + date[2]).slice(-2)}-${('0' + date[3]).slice(-2)}`;
+      }
+      return `${encodeURIComponent(name)}=${encodeURIComponent(value)}`;
+    });
+  return `${endpoint}?${parts.join('&')}`;
+}
+
+function store(key: string, entry: Entry) {
+  entries.delete(key);
+  entries.set(key, entry);
+  while (entries.size > MAX_ENTRIES) {
+    entries.delete(entries.keys().next().value as string);
+    stats.evictions++;
+  }
+}
+
+/**
+ * Run sql with values, or return the cached rows of an earlier identical
+ * request if none of tables has changed since.
+ *
+ * params are the request parameters that select the query and its values;
+ * tables are the tables and rollups it reads. Concurrent misses for the
+ * same key share one database query.
+ */
+export async function cachedQuery(
+  endpoint: string,
+  params: { [name: string]: string },
+  tables: string[],
+  sql: string,
+  values: any[] = []
+): Promise<CachedResult> {
+  const key = cacheKey(endpoint, params);
+  const versions = await currentVersions(tables);
+
+  const entry = entries.get(key);
+  if (entry) {
+    if (!sameVersions(entry.versions, versions)) {
+      stats.invalidations++;
+      entries.delete(key);
+    } else if (entry.expires <= Date.now()) {
+      stats.expirations++;
+      entries.delete(key);
+    } else {
+      stats.hits++;
+      store(key, entry);
+      return { rows: entry.rows, cache: 'HIT' };
+    }
+  }
+
+  stats.misses++;
+  const flightKey = `${key}#${JSON.stringify(versions)}`;
+  let pending = inFlight.get(flightKey);
+  if (!pending) {
+    pending = pool
+      .query(sql, values)
+      .then((result) => {
+        const fresh = { rows: result.rows, versions, expires: Date.now() + TTL_MS };
+        store(key, fresh);
+        return fresh;
+      })
+      .finally(() => {
+        inFlight.delete(flightKey);
+      });
+    inFlight.set(flightKey, pending);
+  }
+  const fresh = await pending;
+  return { rows: fresh.rows, cache: 'MISS' };
+}
+
+/** Counters since the server started, for the /api/cache-stats route */
+export function cacheStats() {
+  const lookups = stats.hits + stats.misses;
+  return {
+    ...stats,
+    hitRate: lookups ? stats.hits / lookups : 0,
+    entries: entries.size,
+    maxEntries: MAX_ENTRIES,
+    ttlSeconds: TTL_MS / 1000,
+    listening: knownVersions !== null,
+  };
+}
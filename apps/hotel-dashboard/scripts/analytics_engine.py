@@ -0,0 +1,736 @@
+"""
+In-process analytics engine for the generated data
+Loads the files written by generate_data.py into columnar NumPy arrays and
+answers the dashboard API's queries with vectorized group-bys, without
+PostgreSQL or an ETL run. Query names and result columns match the SQL in
+app/api/*/route.ts, so --check can run that SQL against a loaded database
+and compare the two, as a correctness oracle for the SQL and the ETL.
+
+Only the columns the queries read are loaded. Parquet files are memory
+mapped; CSVs are parsed by PyArrow's multi-threaded reader.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import compressed_io
+import stage_metrics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+# PyArrow's CSV reader decompresses csv.gz and csv.zst by extension
+INPUT_FORMATS = ['csv'] + compressed_io.COMPRESSED_CSV_FORMATS + ['parquet']
+OUTPUT_FORMATS = ['csv', 'json']
+# Default date range of the API routes
+DEFAULT_START_DATE = '2024-12-01'
+DEFAULT_END_DATE = '2025-04-30'
+EPOCH = date(1970, 1, 1)
+
+# Columns the queries read from each file, with their type when parsed from
+# CSV: 'text', 'category' (dictionary encoded), 'date', 'int', or the scale
+# of a decimal column
+TEXT, CATEGORY, DATE, INT = 'text', 'category', 'date', 'int'
+TABLE_COLUMNS = {
+    'guest_profiles': {
+        'guest_id': TEXT, 'date_of_birth': DATE, 'country_of_residence': CATEGORY,
+        'primary_purpose_of_stay': CATEGORY, 'loyalty_tier': CATEGORY,
+    },
+    'bookings': {
+        'booking_id': TEXT, 'guest_id': TEXT, 'check_in_date': DATE, 'nights': INT,
+        'room_type': CATEGORY, 'booking_status': CATEGORY, 'booking_channel': CATEGORY,
+        'country': CATEGORY, 'room_revenue_eur': 2, 'fb_revenue_eur': 2,
+        'activities_revenue_eur': 2, 'net_revenue_eur': 2,
+    },
+    'booking_charges': {
+        'booking_id': TEXT, 'charge_date': DATE, 'charge_category': CATEGORY,
+        'line_subtotal_eur': 2,
+    },
+    'daily_occupancy': {
+        'date': DATE, 'room_type': CATEGORY, 'rooms_sold': INT, 'occupancy_pct': 2,
+        'room_revenue_eur': 2, 'adr_eur': 2, 'revpar_eur': 2, 'weather_condition': CATEGORY,
+        'avg_temperature_c': 2, 'snow_depth_cm': INT,
+    },
+    'marketing_performance': {
+        'date': DATE, 'channel': CATEGORY, 'impressions': INT, 'clicks': INT, 'sessions': INT,
+        'bookings': INT, 'room_nights': INT, 'total_revenue_eur': 2, 'marketing_cost_eur': 2,
+        'cpc_eur': 4, 'cpa_eur': 2, 'roas': 4, 'conversion_rate': 4,
+    },
+}
+
+# Charge categories summed by the rollups (see the views in database/schema.sql)
+ACTIVITY_CATEGORIES = ['SkiPass', 'EquipmentRental', 'Spa', 'AirportTransfer']
+SKI_CATEGORIES = ['SkiPass', 'EquipmentRental']
+# Upper bounds of the guest age bands, and the band labels (guests.age)
+AGE_BOUNDS = [25, 35, 45, 55, 65]
+AGE_BANDS = ['18-24', '25-34', '35-44', '45-54', '55-64', '65+']
+LOYALTY_ORDER = {'Platinum': 1, 'Gold': 2, 'Silver': 3}
+
+
+# NumPy and PyArrow, imported by import_dependencies() so that route_queries()
+# is usable without them
+np = pa = None
+
+
+def import_dependencies():
+    """Import NumPy and PyArrow, which the engine needs to read the files"""
+    global np, pa
+    try:
+        import numpy
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("The analytics engine requires NumPy and PyArrow: pip install numpy pyarrow")
+    np, pa = numpy, pyarrow
+
+
+class ColumnTable:
+    """The loaded columns of one generated file.
+
+    Dates are int32 days since 1970-01-01, decimals exact int64 counts of
+    10**-scale (see .scales), and categories int32 codes into
+    .categories[name], with NULL as an extra last category. Text columns
+    stay Arrow string arrays, for hash lookups with pyarrow.compute.index_in.
+    Null numbers and dates read as 0; .valid[name] marks the non-null
+    values of columns that have any nulls.
+    """
+    
+    def __init__(self, name, arrow_table):
+        self.name = name
+        self.num_rows = arrow_table.num_rows
+        self.columns = {}
+        self.categories = {}
+        self.scales = {}
+        self.valid = {}
+        for field, column in zip(arrow_table.schema, arrow_table.columns):
+            self.add_column(field.name, column.combine_chunks())
+    
+    def __len__(self):
+        return self.num_rows
+    
+    def __getitem__(self, name):
+        return self.columns[name]
+    
+    def add_column(self, name, array):
+        kind = array.type
+        if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+            self.columns[name] = array
+            return
+        
+        valid = None
+        if array.null_count:
+            valid = array.is_valid().to_numpy(zero_copy_only=False)
+            self.valid[name] = valid
+        if pa.types.is_dictionary(kind):
+            categories = array.dictionary.to_pylist()
+            codes = array.indices.fill_null(0).to_numpy().astype(np.int32)
+            if valid is not None:
+                codes[~valid] = len(categories)
+                categories.append(None)
+            self.categories[name] = categories
+            self.columns[name] = codes
+            return
+        
+        if pa.types.is_timestamp(kind):
+            array = array.cast(pa.date32())
+        if pa.types.is_date32(kind) or pa.types.is_timestamp(kind):
+            values = array.cast(pa.int32()).fill_null(0).to_numpy()
+        elif pa.types.is_decimal128(kind):
+            # A decimal128 value is a little-endian 128-bit integer count of
+            # 10**-scale; the amounts here all fit in its low 64 bits
+            words = np.frombuffer(array.buffers()[1], dtype='<i8')
+            values = words[2 * array.offset:2 * (array.offset + len(array)):2].copy()
+            self.scales[name] = kind.scale
+        else:
+            values = array.fill_null(0).to_numpy().astype(np.int64)
+        if valid is not None:
+            values[~valid] = 0
+        self.columns[name] = values
+    
+    def code(self, column, value):
+        """Category code of value in column, or -1 if it never occurs"""
+        try:
+            return self.categories[column].index(value)
+        except ValueError:
+            return -1
+    
+    def codes(self, column, values):
+        return [self.code(column, value) for value in values]
+    
+    def is_category(self, column, value):
+        return self.columns[column] == self.code(column, value)
+    
+    def is_valid(self, column, row):
+        return column not in self.valid or bool(self.valid[column][row])
+    
+    def decimal(self, column, units):
+        """Decimal value of a count of column's decimal units"""
+        return Decimal(int(units)).scaleb(-self.scales[column])
+
+
+def csv_column_types(columns):
+    """PyArrow CSV column types for a TABLE_COLUMNS entry"""
+    types = {}
+    for name, kind in columns.items():
+        if kind == TEXT:
+            types[name] = pa.string()
+        elif kind == CATEGORY:
+            types[name] = pa.dictionary(pa.int32(), pa.string())
+        elif kind == DATE:
+            # Parses both 2025-03-01 and 2025-03-01T00:00:00
+            types[name] = pa.timestamp('s')
+        elif kind == INT:
+            types[name] = pa.int64()
+        else:
+            types[name] = pa.decimal128(18, kind)
+    return types
+
+
+@stage_metrics.instrumented(lambda path, columns: f'read {os.path.basename(path)}')
+def read_table(path, columns):
+    """Read columns (a TABLE_COLUMNS entry) of a generated CSV or Parquet file"""
+    if path.endswith('.parquet'):
+        arrow_table = pa.parquet.read_table(path, columns=list(columns), memory_map=True)
+    else:
+        arrow_table = pa.csv.read_csv(path, convert_options=pa.csv.ConvertOptions(
+            include_columns=list(columns), column_types=csv_column_types(columns),
+            strings_can_be_null=True))
+    return ColumnTable(os.path.basename(path), arrow_table.unify_dictionaries())
+
+
+class Dataset:
+    """The generated files in data_dir, each loaded on first use"""
+    
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, fmt='csv'):
+        import_dependencies()
+        self.data_dir = data_dir
+        self.fmt = fmt
+        self.tables = {}
+        self.derived = {}
+    
+    def table(self, name):
+        if name not in self.tables:
+            path = os.path.join(self.data_dir, f'{name}.{self.fmt}')
+            if not os.path.exists(path):
+                raise SystemExit(f"{path} not found; run generate_data.py --format {self.fmt} first")
+            start = time.perf_counter()
+            self.tables[name] = read_table(path, TABLE_COLUMNS[name])
+            print(f"Loaded {path}: {self.tables[name].num_rows:,} rows in "
+                  f"{time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return self.tables[name]
+    
+    def charge_booking_rows(self):
+        """Row in bookings of each charge line's booking (-1 if missing)"""
+        if 'charge_booking_rows' not in self.derived:
+            charges, bookings = self.table('booking_charges'), self.table('bookings')
+            rows = pa.compute.index_in(charges['booking_id'], value_set=bookings['booking_id'])
+            self.derived['charge_booking_rows'] = rows.fill_null(-1).to_numpy().astype(np.int64)
+        return self.derived['charge_booking_rows']
+    
+    def stayed_charges(self):
+        """Mask of the charge lines of stayed bookings, which the rollups count"""
+        if 'stayed_charges' not in self.derived:
+            stayed = self.table('bookings').is_category('booking_status', 'Stayed')
+            rows = self.charge_booking_rows()
+            self.derived['stayed_charges'] = (rows >= 0) & stayed[rows]
+        return self.derived['stayed_charges']
+    
+    def guest_stats(self):
+        """Lifetime bookings, revenue (cents) and age per guest, as the ETL computes them.
+
+        Only stayed bookings count; the age is in whole years at the first
+        stay, and -1 for guests without a stay or a date of birth.
+        """
+        if 'guest_stats' not in self.derived:
+            guests, bookings = self.table('guest_profiles'), self.table('bookings')
+            guest_rows = pa.compute.index_in(bookings['guest_id'], value_set=guests['guest_id'])
+            guest_rows = guest_rows.fill_null(-1).to_numpy().astype(np.int64)
+            stayed = bookings.is_category('booking_status', 'Stayed') & (guest_rows >= 0)
+            rows = guest_rows[stayed]
+            size = guests.num_rows
+            lifetime_bookings = np.bincount(rows, minlength=size)
+            revenue = group_sum(rows, size, bookings['net_revenue_eur'][stayed])
+            first_stay = np.full(size, np.iinfo(np.int32).max, dtype=np.int64)
+            np.minimum.at(first_stay, rows, bookings['check_in_date'][stayed])
+            has_age = lifetime_bookings > 0
+            if 'date_of_birth' in guests.valid:
+                has_age &= guests.valid['date_of_birth']
+            age = np.where(has_age, full_years(guests['date_of_birth'],
+                                               np.where(has_age, first_stay, 0)), -1)
+            self.derived['guest_stats'] = (lifetime_bookings, revenue, age)
+        return self.derived['guest_stats']
+
+
+def full_years(born, on):
+    """Whole years from day numbers born to on, as PostgreSQL's DATE_PART('year', AGE(on, born))"""
+    born = born.astype('datetime64[D]')
+    on = on.astype('datetime64[D]')
+    years = on.astype('datetime64[Y]').astype(np.int64) - born.astype('datetime64[Y]').astype(np.int64)
+    # Not yet at the birthday in the final year (Feb 29 birthdays fall after Feb 28)
+    return years - (month_and_day(on) < month_and_day(born))
+
+
+def month_and_day(dates):
+    """Month and day of datetime64[D] values as one sortable number, month * 32 + day"""
+    months = dates.astype('datetime64[M]')
+    return (months.astype(np.int64) % 12) * 32 + (dates - months.astype('datetime64[D]')).astype(np.int64)
+
+
+def group_sum(keys, size, values):
+    """Sum of integer values per group key in range(size), exact below 2**53"""
+    return np.rint(np.bincount(keys, weights=values, minlength=size)).astype(np.int64)
+
+
+def group_mean(table, column, keys, size, rows):
+    """Mean of a decimal column's rows (a mask or indexes) per group, ignoring nulls like
+    SQL's AVG (None if all null)"""
+    values = table[column][rows]
+    if column in table.valid:
+        valid = table.valid[column][rows]
+        keys, values = keys[valid], values[valid]
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    scale = 10 ** table.scales[column]
+    return [sums[k] / counts[k] / scale if counts[k] else None for k in range(size)]
+
+
+def days(value):
+    """Day number of an ISO date string"""
+    return (date.fromisoformat(value) - EPOCH).days
+
+
+def to_date(day):
+    return EPOCH + timedelta(days=int(day))
+
+
+def in_range(values, start, end):
+    return (values >= start) & (values <= end)
+
+
+def ranked(rows, column, limit=None):
+    """Rows sorted by column descending (ties keep their order), optionally limited"""
+    rows.sort(key=lambda row: row[column], reverse=True)
+    return rows[:limit]
+
+
+# ============================================
+# QUERIES (one per SQL statement in app/api/*/route.ts)
+# ============================================
+
+def revenue_by(column, limit=None):
+    """revenue.channel/room_type/country: stayed bookings by check-in date (booking_revenue_daily)"""
+    def query(ds, start, end):
+        bookings = ds.table('bookings')
+        mask = bookings.is_category('booking_status', 'Stayed')
+        mask &= in_range(bookings['check_in_date'], start, end)
+        keys = bookings[column][mask]
+        size = len(bookings.categories[column])
+        counts = np.bincount(keys, minlength=size)
+        nights = group_sum(keys, size, bookings['nights'][mask])
+        sums = {name: group_sum(keys, size, bookings[name][mask])
+                for name in ('room_revenue_eur', 'fb_revenue_eur', 'activities_revenue_eur',
+                             'net_revenue_eur')}
+        rows = [{
+            'dimension_value': bookings.categories[column][k],
+            'total_bookings': int(counts[k]),
+            'room_revenue': bookings.decimal('room_revenue_eur', sums['room_revenue_eur'][k]),
+            'fb_revenue': bookings.decimal('fb_revenue_eur', sums['fb_revenue_eur'][k]),
+            'activities_revenue': bookings.decimal('activities_revenue_eur',
+                                                   sums['activities_revenue_eur'][k]),
+            'total_revenue': bookings.decimal('net_revenue_eur', sums['net_revenue_eur'][k]),
+            'avg_nights': nights[k] / counts[k],
+        } for k in np.flatnonzero(counts)]
+        return ranked(rows, 'total_revenue', limit)
+    return query
+
+
+def revenue_by_date(ds, start, end):
+    """revenue.date: charge lines of stayed bookings by charge date (charge_revenue_daily)"""
+    charges = ds.table('booking_charges')
+    mask = ds.stayed_charges() & in_range(charges['charge_date'], start, end)
+    keys = charges['charge_date'][mask] - start
+    size = end - start + 1
+    categories = charges['charge_category'][mask]
+    amounts = charges['line_subtotal_eur'][mask]
+    
+    def category_sum(names):
+        return group_sum(keys, size, np.where(np.isin(categories, charges.codes('charge_category', names)),
+                                              amounts, 0))
+    
+    lines = np.bincount(keys, minlength=size)
+    room = category_sum(['Room'])
+    fb = category_sum(['F&B'])
+    activities = category_sum(ACTIVITY_CATEGORIES)
+    total = group_sum(keys, size, amounts)
+    money = lambda units: charges.decimal('line_subtotal_eur', units)
+    return [{
+        'dimension_value': to_date(start + k),
+        'room_revenue': money(room[k]),
+        'fb_revenue': money(fb[k]),
+        'activities_revenue': money(activities[k]),
+        'total_revenue': money(total[k]),
+    } for k in np.flatnonzero(lines)]
+
+
+def hotel_occupancy_rows(ds, start, end):
+    """Rows of the hotel-wide ('All') occupancy for dates in range"""
+    occupancy = ds.table('daily_occupancy')
+    return occupancy, np.flatnonzero(occupancy.is_category('room_type', 'All')
+                                     & in_range(occupancy['date'], start, end))
+
+
+def occupancy_by(period):
+    """occupancy.day/week/month: hotel-wide occupancy per day, ISO week or month"""
+    def query(ds, start, end):
+        occupancy, rows = hotel_occupancy_rows(ds, start, end)
+        dates = occupancy['date'][rows]
+        if period == 'week':
+            # Day 0 (1970-01-01) was a Thursday; weeks start on Monday like DATE_TRUNC
+            dates = dates - (dates + 3) % 7
+        elif period == 'month':
+            dates = dates.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+        periods, first, keys = np.unique(dates, return_index=True, return_inverse=True)
+        size = len(periods)
+        rooms_sold = group_sum(keys, size, occupancy['rooms_sold'][rows])
+        revenue = group_sum(keys, size, occupancy['room_revenue_eur'][rows])
+        occupancy_pct, adr, revpar = (group_mean(occupancy, column, keys, size, rows)
+                                      for column in ('occupancy_pct', 'adr_eur', 'revpar_eur'))
+        prefix = '' if period == 'day' else 'avg_'
+        results = []
+        for k in range(size):
+            row = {
+                'date' if period == 'day' else f'{period}_start': to_date(periods[k]),
+                'rooms_sold': int(rooms_sold[k]),
+                f'{prefix}occupancy_pct': occupancy_pct[k],
+                'room_revenue': occupancy.decimal('room_revenue_eur', revenue[k]),
+                f'{prefix}adr': adr[k],
+                f'{prefix}revpar': revpar[k],
+            }
+            if period == 'day':
+                row.update(weather_columns(occupancy, rows[first[k]]))
+            results.append(row)
+        return results
+    return query
+
+
+def weather_columns(occupancy, row):
+    return {
+        'weather_condition': occupancy.categories['weather_condition'][occupancy['weather_condition'][row]],
+        'avg_temperature_c': (occupancy.decimal('avg_temperature_c', occupancy['avg_temperature_c'][row])
+                              if occupancy.is_valid('avg_temperature_c', row) else None),
+        'snow_depth_cm': (int(occupancy['snow_depth_cm'][row])
+                          if occupancy.is_valid('snow_depth_cm', row) else None),
+    }
+
+
+def weather_correlation(ds, start, end):
+    """weather-correlation: hotel-wide occupancy with ski charges per day (weather_occupancy_daily)"""
+    occupancy, rows = hotel_occupancy_rows(ds, start, end)
+    rows = rows[np.argsort(occupancy['date'][rows], kind='stable')]
+    charges = ds.table('booking_charges')
+    mask = ds.stayed_charges() & in_range(charges['charge_date'], start, end)
+    mask &= np.isin(charges['charge_category'], charges.codes('charge_category', SKI_CATEGORIES))
+    keys = charges['charge_date'][mask].astype(np.int64) - start
+    size = end - start + 1
+    ski_revenue = group_sum(keys, size, charges['line_subtotal_eur'][mask])
+    # COUNT(DISTINCT booking_id) per day: unique (day, booking row) pairs
+    num_bookings = ds.table('bookings').num_rows
+    pairs = np.unique(keys * num_bookings + ds.charge_booking_rows()[mask])
+    ski_bookings = np.bincount(pairs // num_bookings, minlength=size)
+    results = []
+    for row in rows:
+        k = occupancy['date'][row] - start
+        weather = weather_columns(occupancy, row)
+        results.append({
+            'date': to_date(occupancy['date'][row]),
+            'weather_condition': weather['weather_condition'],
+            'snow_depth_cm': weather['snow_depth_cm'],
+            'avg_temperature_c': weather['avg_temperature_c'],
+            'occupancy_pct': occupancy.decimal('occupancy_pct', occupancy['occupancy_pct'][row]),
+            'ski_revenue': charges.decimal('line_subtotal_eur', ski_revenue[k]),
+            'bookings_with_ski_charges': int(ski_bookings[k]),
+        })
+    return results
+
+
+def marketing_by(column):
+    """marketing.channel/date: campaign metrics summed per channel or day"""
+    def query(ds, start, end):
+        marketing = ds.table('marketing_performance')
+        mask = in_range(marketing['date'], start, end)
+        if column == 'date':
+            keys = marketing['date'][mask] - start
+            size = end - start + 1
+        else:
+            keys = marketing[column][mask]
+            size = len(marketing.categories[column])
+        counts = np.bincount(keys, minlength=size)
+        sums = {name: group_sum(keys, size, marketing[name][mask])
+                for name in ('impressions', 'clicks', 'sessions', 'bookings', 'room_nights',
+                             'total_revenue_eur', 'marketing_cost_eur')}
+        averages = {} if column == 'date' else {
+            name: group_mean(marketing, name, keys, size, mask)
+            for name in ('cpc_eur', 'cpa_eur', 'roas', 'conversion_rate')
+        }
+        results = []
+        for k in np.flatnonzero(counts):
+            revenue = marketing.decimal('total_revenue_eur', sums['total_revenue_eur'][k])
+            cost = marketing.decimal('marketing_cost_eur', sums['marketing_cost_eur'][k])
+            row = {
+                column: to_date(start + k) if column == 'date' else marketing.categories[column][k],
+                'total_impressions': int(sums['impressions'][k]),
+                'total_clicks': int(sums['clicks'][k]),
+                'total_sessions': int(sums['sessions'][k]),
+                'total_bookings': int(sums['bookings'][k]),
+            }
+            if column == 'date':
+                row.update(total_revenue=revenue, total_cost=cost,
+                           roas=float(revenue / cost) if cost > 0 else 0)
+            else:
+                row.update(total_room_nights=int(sums['room_nights'][k]), total_revenue=revenue,
+                           total_cost=cost, avg_cpc=averages['cpc_eur'][k],
+                           avg_cpa=averages['cpa_eur'][k], avg_roas=averages['roas'][k],
+                           avg_conversion_rate=averages['conversion_rate'][k],
+                           overall_roas=float(revenue / cost) if cost > 0 else 0)
+            results.append(row)
+        if column != 'date':
+            results = ranked(results, 'total_revenue')
+        return results
+    return query
+
+
+def guests_by(dimension):
+    """guests.country/age/loyalty/purpose: guests and their lifetime stats per group"""
+    def query(ds, start, end):
+        guests = ds.table('guest_profiles')
+        lifetime_bookings, revenue, age = ds.guest_stats()
+        if dimension == 'age':
+            mask = age >= 0
+            keys = np.searchsorted(AGE_BOUNDS, age[mask], side='right')
+            labels = AGE_BANDS
+        else:
+            column = {'country': 'country_of_residence', 'loyalty': 'loyalty_tier',
+                      'purpose': 'primary_purpose_of_stay'}[dimension]
+            mask = np.ones(guests.num_rows, dtype=bool)
+            keys = guests[column]
+            labels = guests.categories[column]
+        size = len(labels)
+        counts = np.bincount(keys, minlength=size)
+        bookings = group_sum(keys, size, lifetime_bookings[mask])
+        revenue_sums = group_sum(keys, size, revenue[mask])
+        rows = [{
+            'dimension_value': labels[k],
+            'guest_count': int(counts[k]),
+            'total_bookings': int(bookings[k]),
+            'total_revenue': Decimal(int(revenue_sums[k])).scaleb(-2),
+            'avg_lifetime_value': revenue_sums[k] / counts[k] / 100,
+        } for k in np.flatnonzero(counts)]
+        if dimension == 'country':
+            return ranked(rows, 'guest_count', 20)
+        if dimension == 'purpose':
+            return ranked(rows, 'guest_count')
+        if dimension == 'loyalty':
+            rows.sort(key=lambda row: LOYALTY_ORDER.get(row['dimension_value'], 4))
+        return rows
+    return query
+
+
+# Named like bench_suite's route queries: '<route>.<dimension or group_by>'
+QUERIES = {
+    'guests.country': guests_by('country'),
+    'guests.age': guests_by('age'),
+    'guests.loyalty': guests_by('loyalty'),
+    'guests.purpose': guests_by('purpose'),
+    'marketing.channel': marketing_by('channel'),
+    'marketing.date': marketing_by('date'),
+    'occupancy.day': occupancy_by('day'),
+    'occupancy.week': occupancy_by('week'),
+    'occupancy.month': occupancy_by('month'),
+    'revenue.channel': revenue_by('booking_channel'),
+    'revenue.room_type': revenue_by('room_type'),
+    'revenue.country': revenue_by('country', limit=20),
+    'revenue.date': revenue_by_date,
+    'weather-correlation': weather_correlation,
+}
+
+
+def run_query(ds, name, start_date=DEFAULT_START_DATE, end_date=DEFAULT_END_DATE):
+    """Rows (dicts in the route's column order) of query name for a date range"""
+    with stage_metrics.stage(name) as record:
+        rows = QUERIES[name](ds, days(start_date), days(end_date))
+        record['rows_out'] = len(rows)
+    return rows
+
+
+# ============================================
+# CHECKING THE SQL
+# ============================================
+
+def route_queries():
+    """Every SQL statement in the API routes, as {'route.variant': sql}.
+
+    The variant is the dimension or group_by value that selects the
+    statement. Placeholders $1 and $2 (start and end date) become
+    psycopg2 named parameters.
+    """
+    queries = {}
+    for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, 'app', 'api', '*', 'route.ts'))):
+        route = os.path.basename(os.path.dirname(path))
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        for match in re.finditer(r'query = `(.*?)`', source, re.DOTALL):
+            variants = re.findall(r"(?:case|===) '(\w+)'", source[:match.start()])
+            name = f'{route}.{variants[-1]}' if variants else route
+            queries[name] = match.group(1).replace('$1', '%(start)s').replace('$2', '%(end)s')
+    return queries
+
+
+def same_value(a, b):
+    """Whether an engine value matches a SQL value: floats (averages) to 1e-9, the rest exactly"""
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(float(a), float(b), rel_tol=1e-9,
+                                                                abs_tol=1e-9)
+    if isinstance(a, (int, Decimal)) and isinstance(b, (int, Decimal)):
+        return Decimal(a) == Decimal(b)
+    return a == b
+
+
+def compare(name, rows, columns, sql_rows):
+    """Differences between engine rows and SQL rows, matched on their first column.
+
+    Matching on the group value rather than position means ties in the
+    ORDER BY, which PostgreSQL may return in any order, are not differences.
+    """
+    differences = []
+    if list(rows[0] if rows else columns) != columns:
+        differences.append(f"{name}: columns {list(rows[0])} != SQL columns {columns}")
+    if len(rows) != len(sql_rows):
+        differences.append(f"{name}: {len(rows)} rows != {len(sql_rows)} SQL rows")
+    sql_by_key = {row[0]: row for row in sql_rows}
+    for row in rows:
+        values = list(row.values())
+        sql_row = sql_by_key.get(values[0])
+        if sql_row is None:
+            differences.append(f"{name}: {values[0]!r} missing from the SQL result")
+            continue
+        for column, value, sql_value in zip(columns, values, sql_row):
+            if not same_value(value, sql_value):
+                differences.append(f"{name}[{values[0]}].{column}: {value!r} != SQL {sql_value!r}")
+    return differences
+
+
+def check_against_sql(ds, names, start_date, end_date):
+    """Run each route's SQL on the database in DB_CONFIG and compare; returns the differences"""
+    import psycopg2
+    from etl_pipeline import DB_CONFIG
+    
+    sql = route_queries()
+    differences = []
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            for name in names:
+                cur.execute(sql[name], {'start': start_date, 'end': end_date})
+                columns = [column.name for column in cur.description]
+                found = compare(name, run_query(ds, name, start_date, end_date), columns, cur.fetchall())
+                print(f"{name:<22} {'OK' if not found else f'{len(found)} differences'}")
+                differences += found
+    finally:
+        conn.close()
+    return differences
+
+
+# ============================================
+# OUTPUT
+# ============================================
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return f'{value:.4f}'
+    return str(value)
+
+
+def print_rows(name, rows):
+    print(f"\n=== {name} ({len(rows)} rows)")
+    if not rows:
+        return
+    table = [list(rows[0])] + [[format_value(value) for value in row.values()] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(table[0]))]
+    for line in table:
+        print('  '.join(cell.rjust(width) for cell, width in zip(line, widths)))
+
+
+def export_rows(path, rows, output_format):
+    """Write rows as CSV or as a JSON array, at full precision (JSON decimals as strings)"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if output_format == 'json':
+            json.dump(rows, f, indent=2, default=str)
+        else:
+            writer = csv.writer(f)
+            if rows:
+                writer.writerow(rows[0])
+            writer.writerows(row.values() for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('queries', nargs='*', metavar='QUERY',
+                        help=f"Queries to run (default: all): {', '.join(QUERIES)}")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help='Directory of the generated files (default: data/)')
+    parser.add_argument('--format', choices=INPUT_FORMATS, default='csv',
+                        help='Input file format (default: %(default)s)')
+    parser.add_argument('--start-date', default=DEFAULT_START_DATE)
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE)
+    parser.add_argument('--output', metavar='DIR',
+                        help='Write each result to DIR/<query>.csv (or .json) instead of printing it')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='csv')
+    parser.add_argument('--check', action='store_true',
+                        help="Also run each route's SQL against the database (DB_* env vars, loaded "
+                             "by etl_pipeline.py from the same files) and report any differences")
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.queries if name not in QUERIES]
+    if unknown:
+        parser.error(f"unknown queries: {', '.join(unknown)} (choose from {', '.join(QUERIES)})")
+    stage_metrics.configure_from_args('analytics_engine', args)
+    ds = Dataset(args.data_dir, args.format)
+    names = args.queries or list(QUERIES)
+    
+    if args.check:
+        differences = check_against_sql(ds, names, args.start_date, args.end_date)
+        for difference in differences:
+            print(difference)
+        print(f"\n{len(names)} queries checked, {len(differences)} differences")
+        sys.exit(1 if differences else 0)
+    
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    for name in names:
+        start = time.perf_counter()
+        rows = run_query(ds, name, args.start_date, args.end_date)
+        print(f"Ran {name}: {len(rows)} rows in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+        if args.output:
+            export_rows(os.path.join(args.output, f'{name}.{args.output_format}'), rows,
+                        args.output_format)
+        else:
+            print_rows(name, rows)
+    if args.output:
+        print(f"Wrote {len(names)} results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
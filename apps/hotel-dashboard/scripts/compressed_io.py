@@ -0,0 +1,234 @@
+"""
+Streaming gzip and zstd I/O for the generated CSV files
+Files are compressed by extension (.gz, .zst): open_file() opens any CSV
+path for streamed reading or writing, so a compressed file is never
+decompressed to disk or held in memory whole. Writers cut the stream into
+fixed-size blocks and compress them on a thread pool, each block a complete
+gzip member or zstd frame; concatenated members and frames are valid files
+for gzip, zstd, PyArrow and COPY ... PROGRAM. Readers decompress on a
+background thread, ahead of the consumer.
+gzip uses the standard library; zstd uses PyArrow's codec (the one Parquet
+output already uses), imported only for .zst files.
+"""
+
+import gzip
+import io
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+CODECS = {'.gz': 'gzip', '.zst': 'zstd'}
+# Compressed CSV formats (file extensions) accepted next to plain 'csv'
+COMPRESSED_CSV_FORMATS = ['csv.gz', 'csv.zst']
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+# Uncompressed bytes per gzip member / zstd frame; output depends on it but
+# not on the thread count
+BLOCK_SIZE = 1 << 20
+READ_CHUNK_SIZE = 1 << 20
+READ_AHEAD_CHUNKS = 4
+
+_threads = os.cpu_count() or 1
+
+
+def configure(threads=None):
+    """Set the default number of compression threads (0 compresses inline)"""
+    global _threads
+    if threads is not None:
+        _threads = threads
+
+
+def codec_of(path):
+    """'gzip' or 'zstd' for a compressed path, by extension; None otherwise"""
+    return CODECS.get(os.path.splitext(path)[1])
+
+
+def import_pyarrow():
+    """Import PyArrow, whose codec reads and writes .zst files"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise SystemExit("zstd files require PyArrow: pip install pyarrow")
+    return pyarrow
+
+
+def block_compressor(codec, level=None):
+    """Function compressing one block of bytes into a standalone gzip member or zstd frame"""
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'gzip':
+        # mtime=0 keeps the output byte-identical between runs
+        return lambda block: gzip.compress(block, compresslevel=level, mtime=0)
+    compressor = import_pyarrow().Codec('zstd', compression_level=level)
+    return lambda block: compressor.compress(block, asbytes=True)
+
+
+def iter_decompressed(path, codec):
+    """Yield the decompressed bytes of a gzip or zstd file in chunks"""
+    if codec == 'gzip':
+        source = gzip.open(path, 'rb')
+    else:
+        source = import_pyarrow().input_stream(path, compression='zstd')
+    with source:
+        while True:
+            chunk = source.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+class CompressedWriter(io.RawIOBase):
+    """Write-only binary file compressing BLOCK_SIZE blocks on up to threads threads.
+
+    Blocks are written in order; at most 2 * threads compressed blocks are
+    pending, which bounds memory whatever the file size.
+    """
+    
+    def __init__(self, path, codec, level=None, threads=None):
+        super().__init__()
+        self.file = open(path, 'wb')
+        self.compress = block_compressor(codec, level)
+        threads = _threads if threads is None else threads
+        self.executor = ThreadPoolExecutor(threads) if threads > 0 else None
+        self.max_pending = 2 * max(threads, 1)
+        self.pending = deque()
+        self.buffer = bytearray()
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= BLOCK_SIZE:
+            self._submit(bytes(self.buffer[:BLOCK_SIZE]))
+            del self.buffer[:BLOCK_SIZE]
+        return len(data)
+    
+    def _submit(self, block):
+        if self.executor is None:
+            self.file.write(self.compress(block))
+            return
+        self.pending.append(self.executor.submit(self.compress, block))
+        while len(self.pending) > self.max_pending:
+            self.file.write(self.pending.popleft().result())
+    
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer.clear()
+            while self.pending:
+                self.file.write(self.pending.popleft().result())
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.file.close()
+            super().close()
+
+
+class DecompressedReader(io.RawIOBase):
+    """Read-only binary file of a gzip or zstd file's contents.
+
+    A background thread decompresses up to READ_AHEAD_CHUNKS chunks ahead
+    of the reader, so decompression overlaps with parsing or sending rows
+    (zlib and PyArrow release the GIL). Seeking is forward only, by
+    decompressing and discarding.
+    """
+    
+    def __init__(self, path, codec):
+        super().__init__()
+        self.chunks = queue.Queue(READ_AHEAD_CHUNKS)
+        self.stopped = threading.Event()
+        self.chunk = b''
+        self.offset = 0
+        self.position = 0
+        self.done = False
+        self.thread = threading.Thread(target=self._produce, args=(path, codec), daemon=True)
+        self.thread.start()
+    
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def _produce(self, path, codec):
+        try:
+            for chunk in iter_decompressed(path, codec):
+                if not self._put(chunk):
+                    return
+            self._put(None)
+        except BaseException as e:
+            self._put(e)
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while self.offset >= len(self.chunk):
+            if self.done:
+                return 0
+            item = self.chunks.get()
+            if item is None:
+                self.done = True
+                return 0
+            if isinstance(item, BaseException):
+                self.done = True
+                raise item
+            self.chunk = item
+            self.offset = 0
+        size = min(len(buffer), len(self.chunk) - self.offset)
+        buffer[:size] = self.chunk[self.offset:self.offset + size]
+        self.offset += size
+        self.position += size
+        return size
+    
+    def tell(self):
+        return self.position
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        target = offset + (self.position if whence == io.SEEK_CUR else 0)
+        if whence not in (io.SEEK_SET, io.SEEK_CUR) or target < self.position:
+            raise io.UnsupportedOperation("compressed files can only seek forward")
+        scratch = bytearray(READ_CHUNK_SIZE)
+        while self.position < target:
+            if not self.readinto(memoryview(scratch)[:min(READ_CHUNK_SIZE, target - self.position)]):
+                break
+        return self.position
+    
+    def close(self):
+        if not self.closed:
+            self.stopped.set()
+            self.thread.join()
+        super().close()
+
+
+def open_file(path, mode='r', level=None, threads=None):
+    """Open path like open(), compressing or decompressing by extension.
+
+    mode is 'r', 'w', 'rb' or 'wb'; text modes are UTF-8 with newline=''
+    as the csv module expects. level and threads apply to compressed writes
+    (defaults: DEFAULT_LEVELS and configure()).
+    """
+    if mode not in ('r', 'w', 'rb', 'wb'):
+        raise ValueError(f"unsupported mode {mode!r}")
+    codec = codec_of(path)
+    if codec is None:
+        if 'b' in mode:
+            return open(path, mode)
+        return open(path, mode, newline='', encoding='utf-8')
+    if mode.startswith('r'):
+        binary = io.BufferedReader(DecompressedReader(path, codec), READ_CHUNK_SIZE)
+    else:
+        binary = io.BufferedWriter(CompressedWriter(path, codec, level, threads), BLOCK_SIZE)
+    if 'b' in mode:
+        return binary
+    return io.TextIOWrapper(binary, encoding='utf-8', newline='')
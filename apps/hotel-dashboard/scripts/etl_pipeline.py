@@ -1,16 +1,28 @@
 """
 ETL Pipeline for Hotel Booking Analytics
-Loads CSV data into PostgreSQL with validation and feature engineering
+Loads CSV or Parquet data into PostgreSQL with validation and feature engineering
 """
 
+import argparse
 import csv
+import hashlib
+import io
 import psycopg2
 from psycopg2.extras import execute_values
-from datetime import datetime
+from psycopg2.pool import ThreadedConnectionPool
+from datetime import datetime, timedelta
 from decimal import Decimal
+import json
 import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
 from typing import Dict, List, Any
 
+import compressed_io
+import stage_metrics
+
 # Database configuration
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
@@ -20,110 +32,317 @@ DB_CONFIG = {
     'port': os.getenv('DB_PORT', '5432')
 }
 
+# Rows per execute_values batch in the row loaders
+DEFAULT_BATCH_SIZE = 50000
+CHECKPOINT_PATH = 'data/.etl_checkpoint.json'
+# Input file formats written by generate_data.py --format (file extensions);
+# csv.gz and csv.zst are decompressed as they are read, parquet needs pyarrow
+INPUT_FORMATS = ['csv'] + compressed_io.COMPRESSED_CSV_FORMATS + ['parquet']
+# Parquet rows rendered to CSV per COPY chunk
+PARQUET_BATCH_ROWS = 65536
+
+# Incremental loads: key columns per table, and the date columns whose
+# maximum is recorded in etl_watermarks
+INCREMENTAL_KEYS = {
+    'guest_profiles': ('guest_id',),
+    'bookings': ('booking_id',),
+    'booking_charges': ('line_id', 'charge_date'),
+    'daily_occupancy': ('date', 'room_type'),
+    'marketing_performance': ('date', 'channel', 'campaign_name'),
+}
+WATERMARK_COLUMNS = {
+    'bookings': ('booking_created_date',),
+    'booking_charges': ('charge_date',),
+    'daily_occupancy': ('date',),
+    'marketing_performance': ('date',),
+}
+# Fact tables range partitioned by month on a date column (see schema.sql)
+PARTITION_COLUMNS = {
+    'booking_charges': 'charge_date',
+    'daily_occupancy': 'date',
+    'marketing_performance': 'date',
+}
+# Materialized rollups read by the dashboard API, refreshed after each load
+ROLLUP_VIEWS = ['booking_revenue_daily', 'charge_revenue_daily', 'weather_occupancy_daily']
+# Tables each rollup reads, to bump only the rollups an incremental load changed
+ROLLUP_SOURCES = {
+    'booking_revenue_daily': {'bookings'},
+    'charge_revenue_daily': {'bookings', 'booking_charges'},
+    'weather_occupancy_daily': {'daily_occupancy', 'bookings', 'booking_charges'},
+}
+# NOTIFY channel announcing new data_versions to the API's query cache
+DATA_VERSION_CHANNEL = 'data_version'
+# Computed by the ETL from bookings, not taken from the guest CSV
+GUEST_DERIVED_COLUMNS = (
+    'age_at_check_in', 'lifetime_bookings', 'lifetime_revenue_eur',
+    'first_booking_date', 'most_recent_booking_date'
+)
+GUEST_PROFILE_COLUMNS = [
+    'guest_id', 'first_name', 'last_name', 'email', 'date_of_birth', 'gender',
+    'country_of_residence', 'city_of_residence', 'nationality', 'family_status',
+    'primary_purpose_of_stay', 'travel_party_type', 'preferred_room_type',
+    'ski_skill_level', 'email_marketing_opt_in', 'sms_opt_in',
+    'loyalty_member', 'loyalty_tier'
+]
+BOOKING_COLUMNS = [
+    'booking_id', 'guest_id', 'check_in_date', 'check_out_date', 'nights',
+    'num_guests', 'num_adults', 'num_children', 'room_type', 'board_type',
+    'booking_status', 'booking_channel', 'booking_created_date', 'country',
+    'room_revenue_eur', 'fb_revenue_eur', 'activities_revenue_eur',
+    'total_revenue_eur', 'discount_eur', 'net_revenue_eur'
+]
+CHARGE_COLUMNS = [
+    'line_id', 'booking_id', 'charge_date', 'charge_category', 'charge_item',
+    'unit_price_eur', 'quantity', 'line_subtotal_eur', 'tax_rate',
+    'line_tax_eur', 'line_total_eur'
+]
+
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """Cursor that counts the statements it sends, for the stage metrics"""
+    
+    def execute(self, query, vars=None):
+        stage_metrics.count_round_trip()
+        return super().execute(query, vars)
+    
+    def copy_expert(self, sql, file, size=8192):
+        stage_metrics.count_round_trip()
+        return super().copy_expert(sql, file, size)
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    """Connection whose cursors and commits count towards the stage metrics"""
+    
+    def cursor(self, *args, **kwargs):
+        kwargs.setdefault('cursor_factory', CountingCursor)
+        return super().cursor(*args, **kwargs)
+    
+    def commit(self):
+        stage_metrics.count_round_trip()
+        return super().commit()
+    
+    def rollback(self):
+        stage_metrics.count_round_trip()
+        return super().rollback()
+
 
 def connect_db():
     """Create database connection"""
-    return psycopg2.connect(**DB_CONFIG)
+    return psycopg2.connect(**DB_CONFIG, connection_factory=CountingConnection)
 
 
-def calculate_age_at_check_in(date_of_birth, check_in_date):
-    """Calculate age at check-in"""
-    if not date_of_birth or not check_in_date:
-        return None
-    birth = datetime.strptime(date_of_birth, '%Y-%m-%d').date()
-    check_in = datetime.strptime(check_in_date, '%Y-%m-%d').date()
-    age = check_in.year - birth.year - ((check_in.month, check_in.day) < (birth.month, birth.day))
-    return age
+def on_conflict_update(table, columns, extra_sets=()):
+    """Build an ON CONFLICT clause that updates only rows whose values differ.
 
+    Unchanged rows are left alone, so they are neither rewritten nor
+    reported by a RETURNING clause.
+    """
+    keys = INCREMENTAL_KEYS[table]
+    updated = [c for c in columns if c not in keys]
+    sets = [f'{c} = EXCLUDED.{c}' for c in updated] + list(extra_sets)
+    current = ', '.join(f'{table}.{c}' for c in updated)
+    incoming = ', '.join(f'EXCLUDED.{c}' for c in updated)
+    return (f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {', '.join(sets)} "
+            f"WHERE ({current}) IS DISTINCT FROM ({incoming})")
 
-def load_guest_profiles(conn, csv_path):
-    """Load and process guest profiles"""
-    print("Loading guest profiles...")
+
+# RETURNING clause of the bookings upserts: each inserted or changed booking's
+# guest and, for a changed booking, the guest it had before (the subquery sees
+# bookings as they were before the statement), so a booking moved to another
+# guest refreshes the lifetime stats of both
+BOOKING_GUESTS_RETURNING = ("RETURNING guest_id, (SELECT previous.guest_id FROM bookings previous "
+                            "WHERE previous.booking_id = bookings.booking_id)")
+
+
+def ensure_partitions(conn, table, first, last):
+    """Create any missing monthly partitions of table for dates first..last"""
+    if table not in PARTITION_COLUMNS or first is None:
+        return 0
+    with conn.cursor() as cur:
+        cur.execute("SELECT ensure_month_partitions(%s, %s, %s)", (table, first, last))
+        created = cur.fetchone()[0]
+    if created:
+        print(f"Created {created} monthly partitions of {table}")
+    return created
+
+
+def moved_charges_delete(source):
+    """SQL deleting charge lines that reappear in source under another charge_date.
+
+    booking_charges is keyed on (line_id, charge_date), its partition key, so
+    a line whose date changed is inserted as a new row; this removes the old
+    one. source is a table or CTE with line_id and charge_date columns.
+    """
+    return f"""
+        DELETE FROM booking_charges b USING {source} s
+        WHERE b.line_id = s.line_id AND b.charge_date <> s.charge_date
+    """
+
+
+class LoadCheckpoint:
+    """Resume checkpoints for batched loads, persisted as JSON.
+
+    After each committed batch the byte offset reached in the CSV file (and
+    the last key loaded, for logging) is recorded, so a failed load can
+    restart from there. Values collected from the statement's RETURNING
+    clause are saved too, so a resumed load still reports all of them. A
+    checkpoint is ignored if the file's size or modification time has
+    changed since it was written.
+    """
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        guests = list(reader)
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
     
-    # Update guest analytics fields from bookings
-    with conn.cursor() as cur:
-        # Get booking statistics per guest
-        cur.execute("""
-            SELECT 
-                guest_id,
-                COUNT(DISTINCT booking_id) as bookings,
-                SUM(net_revenue_eur) as revenue,
-                MIN(check_in_date) as first_booking,
-                MAX(check_in_date) as last_booking
-            FROM bookings_with_charges
-            WHERE booking_status = 'Stayed'
-            GROUP BY guest_id
-        """)
-        
-        guest_stats = {row[0]: {
-            'bookings': row[1],
-            'revenue': row[2] or Decimal('0.00'),
-            'first_booking': row[3],
-            'last_booking': row[4]
-        } for row in cur.fetchall()}
-    
-    # Update guests with calculated fields
-    for guest in guests:
-        guest_id = guest['guest_id']
-        stats = guest_stats.get(guest_id, {})
+    def _file_signature(self, csv_path):
+        stat = os.stat(csv_path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+    
+    def resume_offset(self, csv_path):
+        """Return (byte offset, rows already loaded, returned values) to resume csv_path from"""
+        entry = self.state.get(os.path.abspath(csv_path))
+        if not entry or entry['file'] != self._file_signature(csv_path):
+            return 0, 0, []
+        print(f"Resuming {csv_path} after {entry['rows']} rows (last key {entry['last_key']})")
+        return entry['offset'], entry['rows'], entry.get('returned', [])
+    
+    def save(self, csv_path, offset, rows, last_key, returned=()):
+        self.state[os.path.abspath(csv_path)] = {
+            'file': self._file_signature(csv_path),
+            'offset': offset,
+            'rows': rows,
+            'last_key': last_key,
+            'returned': sorted(returned)
+        }
+        self._write()
+    
+    def clear(self, csv_path):
+        if self.state.pop(os.path.abspath(csv_path), None) is not None:
+            self._write()
+    
+    def _write(self):
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def iter_csv_batches(csv_path, batch_size, start_offset=0, stop_offset=None):
+    """Yield (rows, end_offset) batches of namedtuple rows from a CSV file.
+
+    Rows are read lazily, so memory is bounded by batch_size. end_offset is
+    the byte offset just past the batch's last row, which can be passed back
+    as start_offset to continue after it. Reading stops at stop_offset, if
+    given (a row boundary, see plan_csv_partitions). Offsets into a
+    compressed file count decompressed bytes.
+    """
+    with compressed_io.open_file(csv_path, 'rb') as f:
+        fieldnames = next(csv.reader([f.readline().decode('utf-8')]))
+        make_row = namedtuple('CsvRow', fieldnames)._make
+        if start_offset:
+            f.seek(start_offset)
+        offset = f.tell()
         
-        guest['lifetime_bookings'] = stats.get('bookings', 0)
-        guest['lifetime_revenue_eur'] = str(stats.get('revenue', Decimal('0.00')))
-        guest['first_booking_date'] = stats.get('first_booking')
-        guest['most_recent_booking_date'] = stats.get('last_booking')
+        def lines():
+            nonlocal offset
+            for raw in f:
+                if stop_offset is not None and offset >= stop_offset:
+                    break
+                offset += len(raw)
+                yield raw.decode('utf-8')
         
-        # Calculate age at first check-in
-        if guest['first_booking_date']:
-            guest['age_at_check_in'] = calculate_age_at_check_in(
-                guest['date_of_birth'],
-                guest['first_booking_date']
-            )
-        else:
-            guest['age_at_check_in'] = None
+        batch = []
+        for row in csv.reader(lines()):
+            batch.append(make_row(row))
+            if len(batch) >= batch_size:
+                yield batch, offset
+                batch = []
+        if batch:
+            yield batch, offset
+
+
+def load_csv_in_batches(conn, csv_path, sql, to_values, key, batch_size=None, checkpoint=None,
+                        returning=False, byte_range=None, partitioned=None):
+    """Load a CSV file with execute_values, one batch of rows at a time.
+
+    Without a checkpoint the whole file is loaded in one transaction. With a
+    checkpoint each batch is committed and recorded, and the load starts from
+    the last recorded batch. With returning, the non-null values of sql's
+    RETURNING clause are collected. With byte_range=(start, stop) only
+    that slice of the file is loaded (no checkpoint). With partitioned, the
+    name of the table being loaded, its monthly partitions are created for
+    each batch's dates. Returns (rows read, set of values returned).
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    if byte_range and checkpoint:
+        raise ValueError("checkpoints cannot be combined with a byte range")
+    start_offset, loaded, returned = checkpoint.resume_offset(csv_path) if checkpoint else (0, 0, [])
+    returned = set(returned)
+    stop_offset = None
+    if byte_range:
+        start_offset, stop_offset = byte_range
     
-    # Insert into database
     with conn.cursor() as cur:
-        execute_values(
-            cur,
-            """
-            INSERT INTO guest_profiles (
-                guest_id, first_name, last_name, email, date_of_birth, gender,
-                country_of_residence, city_of_residence, nationality, family_status,
-                primary_purpose_of_stay, travel_party_type, preferred_room_type,
-                ski_skill_level, email_marketing_opt_in, sms_opt_in,
-                loyalty_member, loyalty_tier, age_at_check_in, lifetime_bookings,
-                lifetime_revenue_eur, first_booking_date, most_recent_booking_date
-            ) VALUES %s
-            ON CONFLICT (guest_id) DO UPDATE SET
-                lifetime_bookings = EXCLUDED.lifetime_bookings,
-                lifetime_revenue_eur = EXCLUDED.lifetime_revenue_eur,
-                first_booking_date = EXCLUDED.first_booking_date,
-                most_recent_booking_date = EXCLUDED.most_recent_booking_date,
-                age_at_check_in = EXCLUDED.age_at_check_in,
-                updated_at = CURRENT_TIMESTAMP
-            """,
-            [(
-                g['guest_id'], g['first_name'], g['last_name'], g['email'],
-                g['date_of_birth'], g['gender'], g['country_of_residence'],
-                g['city_of_residence'], g['nationality'], g['family_status'],
-                g['primary_purpose_of_stay'], g['travel_party_type'],
-                g['preferred_room_type'], g['ski_skill_level'],
-                g['email_marketing_opt_in'].lower() == 'true',
-                g['sms_opt_in'].lower() == 'true',
-                g['loyalty_member'].lower() == 'true',
-                g['loyalty_tier'], g.get('age_at_check_in'),
-                g['lifetime_bookings'], g['lifetime_revenue_eur'],
-                g['first_booking_date'], g['most_recent_booking_date']
-            ) for g in guests]
+        for batch, offset in iter_csv_batches(csv_path, batch_size, start_offset, stop_offset):
+            if partitioned:
+                date_column = PARTITION_COLUMNS[partitioned]
+                dates = [getattr(row, date_column) for row in batch]
+                ensure_partitions(conn, partitioned, min(dates), max(dates))
+            results = execute_values(cur, sql, [to_values(row) for row in batch], fetch=returning)
+            if returning:
+                returned.update(value for row in results for value in row if value is not None)
+            loaded += len(batch)
+            stage_metrics.count_rows(rows_in=len(batch), rows_out=len(batch))
+            if checkpoint:
+                conn.commit()
+                checkpoint.save(csv_path, offset, loaded, getattr(batch[-1], key), returned)
+    conn.commit()
+    
+    if checkpoint:
+        checkpoint.clear(csv_path)
+    return loaded, returned
+
+
+@stage_metrics.instrumented()
+def load_guest_profiles(conn, csv_path, batch_size=None, checkpoint=None):
+    """Load and process guest profiles.
+
+    Lifetime stats are left to refresh_guest_lifetime_stats. Returns the ids
+    of guests that were inserted or whose profile changed.
+    """
+    print("Loading guest profiles...")
+    
+    def to_values(g):
+        return (
+            g.guest_id, g.first_name, g.last_name, g.email,
+            g.date_of_birth, g.gender, g.country_of_residence,
+            g.city_of_residence, g.nationality, g.family_status,
+            g.primary_purpose_of_stay, g.travel_party_type,
+            g.preferred_room_type, g.ski_skill_level,
+            g.email_marketing_opt_in.lower() == 'true',
+            g.sms_opt_in.lower() == 'true',
+            g.loyalty_member.lower() == 'true',
+            g.loyalty_tier
         )
-        conn.commit()
-        print(f"Loaded {len(guests)} guest profiles")
+    
+    # Insert into database
+    loaded, guest_ids = load_csv_in_batches(
+        conn, csv_path,
+        f"""
+        INSERT INTO guest_profiles ({', '.join(GUEST_PROFILE_COLUMNS)}) VALUES %s
+        {on_conflict_update('guest_profiles', GUEST_PROFILE_COLUMNS, ['updated_at = CURRENT_TIMESTAMP'])}
+        RETURNING guest_id
+        """,
+        to_values, 'guest_id', batch_size, checkpoint, returning=True
+    )
+    print(f"Loaded {loaded} guest profiles ({len(guest_ids)} new or changed)")
+    return guest_ids
 
 
+@stage_metrics.instrumented()
 def load_marketing_channels(conn):
     """Load marketing channel dimension"""
     print("Loading marketing channels...")
@@ -155,141 +374,1179 @@ def load_marketing_channels(conn):
         print(f"Loaded {len(channels)} marketing channels")
 
 
-def load_bookings(conn, csv_path):
-    """Load bookings and charges"""
-    print("Loading bookings and charges...")
+@stage_metrics.instrumented()
+def load_bookings(conn, csv_path, batch_size=None, checkpoint=None):
+    """Load bookings (one row per booking).
+
+    Returns the ids of guests with bookings that were inserted or changed,
+    including the previous guest of a booking moved to another guest.
+    """
+    print("Loading bookings...")
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        bookings = list(reader)
+    def to_values(b):
+        return (
+            b.booking_id, b.guest_id,
+            b.check_in_date, b.check_out_date, int(b.nights),
+            int(b.num_guests), int(b.num_adults), int(b.num_children),
+            b.room_type, b.board_type, b.booking_status,
+            b.booking_channel, b.booking_created_date, b.country,
+            Decimal(b.room_revenue_eur) if b.room_revenue_eur else None,
+            Decimal(b.fb_revenue_eur) if b.fb_revenue_eur else None,
+            Decimal(b.activities_revenue_eur) if b.activities_revenue_eur else None,
+            Decimal(b.total_revenue_eur) if b.total_revenue_eur else None,
+            Decimal(b.discount_eur) if b.discount_eur else None,
+            Decimal(b.net_revenue_eur) if b.net_revenue_eur else None
+        )
     
-    with conn.cursor() as cur:
-        execute_values(
-            cur,
-            """
-            INSERT INTO bookings_with_charges (
-                line_id, booking_id, guest_id, check_in_date, check_out_date,
-                nights, num_guests, num_adults, num_children, room_type,
-                board_type, booking_status, booking_channel, booking_created_date,
-                country, charge_date, charge_category, charge_item,
-                unit_price_eur, quantity, line_subtotal_eur, tax_rate,
-                line_tax_eur, line_total_eur, room_revenue_eur, fb_revenue_eur,
-                activities_revenue_eur, total_revenue_eur, discount_eur, net_revenue_eur
-            ) VALUES %s
-            ON CONFLICT (line_id) DO UPDATE SET
-                updated_at = CURRENT_TIMESTAMP
-            """,
-            [(
-                b['line_id'], b['booking_id'], b['guest_id'],
-                b['check_in_date'], b['check_out_date'], int(b['nights']),
-                int(b['num_guests']), int(b['num_adults']), int(b['num_children']),
-                b['room_type'], b['board_type'], b['booking_status'],
-                b['booking_channel'], b['booking_created_date'], b['country'],
-                b['charge_date'], b['charge_category'], b['charge_item'],
-                Decimal(b['unit_price_eur']), Decimal(b['quantity']),
-                Decimal(b['line_subtotal_eur']), Decimal(b['tax_rate']),
-                Decimal(b['line_tax_eur']), Decimal(b['line_total_eur']),
-                Decimal(b['room_revenue_eur']) if b['room_revenue_eur'] else None,
-                Decimal(b['fb_revenue_eur']) if b['fb_revenue_eur'] else None,
-                Decimal(b['activities_revenue_eur']) if b['activities_revenue_eur'] else None,
-                Decimal(b['total_revenue_eur']) if b['total_revenue_eur'] else None,
-                Decimal(b['discount_eur']) if b['discount_eur'] else None,
-                Decimal(b['net_revenue_eur']) if b['net_revenue_eur'] else None
-            ) for b in bookings]
+    loaded, guest_ids = load_csv_in_batches(
+        conn, csv_path,
+        f"""
+        INSERT INTO bookings ({', '.join(BOOKING_COLUMNS)}) VALUES %s
+        {on_conflict_update('bookings', BOOKING_COLUMNS)}
+        {BOOKING_GUESTS_RETURNING}
+        """,
+        to_values, 'booking_id', batch_size, checkpoint, returning=True
+    )
+    print(f"Loaded {loaded} bookings ({len(guest_ids)} guests affected)")
+    return guest_ids
+
+
+@stage_metrics.instrumented()
+def load_booking_charges(conn, csv_path, batch_size=None, checkpoint=None, byte_range=None):
+    """Load booking charge lines (optionally one byte range of the file)"""
+    print("Loading booking charges...")
+    
+    def to_values(c):
+        return (
+            c.line_id, c.booking_id, c.charge_date,
+            c.charge_category, c.charge_item,
+            Decimal(c.unit_price_eur), Decimal(c.quantity),
+            Decimal(c.line_subtotal_eur), Decimal(c.tax_rate),
+            Decimal(c.line_tax_eur), Decimal(c.line_total_eur)
         )
-        conn.commit()
-        print(f"Loaded {len(bookings)} booking line items")
+    
+    loaded, _ = load_csv_in_batches(
+        conn, csv_path,
+        f"""
+        WITH merged AS (
+            INSERT INTO booking_charges ({', '.join(CHARGE_COLUMNS)}) VALUES %s
+            {on_conflict_update('booking_charges', CHARGE_COLUMNS)}
+            RETURNING line_id, charge_date
+        )
+        {moved_charges_delete('merged')}
+        """,
+        to_values, 'line_id', batch_size, checkpoint, byte_range=byte_range,
+        partitioned='booking_charges'
+    )
+    print(f"Loaded {loaded} booking charge lines")
+    return loaded
 
 
-def load_occupancy(conn, csv_path):
+@stage_metrics.instrumented()
+def load_occupancy(conn, csv_path, batch_size=None, checkpoint=None):
     """Load daily occupancy"""
     print("Loading daily occupancy...")
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        occupancy = list(reader)
-    
-    with conn.cursor() as cur:
-        execute_values(
-            cur,
-            """
-            INSERT INTO daily_occupancy (
-                date, room_type, total_rooms, rooms_sold,
-                rooms_out_of_service, rooms_blocked, occupancy_pct,
-                room_revenue_eur, adr_eur, revpar_eur,
-                weather_condition, avg_temperature_c, snow_depth_cm
-            ) VALUES %s
-            ON CONFLICT (date, room_type) DO UPDATE SET
-                rooms_sold = EXCLUDED.rooms_sold,
-                rooms_out_of_service = EXCLUDED.rooms_out_of_service,
-                rooms_blocked = EXCLUDED.rooms_blocked,
-                occupancy_pct = EXCLUDED.occupancy_pct,
-                room_revenue_eur = EXCLUDED.room_revenue_eur,
-                adr_eur = EXCLUDED.adr_eur,
-                revpar_eur = EXCLUDED.revpar_eur,
-                weather_condition = EXCLUDED.weather_condition,
-                avg_temperature_c = EXCLUDED.avg_temperature_c,
-                snow_depth_cm = EXCLUDED.snow_depth_cm
-            """,
-            [(
-                o['date'], o['room_type'], int(o['total_rooms']),
-                int(o['rooms_sold']), int(o['rooms_out_of_service']),
-                int(o['rooms_blocked']), Decimal(o['occupancy_pct']),
-                Decimal(o['room_revenue_eur']), Decimal(o['adr_eur']),
-                Decimal(o['revpar_eur']), o['weather_condition'],
-                Decimal(o['avg_temperature_c']), int(o['snow_depth_cm'])
-            ) for o in occupancy]
+    def to_values(o):
+        return (
+            o.date, o.room_type, int(o.total_rooms),
+            int(o.rooms_sold), int(o.rooms_out_of_service),
+            int(o.rooms_blocked), Decimal(o.occupancy_pct),
+            Decimal(o.room_revenue_eur), Decimal(o.adr_eur),
+            Decimal(o.revpar_eur), o.weather_condition,
+            Decimal(o.avg_temperature_c), int(o.snow_depth_cm)
         )
-        conn.commit()
-        print(f"Loaded {len(occupancy)} occupancy records")
+    
+    loaded, _ = load_csv_in_batches(
+        conn, csv_path,
+        """
+        INSERT INTO daily_occupancy (
+            date, room_type, total_rooms, rooms_sold,
+            rooms_out_of_service, rooms_blocked, occupancy_pct,
+            room_revenue_eur, adr_eur, revpar_eur,
+            weather_condition, avg_temperature_c, snow_depth_cm
+        ) VALUES %s
+        ON CONFLICT (date, room_type) DO UPDATE SET
+            rooms_sold = EXCLUDED.rooms_sold,
+            rooms_out_of_service = EXCLUDED.rooms_out_of_service,
+            rooms_blocked = EXCLUDED.rooms_blocked,
+            occupancy_pct = EXCLUDED.occupancy_pct,
+            room_revenue_eur = EXCLUDED.room_revenue_eur,
+            adr_eur = EXCLUDED.adr_eur,
+            revpar_eur = EXCLUDED.revpar_eur,
+            weather_condition = EXCLUDED.weather_condition,
+            avg_temperature_c = EXCLUDED.avg_temperature_c,
+            snow_depth_cm = EXCLUDED.snow_depth_cm
+        """,
+        to_values, 'date', batch_size, checkpoint, partitioned='daily_occupancy'
+    )
+    print(f"Loaded {loaded} occupancy records")
 
 
-def load_marketing(conn, csv_path):
+@stage_metrics.instrumented()
+def load_marketing(conn, csv_path, batch_size=None, checkpoint=None):
     """Load marketing performance"""
     print("Loading marketing performance...")
     
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        marketing = list(reader)
+    def to_values(m):
+        return (
+            m.date, m.channel, m.campaign_name,
+            int(m.impressions), int(m.clicks), int(m.sessions),
+            int(m.bookings), int(m.room_nights),
+            Decimal(m.total_revenue_eur), Decimal(m.room_revenue_eur),
+            Decimal(m.marketing_cost_eur), Decimal(m.cpc_eur),
+            Decimal(m.cpa_eur), Decimal(m.roas), Decimal(m.conversion_rate)
+        )
+    
+    loaded, _ = load_csv_in_batches(
+        conn, csv_path,
+        """
+        INSERT INTO marketing_performance (
+            date, channel, campaign_name, impressions, clicks, sessions,
+            bookings, room_nights, total_revenue_eur, room_revenue_eur,
+            marketing_cost_eur, cpc_eur, cpa_eur, roas, conversion_rate
+        ) VALUES %s
+        ON CONFLICT (date, channel, campaign_name) DO UPDATE SET
+            impressions = EXCLUDED.impressions,
+            clicks = EXCLUDED.clicks,
+            sessions = EXCLUDED.sessions,
+            bookings = EXCLUDED.bookings,
+            room_nights = EXCLUDED.room_nights,
+            total_revenue_eur = EXCLUDED.total_revenue_eur,
+            room_revenue_eur = EXCLUDED.room_revenue_eur,
+            marketing_cost_eur = EXCLUDED.marketing_cost_eur,
+            cpc_eur = EXCLUDED.cpc_eur,
+            cpa_eur = EXCLUDED.cpa_eur,
+            roas = EXCLUDED.roas,
+            conversion_rate = EXCLUDED.conversion_rate
+        """,
+        to_values, 'date', batch_size, checkpoint, partitioned='marketing_performance'
+    )
+    print(f"Loaded {loaded} marketing performance records")
+
+
+# ============================================
+# BULK (COPY) LOADERS
+# ============================================
+
+class FileSlice:
+    """Read-only view of a binary file that ends at stop_offset, for COPY"""
+    
+    def __init__(self, f, stop_offset):
+        self.f = f
+        self.stop_offset = stop_offset
+    
+    def read(self, size=-1):
+        remaining = self.stop_offset - self.f.tell()
+        if remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.f.read(size)
+
+
+class ArrowCsvReader:
+    """Read-only file of headerless CSV rendered from Arrow record batches, for COPY.
+
+    Batches are converted one at a time, so only the current batch and its
+    CSV text are held in memory.
+    """
     
+    def __init__(self, batches):
+        from pyarrow import csv as arrow_csv
+        self.batches = iter(batches)
+        self.write_csv = arrow_csv.write_csv
+        self.options = arrow_csv.WriteOptions(include_header=False)
+        self.chunk = b''
+        self.position = 0
+    
+    def read(self, size=-1):
+        while self.position >= len(self.chunk):
+            batch = next(self.batches, None)
+            if batch is None:
+                return b''
+            sink = io.BytesIO()
+            self.write_csv(batch, sink, self.options)
+            self.chunk = sink.getvalue()
+            self.position = 0
+        if size is None or size < 0:
+            size = len(self.chunk) - self.position
+        data = self.chunk[self.position:self.position + size]
+        self.position += len(data)
+        return data
+
+
+def import_parquet():
+    """Import pyarrow.parquet, which is only needed for --format parquet"""
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Loading Parquet files requires pyarrow: pip install pyarrow")
+    return pyarrow.parquet
+
+
+def create_staging_table(conn, path, table, columns, staging):
+    """Create an empty unlogged staging copy of table's columns, after checking them"""
     with conn.cursor() as cur:
-        execute_values(
-            cur,
-            """
-            INSERT INTO marketing_performance (
-                date, channel, campaign_name, impressions, clicks, sessions,
-                bookings, room_nights, total_revenue_eur, room_revenue_eur,
-                marketing_cost_eur, cpc_eur, cpa_eur, roas, conversion_rate
-            ) VALUES %s
-            ON CONFLICT (date, channel, campaign_name) DO UPDATE SET
-                impressions = EXCLUDED.impressions,
-                clicks = EXCLUDED.clicks,
-                sessions = EXCLUDED.sessions,
-                bookings = EXCLUDED.bookings,
-                room_nights = EXCLUDED.room_nights,
-                total_revenue_eur = EXCLUDED.total_revenue_eur,
-                room_revenue_eur = EXCLUDED.room_revenue_eur,
-                marketing_cost_eur = EXCLUDED.marketing_cost_eur,
-                cpc_eur = EXCLUDED.cpc_eur,
-                cpa_eur = EXCLUDED.cpa_eur,
-                roas = EXCLUDED.roas,
-                conversion_rate = EXCLUDED.conversion_rate
-            """,
-            [(
-                m['date'], m['channel'], m['campaign_name'],
-                int(m['impressions']), int(m['clicks']), int(m['sessions']),
-                int(m['bookings']), int(m['room_nights']),
-                Decimal(m['total_revenue_eur']), Decimal(m['room_revenue_eur']),
-                Decimal(m['marketing_cost_eur']), Decimal(m['cpc_eur']),
-                Decimal(m['cpa_eur']), Decimal(m['roas']), Decimal(m['conversion_rate'])
-            ) for m in marketing]
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+        """, (table,))
+        known = {row[0] for row in cur.fetchall()}
+        unknown = [c for c in columns if c not in known]
+        if unknown:
+            raise ValueError(f"{path}: columns not in {table}: {', '.join(unknown)}")
+        
+        column_list = ', '.join(columns)
+        cur.execute(f"DROP TABLE IF EXISTS {staging}")
+        cur.execute(f"CREATE UNLOGGED TABLE {staging} AS SELECT {column_list} FROM {table} WITH NO DATA")
+
+
+def ensure_staged_partitions(conn, table, staging):
+    """Create the monthly partitions of table covering the dates in staging"""
+    if table in PARTITION_COLUMNS:
+        date_column = PARTITION_COLUMNS[table]
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT MIN({date_column}), MAX({date_column}) FROM {staging}")
+            ensure_partitions(conn, table, *cur.fetchone())
+
+
+def copy_csv_to_staging(conn, csv_path, table, start_offset=0, stop_offset=None, staging=None):
+    """Stream a CSV file into an unlogged staging copy of table via COPY.
+
+    The staging table takes its column types from table, restricted to the
+    columns in the CSV header. With start_offset (and stop_offset), only the
+    rows in that byte range are copied; concurrent loads of one table need
+    distinct staging names. If table is partitioned, partitions are created
+    for the staged dates. A gzip or zstd file is decompressed on a background
+    thread and streamed straight into COPY, never to disk. Returns (staging
+    table name, columns, rows copied).
+    """
+    staging = staging or f'staging_{table}'
+    
+    with compressed_io.open_file(csv_path, 'rb') as f:
+        columns = next(csv.reader([f.readline().decode('utf-8')]))
+        create_staging_table(conn, csv_path, table, columns, staging)
+        
+        with conn.cursor() as cur:
+            # The file is positioned just past the header unless we skip ahead
+            if start_offset:
+                f.seek(start_offset)
+            source = FileSlice(f, stop_offset) if stop_offset is not None else f
+            cur.copy_expert(f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", source)
+            rows = cur.rowcount
+    
+    stage_metrics.count_rows(rows_in=rows)
+    ensure_staged_partitions(conn, table, staging)
+    return staging, columns, rows
+
+
+def copy_parquet_to_staging(conn, parquet_path, table, staging=None):
+    """Stream a Parquet file into an unlogged staging copy of table via COPY.
+
+    Record batches are read one at a time and rendered as CSV into the same
+    COPY the CSV loader uses, so the typed columns never round-trip through
+    Python objects. Returns (staging table name, columns, rows copied).
+    """
+    pq = import_parquet()
+    staging = staging or f'staging_{table}'
+    
+    parquet_file = pq.ParquetFile(parquet_path)
+    columns = parquet_file.schema_arrow.names
+    create_staging_table(conn, parquet_path, table, columns, staging)
+    with conn.cursor() as cur:
+        source = ArrowCsvReader(parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS))
+        cur.copy_expert(f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", source)
+        rows = cur.rowcount
+    
+    stage_metrics.count_rows(rows_in=rows)
+    ensure_staged_partitions(conn, table, staging)
+    return staging, columns, rows
+
+
+def copy_to_staging(conn, path, table, start_offset=0, stop_offset=None, staging=None):
+    """Stage a CSV or Parquet file (by extension); byte ranges apply to CSV only"""
+    if path.endswith('.parquet'):
+        if start_offset or stop_offset is not None:
+            raise ValueError(f"{path}: Parquet files cannot be staged by byte range")
+        return copy_parquet_to_staging(conn, path, table, staging)
+    return copy_csv_to_staging(conn, path, table, start_offset, stop_offset, staging)
+
+
+def merge_from_staging(conn, staging, sql, fetch=False):
+    """Run one set-based INSERT ... SELECT from staging, then drop staging.
+
+    Returns the row count, or with fetch the rows the statement returned.
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql)
+        rows = cur.fetchall() if fetch else cur.rowcount
+        cur.execute(f"DROP TABLE {staging}")
+    conn.commit()
+    return rows
+
+
+@stage_metrics.instrumented()
+def bulk_load_guest_profiles(conn, csv_path):
+    """Load guest profiles with COPY; returns the ids of new or changed guests"""
+    print("Bulk loading guest profiles...")
+    staging, _, copied = copy_to_staging(conn, csv_path, 'guest_profiles')
+    column_list = ', '.join(GUEST_PROFILE_COLUMNS)
+    
+    merged = merge_from_staging(conn, staging, f"""
+        WITH merged AS (
+            INSERT INTO guest_profiles ({column_list})
+            SELECT {column_list} FROM {staging}
+            {on_conflict_update('guest_profiles', GUEST_PROFILE_COLUMNS, ['updated_at = CURRENT_TIMESTAMP'])}
+            RETURNING guest_id
         )
-        conn.commit()
-        print(f"Loaded {len(marketing)} marketing performance records")
+        SELECT guest_id FROM merged
+    """, fetch=True)
+    stage_metrics.count_rows(rows_out=len(merged))
+    print(f"Loaded {len(merged)} new or changed guest profiles ({copied} copied)")
+    return {row[0] for row in merged}
+
+
+@stage_metrics.instrumented()
+def bulk_load_bookings(conn, csv_path):
+    """Load bookings with COPY and one merge statement.
+
+    Returns the ids of guests with bookings that were inserted or changed,
+    including the previous guest of a booking moved to another guest.
+    """
+    print("Bulk loading bookings...")
+    staging, columns, copied = copy_to_staging(conn, csv_path, 'bookings')
+    column_list = ', '.join(columns)
+    
+    guests = merge_from_staging(conn, staging, f"""
+        WITH merged AS (
+            INSERT INTO bookings ({column_list})
+            SELECT {column_list} FROM {staging}
+            {on_conflict_update('bookings', columns)}
+            {BOOKING_GUESTS_RETURNING}
+        )
+        SELECT * FROM merged
+    """, fetch=True)
+    stage_metrics.count_rows(rows_out=len(guests))
+    guest_ids = {guest_id for row in guests for guest_id in row if guest_id is not None}
+    print(f"Loaded bookings for {len(guest_ids)} guests ({copied} copied)")
+    return guest_ids
+
+
+@stage_metrics.instrumented()
+def bulk_load_booking_charges(conn, csv_path, byte_range=None):
+    """Load booking charge lines with COPY and one merge statement.
+
+    With byte_range=(start, stop) only that slice of the file is loaded.
+    """
+    print("Bulk loading booking charges...")
+    if byte_range:
+        staging, columns, copied = copy_to_staging(
+            conn, csv_path, 'booking_charges', *byte_range,
+            staging=f'staging_booking_charges_{byte_range[0]}'
+        )
+    else:
+        staging, columns, copied = copy_to_staging(conn, csv_path, 'booking_charges')
+    column_list = ', '.join(columns)
+    
+    (merged,), = merge_from_staging(conn, staging, f"""
+        WITH merged AS (
+            INSERT INTO booking_charges ({column_list})
+            SELECT {column_list} FROM {staging}
+            {on_conflict_update('booking_charges', columns)}
+            RETURNING line_id, charge_date
+        ),
+        moved AS ({moved_charges_delete('merged')})
+        SELECT COUNT(*) FROM merged
+    """, fetch=True)
+    stage_metrics.count_rows(rows_out=merged)
+    print(f"Loaded {merged} booking charge lines ({copied} copied)")
+    return merged
 
 
-def main():
+@stage_metrics.instrumented()
+def bulk_load_occupancy(conn, csv_path):
+    """Load daily occupancy with COPY and one merge statement"""
+    print("Bulk loading daily occupancy...")
+    staging, columns, copied = copy_to_staging(conn, csv_path, 'daily_occupancy')
+    column_list = ', '.join(columns)
+    
+    merged = merge_from_staging(conn, staging, f"""
+        INSERT INTO daily_occupancy ({column_list})
+        SELECT {column_list} FROM {staging}
+        ON CONFLICT (date, room_type) DO UPDATE SET
+            rooms_sold = EXCLUDED.rooms_sold,
+            rooms_out_of_service = EXCLUDED.rooms_out_of_service,
+            rooms_blocked = EXCLUDED.rooms_blocked,
+            occupancy_pct = EXCLUDED.occupancy_pct,
+            room_revenue_eur = EXCLUDED.room_revenue_eur,
+            adr_eur = EXCLUDED.adr_eur,
+            revpar_eur = EXCLUDED.revpar_eur,
+            weather_condition = EXCLUDED.weather_condition,
+            avg_temperature_c = EXCLUDED.avg_temperature_c,
+            snow_depth_cm = EXCLUDED.snow_depth_cm
+    """)
+    stage_metrics.count_rows(rows_out=merged)
+    print(f"Loaded {merged} occupancy records ({copied} copied)")
+
+
+@stage_metrics.instrumented()
+def bulk_load_marketing(conn, csv_path):
+    """Load marketing performance with COPY and one merge statement"""
+    print("Bulk loading marketing performance...")
+    staging, columns, copied = copy_to_staging(conn, csv_path, 'marketing_performance')
+    column_list = ', '.join(columns)
+    
+    merged = merge_from_staging(conn, staging, f"""
+        INSERT INTO marketing_performance ({column_list})
+        SELECT {column_list} FROM {staging}
+        ON CONFLICT (date, channel, campaign_name) DO UPDATE SET
+            impressions = EXCLUDED.impressions,
+            clicks = EXCLUDED.clicks,
+            sessions = EXCLUDED.sessions,
+            bookings = EXCLUDED.bookings,
+            room_nights = EXCLUDED.room_nights,
+            total_revenue_eur = EXCLUDED.total_revenue_eur,
+            room_revenue_eur = EXCLUDED.room_revenue_eur,
+            marketing_cost_eur = EXCLUDED.marketing_cost_eur,
+            cpc_eur = EXCLUDED.cpc_eur,
+            cpa_eur = EXCLUDED.cpa_eur,
+            roas = EXCLUDED.roas,
+            conversion_rate = EXCLUDED.conversion_rate
+    """)
+    stage_metrics.count_rows(rows_out=merged)
+    print(f"Loaded {merged} marketing performance records ({copied} copied)")
+
+
+@stage_metrics.instrumented()
+def refresh_rollups(conn):
+    """Refresh the dashboard's materialized rollups.
+
+    CONCURRENTLY keeps the old contents readable by the API while the new
+    ones are computed.
+    """
+    with conn.cursor() as cur:
+        for view in ROLLUP_VIEWS:
+            start = time.perf_counter()
+            cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+            conn.commit()
+            cur.execute(f"SELECT COUNT(*) FROM {view}")
+            print(f"Refreshed {view}: {cur.fetchone()[0]} rows in {time.perf_counter() - start:.2f}s")
+
+
+def bump_data_versions(conn, tables):
+    """Increment the data_versions row of each changed table or rollup and NOTIFY.
+
+    The API caches query results per data version, so this must run after
+    the new rows are committed; the NOTIFY is delivered on commit.
+    """
+    if not tables:
+        return {}
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO data_versions (table_name, version)
+            SELECT unnest(%s::text[]), 1
+            ON CONFLICT (table_name) DO UPDATE SET
+                version = data_versions.version + 1,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING table_name, version
+        """, (sorted(tables),))
+        versions = dict(cur.fetchall())
+        cur.execute("SELECT pg_notify(%s, %s)", (DATA_VERSION_CHANNEL, json.dumps(versions)))
+    conn.commit()
+    print(f"Bumped data versions: {', '.join(f'{t}={v}' for t, v in sorted(versions.items()))}")
+    return versions
+
+
+def loaded_tables(fmt='csv'):
+    """Tables a full load replaces: those with an input file, plus the derived rollups"""
+    tables = {table for table, path in data_paths(fmt).items() if os.path.exists(path)}
+    # Lifetime stats are rewritten into guest_profiles whenever bookings load
+    if 'bookings' in tables:
+        tables.add('guest_profiles')
+    return tables | set(ROLLUP_VIEWS)
+
+
+def data_paths(fmt='csv'):
+    """Input file per table under data/, in the given format"""
+    return {table: f'data/{table}.{fmt}' for table in INCREMENTAL_KEYS}
+
+
+# ============================================
+# INCREMENTAL LOADS
+# ============================================
+
+def file_digests(csv_path, prefix_size=0):
+    """Hash a CSV file in one pass.
+
+    Returns (size, sha256 of the file, sha256 of its first prefix_size bytes,
+    data rows). The prefix digest is None if the file is shorter than
+    prefix_size. CSV rows are counted as newlines after the header, which
+    holds for the generated CSVs (no embedded newlines), and are counted in
+    the decompressed stream of a gzip or zstd file; Parquet row counts come
+    from the file footer.
+    """
+    digest = hashlib.sha256()
+    prefix_digest = None
+    size = 0
+    newlines = 0
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(partial(f.read, 1 << 20), b''):
+            if prefix_digest is None and size + len(chunk) >= prefix_size:
+                split = prefix_size - size
+                digest.update(chunk[:split])
+                prefix_digest = digest.copy()
+                digest.update(chunk[split:])
+            else:
+                digest.update(chunk)
+            size += len(chunk)
+            newlines += chunk.count(b'\n')
+    if prefix_digest is None and size == prefix_size:
+        prefix_digest = digest.copy()
+    if csv_path.endswith('.parquet'):
+        rows = import_parquet().ParquetFile(csv_path).metadata.num_rows
+    else:
+        if compressed_io.codec_of(csv_path):
+            with compressed_io.open_file(csv_path, 'rb') as f:
+                newlines = sum(chunk.count(b'\n') for chunk in iter(partial(f.read, 1 << 20), b''))
+        rows = max(newlines - 1, 0)
+    return size, digest.hexdigest(), prefix_digest and prefix_digest.hexdigest(), rows
+
+
+def get_watermark(conn, source):
+    """Return (file_size, file_sha256) from the last load of source, or None"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT file_size, file_sha256 FROM etl_watermarks WHERE source = %s", (source,))
+        return cur.fetchone()
+
+
+def save_watermark(conn, source, table, digests):
+    """Record the loaded file's digest and the table's high-water dates"""
+    size, sha, rows = digests
+    watermark_columns = WATERMARK_COLUMNS.get(table, ())
+    maxima = [None] * 3
+    with conn.cursor() as cur:
+        if watermark_columns:
+            cur.execute(f"SELECT {', '.join(f'MAX({c})' for c in watermark_columns)} FROM {table}")
+            values = dict(zip(watermark_columns, cur.fetchone()))
+            maxima = [values.get(c) for c in ('booking_created_date', 'charge_date', 'date')]
+        cur.execute("""
+            INSERT INTO etl_watermarks (
+                source, file_size, file_sha256, row_count,
+                max_booking_created_date, max_charge_date, max_date, loaded_at
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (source) DO UPDATE SET
+                file_size = EXCLUDED.file_size,
+                file_sha256 = EXCLUDED.file_sha256,
+                row_count = EXCLUDED.row_count,
+                max_booking_created_date = EXCLUDED.max_booking_created_date,
+                max_charge_date = EXCLUDED.max_charge_date,
+                max_date = EXCLUDED.max_date,
+                loaded_at = EXCLUDED.loaded_at
+        """, (source, size, sha, rows, *maxima))
+
+
+def stage_incremental(conn, csv_path, table):
+    """Stage the part of csv_path not yet covered by its watermark.
+
+    If the file is unchanged since the last load, returns None. If a CSV only
+    grew (its old contents still hash to the recorded digest), only the
+    appended rows are copied; otherwise the whole file is staged. Returns
+    (staging table, columns, (size, sha256, rows)).
+    """
+    source = os.path.basename(csv_path)
+    watermark = get_watermark(conn, source)
+    old_size, old_sha = watermark if watermark else (0, None)
+    size, sha, prefix_sha, rows = file_digests(csv_path, old_size)
+    if sha == old_sha:
+        print(f"{csv_path} unchanged since last load ({rows} rows), skipping")
+        return None
+    
+    # A Parquet file is rewritten as a whole (its footer moves), never appended
+    # to; the watermark size of a compressed file is not an offset into its rows
+    grown = old_sha and prefix_sha == old_sha and not csv_path.endswith('.parquet') \
+        and not compressed_io.codec_of(csv_path)
+    start_offset = old_size if grown else 0
+    staging, columns, copied = copy_to_staging(conn, csv_path, table, start_offset)
+    if start_offset:
+        print(f"{csv_path} grew by {size - old_size} bytes, staged {copied} appended rows")
+    else:
+        print(f"Staged {copied} rows from {csv_path}")
+    return staging, columns, (size, sha, rows)
+
+
+def stage_changed_rows(conn, staging, table, compare_columns):
+    """Reduce staged rows to those that are new or differ from table.
+
+    Rows are matched on the table's key and compared on compare_columns.
+    The result goes into a temp table, changed_{table}, which is returned
+    with its row count; staging is dropped.
+    """
+    keys = INCREMENTAL_KEYS[table]
+    changed = f'changed_{table}'
+    on = ' AND '.join(f't.{k} = s.{k}' for k in keys)
+    target_row = ', '.join(f't.{c}' for c in compare_columns)
+    staged_row = ', '.join(f's.{c}' for c in compare_columns)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {changed}")
+        cur.execute(f"""
+            CREATE TEMP TABLE {changed} AS
+            SELECT s.* FROM {staging} s
+            LEFT JOIN {table} t ON {on}
+            WHERE t.{keys[0]} IS NULL OR ({target_row}) IS DISTINCT FROM ({staged_row})
+        """)
+        rows = cur.rowcount
+        cur.execute(f"DROP TABLE {staging}")
+    return changed, rows
+
+
+def upsert_changed_rows(conn, changed, table, columns):
+    """Insert or update table from the changed-rows temp table"""
+    keys = INCREMENTAL_KEYS[table]
+    column_list = ', '.join(columns)
+    updates = ',\n            '.join(f'{c} = EXCLUDED.{c}' for c in columns if c not in keys)
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM {changed}
+            ON CONFLICT ({', '.join(keys)}) DO UPDATE SET
+            {updates}
+        """)
+        return cur.rowcount
+
+
+@stage_metrics.instrumented()
+def refresh_guest_lifetime_stats(conn, guest_ids=None):
+    """Recompute guest lifetime stats in one UPDATE ... FROM (aggregate).
+
+    Only guest_ids are considered (all guests if None), and only rows whose stats actually
+    change are written. Returns the number of guests updated.
+    """
+    if guest_ids is not None and not guest_ids:
+        return 0
+    guest_filter = "WHERE guest_id = ANY(%(guest_ids)s)" if guest_ids is not None else ""
+    booking_filter = "AND guest_id = ANY(%(guest_ids)s)" if guest_ids is not None else ""
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            UPDATE guest_profiles g SET
+                lifetime_bookings = new.lifetime_bookings,
+                lifetime_revenue_eur = new.lifetime_revenue_eur,
+                first_booking_date = new.first_booking_date,
+                most_recent_booking_date = new.most_recent_booking_date,
+                age_at_check_in = new.age_at_check_in,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT
+                    p.guest_id,
+                    COALESCE(stats.bookings, 0) AS lifetime_bookings,
+                    COALESCE(stats.revenue, 0.00) AS lifetime_revenue_eur,
+                    stats.first_booking AS first_booking_date,
+                    stats.last_booking AS most_recent_booking_date,
+                    DATE_PART('year', AGE(stats.first_booking, p.date_of_birth))::INTEGER AS age_at_check_in
+                FROM (SELECT guest_id, date_of_birth FROM guest_profiles {guest_filter}) p
+                LEFT JOIN (
+                    SELECT 
+                        guest_id,
+                        COUNT(*) as bookings,
+                        SUM(net_revenue_eur) as revenue,
+                        MIN(check_in_date) as first_booking,
+                        MAX(check_in_date) as last_booking
+                    FROM bookings
+                    WHERE booking_status = 'Stayed' {booking_filter}
+                    GROUP BY guest_id
+                ) stats ON stats.guest_id = p.guest_id
+            ) new
+            WHERE g.guest_id = new.guest_id
+              AND (g.lifetime_bookings, g.lifetime_revenue_eur, g.first_booking_date,
+                   g.most_recent_booking_date, g.age_at_check_in)
+                  IS DISTINCT FROM
+                  (new.lifetime_bookings, new.lifetime_revenue_eur, new.first_booking_date,
+                   new.most_recent_booking_date, new.age_at_check_in)
+        """, {'guest_ids': list(guest_ids or ())})
+        return cur.rowcount
+
+
+@stage_metrics.instrumented()
+def refresh_daily_occupancy(conn, dates):
+    """Recompute rooms sold, room revenue and the derived rates for the given dates.
+
+    Mirrors generate_data.py: rooms sold counts Stayed bookings over the
+    nights [check-in, check-out), room revenue sums their Room lines on the
+    charge date, and the 'All' row totals the room types. Inventory, weather
+    and out-of-service/blocked counts keep their loaded values.
+    """
+    if not dates:
+        return 0
+    dates = sorted(dates)
+    with conn.cursor() as cur:
+        cur.execute("""
+            WITH days AS (
+                SELECT unnest(%(dates)s::DATE[]) AS date
+            ),
+            stays AS (
+                SELECT room_type, check_in_date, check_out_date
+                FROM bookings
+                WHERE booking_status = 'Stayed'
+                  AND check_in_date <= %(last)s AND check_out_date > %(first)s
+            ),
+            sold AS (
+                SELECT night::DATE AS date, room_type, COUNT(*) AS rooms_sold
+                FROM stays,
+                     generate_series(check_in_date, check_out_date - 1, INTERVAL '1 day') night
+                WHERE night::DATE IN (SELECT date FROM days)
+                GROUP BY 1, 2
+            ),
+            revenue AS (
+                SELECT c.charge_date AS date, b.room_type, SUM(c.line_subtotal_eur) AS room_revenue
+                FROM booking_charges c
+                JOIN bookings b ON b.booking_id = c.booking_id
+                WHERE b.booking_status = 'Stayed' AND c.charge_category = 'Room'
+                  AND c.charge_date IN (SELECT date FROM days)
+                GROUP BY 1, 2
+            ),
+            per_type AS (
+                SELECT o.date, o.room_type,
+                       COALESCE(s.rooms_sold, 0) AS rooms_sold,
+                       COALESCE(r.room_revenue, 0.00) AS room_revenue
+                FROM daily_occupancy o
+                LEFT JOIN sold s ON s.date = o.date AND s.room_type = o.room_type
+                LEFT JOIN revenue r ON r.date = o.date AND r.room_type = o.room_type
+                WHERE o.room_type <> 'All' AND o.date IN (SELECT date FROM days)
+            ),
+            totals AS (
+                SELECT date, room_type, rooms_sold, room_revenue FROM per_type
+                UNION ALL
+                SELECT date, 'All', SUM(rooms_sold), SUM(room_revenue) FROM per_type GROUP BY date
+            )
+            UPDATE daily_occupancy o SET
+                rooms_sold = t.rooms_sold,
+                room_revenue_eur = t.room_revenue,
+                occupancy_pct = CASE WHEN o.total_rooms - o.rooms_out_of_service - o.rooms_blocked > 0
+                    THEN ROUND(t.rooms_sold * 100.0
+                               / (o.total_rooms - o.rooms_out_of_service - o.rooms_blocked), 2)
+                    ELSE 0 END,
+                adr_eur = CASE WHEN t.rooms_sold > 0
+                    THEN ROUND(t.room_revenue / t.rooms_sold, 2) ELSE 0.00 END,
+                revpar_eur = CASE WHEN o.total_rooms - o.rooms_out_of_service - o.rooms_blocked > 0
+                    THEN ROUND(t.room_revenue
+                               / (o.total_rooms - o.rooms_out_of_service - o.rooms_blocked), 2)
+                    ELSE 0.00 END
+            FROM totals t
+            WHERE o.date = t.date AND o.room_type = t.room_type
+        """, {'dates': dates, 'first': dates[0], 'last': dates[-1]})
+        return cur.rowcount
+
+
+@stage_metrics.instrumented(rows_out=None)
+def incremental_load_guest_profiles(conn, csv_path):
+    """Upsert new or changed guests; returns their ids for the stats refresh"""
+    print("Incrementally loading guest profiles...")
+    staged = stage_incremental(conn, csv_path, 'guest_profiles')
+    if staged is None:
+        return set()
+    staging, columns, digests = staged
+    # Lifetime stats are derived from bookings, so the CSV's values are ignored
+    columns = [c for c in columns if c not in GUEST_DERIVED_COLUMNS]
+    changed, rows = stage_changed_rows(conn, staging, 'guest_profiles', columns)
+    upsert_changed_rows(conn, changed, 'guest_profiles', columns)
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT guest_id FROM {changed}")
+        guest_ids = {row[0] for row in cur.fetchall()}
+    save_watermark(conn, os.path.basename(csv_path), 'guest_profiles', digests)
+    conn.commit()
+    stage_metrics.count_rows(rows_out=rows)
+    print(f"Loaded {rows} new or changed guest profiles")
+    return guest_ids
+
+
+@stage_metrics.instrumented(rows_out=None)
+def incremental_load_bookings(conn, csv_path):
+    """Upsert new or changed bookings.
+
+    Returns (guest ids, dates) whose derived aggregates need refreshing,
+    taken from both the old and the new version of every changed booking.
+    """
+    print("Incrementally loading bookings...")
+    staged = stage_incremental(conn, csv_path, 'bookings')
+    if staged is None:
+        return set(), set()
+    staging, columns, digests = staged
+    changed, rows = stage_changed_rows(conn, staging, 'bookings', columns)
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            WITH touched AS (
+                SELECT guest_id, check_in_date, check_out_date FROM {changed}
+                UNION
+                SELECT b.guest_id, b.check_in_date, b.check_out_date
+                FROM bookings b JOIN {changed} c ON c.booking_id = b.booking_id
+            )
+            SELECT guest_id, check_in_date, check_out_date FROM touched
+        """)
+        guest_ids = set()
+        dates = set()
+        for guest_id, check_in, check_out in cur.fetchall():
+            guest_ids.add(guest_id)
+            dates.update(check_in + timedelta(days=n) for n in range((check_out - check_in).days))
+    
+    upsert_changed_rows(conn, changed, 'bookings', columns)
+    save_watermark(conn, os.path.basename(csv_path), 'bookings', digests)
+    conn.commit()
+    stage_metrics.count_rows(rows_out=rows)
+    print(f"Loaded {rows} new or changed bookings "
+          f"({len(guest_ids)} guests, {len(dates)} dates affected)")
+    return guest_ids, dates
+
+
+@stage_metrics.instrumented(rows_out=None)
+def incremental_load_booking_charges(conn, csv_path):
+    """Upsert new or changed charge lines.
+
+    Returns the charge dates, old and new, of every changed line, whose
+    occupancy room revenue needs refreshing.
+    """
+    print("Incrementally loading booking charges...")
+    staged = stage_incremental(conn, csv_path, 'booking_charges')
+    if staged is None:
+        return set()
+    staging, columns, digests = staged
+    changed, rows = stage_changed_rows(conn, staging, 'booking_charges', columns)
+    
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT charge_date FROM {changed}
+            UNION
+            SELECT b.charge_date
+            FROM booking_charges b JOIN {changed} c ON c.line_id = b.line_id
+        """)
+        dates = {row[0] for row in cur.fetchall()}
+        cur.execute(moved_charges_delete(changed))
+    
+    upsert_changed_rows(conn, changed, 'booking_charges', columns)
+    save_watermark(conn, os.path.basename(csv_path), 'booking_charges', digests)
+    conn.commit()
+    stage_metrics.count_rows(rows_out=rows)
+    print(f"Loaded {rows} new or changed booking charge lines ({len(dates)} dates affected)")
+    return dates
+
+
+@stage_metrics.instrumented(name=lambda conn, csv_path, table, label: f'incremental_load_{table}')
+def incremental_load_table(conn, csv_path, table, label):
+    """Upsert the new or changed rows of a CSV with no derived aggregates.
+
+    Returns the number of rows upserted.
+    """
+    print(f"Incrementally loading {label}...")
+    staged = stage_incremental(conn, csv_path, table)
+    if staged is None:
+        return 0
+    staging, columns, digests = staged
+    changed, rows = stage_changed_rows(conn, staging, table, columns)
+    upsert_changed_rows(conn, changed, table, columns)
+    save_watermark(conn, os.path.basename(csv_path), table, digests)
+    conn.commit()
+    print(f"Loaded {rows} new or changed {label} records")
+    return rows
+
+
+def run_incremental(conn, fmt='csv'):
+    """Load only what changed since the last run, then refresh affected aggregates.
+
+    Returns the set of tables whose rows changed; if it is empty the rollups
+    need no refresh.
+    """
+    paths = data_paths(fmt)
+    changed = set()
+    guest_ids = set()
+    dates = set()
+    
+    if os.path.exists(paths['guest_profiles']):
+        guest_ids |= incremental_load_guest_profiles(conn, paths['guest_profiles'])
+    
+    if os.path.exists(paths['bookings']):
+        booking_guests, dates = incremental_load_bookings(conn, paths['bookings'])
+        guest_ids |= booking_guests
+        if booking_guests or dates:
+            changed.add('bookings')
+    
+    if os.path.exists(paths['booking_charges']):
+        charge_dates = incremental_load_booking_charges(conn, paths['booking_charges'])
+        dates |= charge_dates
+        if charge_dates:
+            changed.add('booking_charges')
+    
+    refreshed = refresh_guest_lifetime_stats(conn, guest_ids)
+    conn.commit()
+    print(f"Refreshed lifetime stats for {refreshed} guests")
+    if guest_ids:
+        changed.add('guest_profiles')
+    
+    if os.path.exists(paths['daily_occupancy']):
+        if incremental_load_table(conn, paths['daily_occupancy'], 'daily_occupancy', 'occupancy'):
+            changed.add('daily_occupancy')
+    
+    # After the occupancy CSV, so rows for newly added dates exist to update
+    refreshed = refresh_daily_occupancy(conn, dates)
+    conn.commit()
+    print(f"Refreshed {refreshed} occupancy records for {len(dates)} dates")
+    if refreshed:
+        changed.add('daily_occupancy')
+    
+    if os.path.exists(paths['marketing_performance']):
+        if incremental_load_table(conn, paths['marketing_performance'],
+                                  'marketing_performance', 'marketing performance'):
+            changed.add('marketing_performance')
+    
+    return changed
+
+
+def run_sequential(conn, loaders, fmt='csv'):
+    """Load the fact tables one after another over a single connection"""
+    guest_loader, booking_loader, charge_loader, occupancy_loader, marketing_loader = loaders
+    paths = data_paths(fmt)
+    
+    # Guests first, bookings reference them and charges reference bookings
+    guest_ids = set()
+    if os.path.exists(paths['guest_profiles']):
+        guest_ids |= guest_loader(conn, paths['guest_profiles'])
+    
+    if os.path.exists(paths['bookings']):
+        guest_ids |= booking_loader(conn, paths['bookings'])
+    
+    if os.path.exists(paths['booking_charges']):
+        charge_loader(conn, paths['booking_charges'])
+    
+    # Lifetime stats only for guests whose profile or bookings changed
+    refreshed = refresh_guest_lifetime_stats(conn, guest_ids)
+    conn.commit()
+    print(f"Refreshed lifetime stats for {refreshed} guests")
+    
+    if os.path.exists(paths['daily_occupancy']):
+        occupancy_loader(conn, paths['daily_occupancy'])
+    
+    if os.path.exists(paths['marketing_performance']):
+        marketing_loader(conn, paths['marketing_performance'])
+
+
+# ============================================
+# PARALLEL LOADS
+# ============================================
+
+def plan_csv_partitions(csv_path, parts, key):
+    """Split a CSV file into up to parts byte ranges of whole key groups.
+
+    Each boundary is moved forward to the next row whose key differs from
+    the row before it, so rows sharing a key (a booking's charge lines,
+    which are written contiguously) never straddle two ranges. Returns a
+    list of (start, stop) byte offsets covering every data row.
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        fieldnames = next(csv.reader([f.readline().decode('utf-8')]))
+        key_index = fieldnames.index(key)
+        data_start = f.tell()
+        
+        def row_key(raw):
+            return next(csv.reader([raw.decode('utf-8')]))[key_index]
+        
+        boundaries = [data_start]
+        for part in range(1, parts):
+            target = data_start + (size - data_start) * part // parts
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target)
+            f.readline()  # Finish the row the target landed in
+            first = f.readline()
+            if not first:
+                break
+            current = row_key(first)
+            while True:
+                position = f.tell()
+                raw = f.readline()
+                if not raw or row_key(raw) != current:
+                    break
+            if position >= size:
+                break
+            boundaries.append(position)
+        boundaries.append(size)
+    
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def run_stage_graph(stages, pool, workers):
+    """Run ETL stages concurrently in dependency order.
+
+    stages maps a name to (dependencies, func). func(conn, results) gets a
+    pooled connection and the results of the stages finished so far; its
+    connection is committed afterwards. Returns (results, timings), where
+    timings maps each name to (start, seconds) relative to the run's start.
+    """
+    results = {}
+    timings = {}
+    pending = dict(stages)
+    running = {}
+    run_start = time.perf_counter()
+    
+    def run(name, func):
+        conn = pool.getconn()
+        start = time.perf_counter()
+        try:
+            result = func(conn, results)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            timings[name] = (start - run_start, time.perf_counter() - start)
+            pool.putconn(conn)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            ready = [name for name, (deps, _) in pending.items() if all(d in results for d in deps)]
+            for name in ready:
+                _, func = pending.pop(name)
+                running[executor.submit(run, name, func)] = name
+            if not running:
+                raise ValueError(f"ETL stages with unmet dependencies: {', '.join(sorted(pending))}")
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    # Let running stages finish, but start nothing new
+                    pending.clear()
+                    for other in running:
+                        other.cancel()
+                    raise
+    
+    return results, timings
+
+
+def print_stage_timings(timings, wall_seconds):
+    """Print per-stage timings and how much of the stage time overlapped.
+
+    Concurrent stages compete for CPU and disk, so the stage-time total
+    overstates a sequential run; benchmarks/bench_etl_parallel.py measures
+    the real speedup.
+    """
+    print("\nStage timings:")
+    for name, (start, seconds) in sorted(timings.items(), key=lambda item: item[1][0]):
+        print(f"  {name:<28} start {start:7.2f}s  took {seconds:7.2f}s")
+    stage_seconds = sum(seconds for _, seconds in timings.values())
+    print(f"Wall clock {wall_seconds:.2f}s for {stage_seconds:.2f}s of stage time "
+          f"({stage_seconds / wall_seconds:.2f}x concurrency)")
+
+
+def run_parallel(loaders, workers, fmt='csv'):
+    """Load all CSVs with up to workers concurrent stages.
+
+    Channels come first, then guests, then bookings, then the charge
+    partitions (the FK order); occupancy and marketing load alongside them,
+    and lifetime stats are refreshed once bookings have finished. The
+    dashboard rollups are refreshed last.
+    """
+    guest_loader, booking_loader, charge_loader, occupancy_loader, marketing_loader = loaders
+    paths = data_paths(fmt)
+    
+    stages = {'marketing_channels': ((), lambda conn, results: load_marketing_channels(conn))}
+    if os.path.exists(paths['guest_profiles']):
+        stages['guest_profiles'] = (('marketing_channels',),
+                                    lambda conn, results: guest_loader(conn, paths['guest_profiles']))
+    if os.path.exists(paths['bookings']):
+        def load_bookings_stage(conn, results):
+            guest_ids = booking_loader(conn, paths['bookings'])
+            # Create the charge partitions for the stay dates up front, so the
+            # charge partition stages rarely have to create (and lock) them
+            with conn.cursor() as cur:
+                cur.execute("SELECT MIN(check_in_date), MAX(check_out_date) FROM bookings")
+                ensure_partitions(conn, 'booking_charges', *cur.fetchone())
+            return guest_ids
+        
+        stages['bookings'] = (
+            tuple(dep for dep in ('marketing_channels', 'guest_profiles') if dep in stages),
+            load_bookings_stage
+        )
+    if os.path.exists(paths['booking_charges']):
+        def load_partition(byte_range):
+            return lambda conn, results: charge_loader(
+                conn, paths['booking_charges'], byte_range=byte_range)
+        
+        charge_deps = tuple(dep for dep in ('bookings',) if dep in stages)
+        # Parquet and compressed files are not split by byte offset (a range of
+        # a compressed file can only be reached by decompressing up to it), so
+        # they load as one stage
+        ranges = (plan_csv_partitions(paths['booking_charges'], workers, 'booking_id')
+                  if fmt == 'csv' else [None])
+        for part, byte_range in enumerate(ranges):
+            stages[f'booking_charges[{part}]'] = (charge_deps, load_partition(byte_range))
+    
+    def refresh_stats(conn, results):
+        guest_ids = set(results.get('guest_profiles') or ())
+        guest_ids |= results.get('bookings') or set()
+        refreshed = refresh_guest_lifetime_stats(conn, guest_ids)
+        print(f"Refreshed lifetime stats for {refreshed} guests")
+    
+    stages['guest_lifetime_stats'] = (
+        tuple(dep for dep in ('guest_profiles', 'bookings') if dep in stages), refresh_stats
+    )
+    if os.path.exists(paths['daily_occupancy']):
+        stages['daily_occupancy'] = ((), lambda conn, results: occupancy_loader(conn, paths['daily_occupancy']))
+    if os.path.exists(paths['marketing_performance']):
+        stages['marketing_performance'] = (
+            ('marketing_channels',),
+            lambda conn, results: marketing_loader(conn, paths['marketing_performance'])
+        )
+    # The rollups read every fact table, so they go last
+    stages['rollups'] = (tuple(stages), lambda conn, results: refresh_rollups(conn))
+    
+    pool = ThreadedConnectionPool(1, workers, **DB_CONFIG, connection_factory=CountingConnection)
+    try:
+        start = time.perf_counter()
+        _, timings = run_stage_graph(stages, pool, workers)
+        wall_seconds = time.perf_counter() - start
+        print_stage_timings(timings, wall_seconds)
+    finally:
+        pool.closeall()
+    return wall_seconds
+
+
+def main(argv=None):
     """Main ETL pipeline"""
+    parser = argparse.ArgumentParser(description='Load generated CSV or Parquet data into PostgreSQL')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Load with COPY into unlogged staging tables and merge set-based')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip files unchanged since the last load (see etl_watermarks), '
+                             'load only new or changed rows and refresh the affected guest '
+                             'stats and occupancy dates')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Rows per batch for the row loaders (default: %(default)s)')
+    parser.add_argument('--commit-every-batch', action='store_true',
+                        help='Commit after each batch and record a resume checkpoint, so a '
+                             'failed load restarts after the last committed batch')
+    parser.add_argument('--parallel', type=int, default=0, metavar='N',
+                        help='Run independent loads and N booking charge partitions concurrently '
+                             'on a pool of N connections, and report per-stage timings')
+    parser.add_argument('--format', choices=INPUT_FORMATS, default='csv',
+                        help='Input files to load from data/ (default: %(default)s); csv.gz and '
+                             'csv.zst are decompressed on the fly, parquet streams record '
+                             'batches into COPY and needs --bulk or --incremental')
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.bulk and args.commit_every_batch:
+        parser.error('--commit-every-batch applies to the row loaders, not --bulk')
+    if args.incremental and (args.bulk or args.commit_every_batch):
+        parser.error('--incremental cannot be combined with --bulk or --commit-every-batch')
+    if args.parallel and (args.incremental or args.commit_every_batch):
+        parser.error('--parallel cannot be combined with --incremental or --commit-every-batch')
+    if args.format == 'parquet' and not (args.bulk or args.incremental):
+        parser.error('--format parquet requires --bulk or --incremental')
+    
+    stage_metrics.configure_from_args('etl_pipeline', args)
     print("Starting ETL pipeline...")
     
     # Get the directory where this script is located
@@ -302,6 +1559,27 @@ def main():
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
     
+    if args.bulk:
+        loaders = (bulk_load_guest_profiles, bulk_load_bookings, bulk_load_booking_charges,
+                   bulk_load_occupancy, bulk_load_marketing)
+    else:
+        checkpoint = LoadCheckpoint(CHECKPOINT_PATH) if args.commit_every_batch else None
+        loaders = tuple(
+            partial(loader, batch_size=args.batch_size, checkpoint=checkpoint)
+            for loader in (load_guest_profiles, load_bookings, load_booking_charges,
+                           load_occupancy, load_marketing)
+        )
+    
+    if args.parallel:
+        run_parallel(loaders, args.parallel, args.format)
+        conn = connect_db()
+        try:
+            bump_data_versions(conn, loaded_tables(args.format))
+        finally:
+            conn.close()
+        print("\nETL pipeline completed successfully!")
+        return
+    
     # Connect to database
     conn = connect_db()
     
@@ -309,24 +1587,21 @@ def main():
         # Load dimensions first
         load_marketing_channels(conn)
         
-        # Load fact tables
-        if os.path.exists('data/guest_profiles.csv'):
-            load_guest_profiles(conn, 'data/guest_profiles.csv')
-        
-        if os.path.exists('data/bookings_with_charges.csv'):
-            load_bookings(conn, 'data/bookings_with_charges.csv')
-            # Reload guests to update lifetime stats
-            if os.path.exists('data/guest_profiles.csv'):
-                load_guest_profiles(conn, 'data/guest_profiles.csv')
-        
-        if os.path.exists('data/daily_occupancy.csv'):
-            load_occupancy(conn, 'data/daily_occupancy.csv')
+        if args.incremental:
+            changed = run_incremental(conn, args.format)
+            if changed:
+                refresh_rollups(conn)
+                changed |= {view for view, sources in ROLLUP_SOURCES.items() if changed & sources}
+        else:
+            run_sequential(conn, loaders, args.format)
+            refresh_rollups(conn)
+            changed = loaded_tables(args.format)
         
-        if os.path.exists('data/marketing_performance.csv'):
-            load_marketing(conn, 'data/marketing_performance.csv')
+        # Tell the API's query cache which results are now stale
+        bump_data_versions(conn, changed)
         
         print("\nETL pipeline completed successfully!")
-        
+    
     except Exception as e:
         conn.rollback()
         print(f"Error during ETL: {e}")
@@ -3,11 +3,24 @@ Synthetic Data Generation Script for Hotel Booking Analytics
 Generates realistic data for Livigno hotel with ski resort focus
 """
 
+import argparse
 import csv
+import multiprocessing
+import os
 import random
-from datetime import datetime, timedelta
-from decimal import Decimal
-import uuid
+import shutil
+import sys
+import tempfile
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+import compressed_io
+import stage_cache
+import stage_metrics
 
 # Configuration
 START_DATE = datetime(2024, 12, 1)
@@ -56,6 +69,153 @@ ROOM_DISTRIBUTION = {
     'Premium': 1
 }
 
+PEAK_SEASON_MONTHS = [12, 1, 2, 3]
+
+# Booking and pricing parameters (shared by the Python and NumPy engines)
+BOOKINGS_PER_GUEST = [1, 2, 3, 4]
+BOOKINGS_PER_GUEST_WEIGHTS = [60, 25, 10, 5]
+STAY_LENGTHS = [1, 2, 3, 4, 5, 7, 14]
+STAY_LENGTH_WEIGHTS = [10, 20, 25, 20, 15, 8, 2]
+BOOKING_STATUS_WEIGHTS = [85, 10, 5]  # Most bookings are stayed
+# Campaigns each channel runs per month in the NumPy marketing funnel; the
+# record-by-record funnel (iter_marketing_performance) always runs one
+CAMPAIGNS_PER_CHANNEL = 1
+ROOM_PRICE_BASE = {
+    'Standard': 120,
+    'Deluxe': 180,
+    'Suite': 350,
+    'Family': 200,
+    'Premium': 250
+}
+PEAK_PRICE_MULTIPLIER = (1.2, 1.5)
+OFF_PEAK_PRICE_MULTIPLIER = (0.8, 1.0)
+BOARD_MEALS = {
+    'Room only': [],
+    'B&B': ['Breakfast Buffet'],
+    'Half-board': ['Breakfast Buffet', 'Dinner Buffet'],
+    'Full-board': ['Breakfast Buffet', 'Lunch Buffet', 'Dinner Buffet']
+}
+MEAL_PRICE_RANGE = (15, 45)  # Per guest
+ACTIVITY_CATEGORIES = ['SkiPass', 'EquipmentRental', 'Spa', 'AirportTransfer', 'Other']
+# (low, high, priced per adult)
+ACTIVITY_PRICE_RANGES = {
+    'SkiPass': (40, 80, True),
+    'EquipmentRental': (25, 60, True),
+    'Spa': (80, 200, False),
+    'AirportTransfer': (100, 250, False),
+    'Other': (10, 50, False)
+}
+TAX_RATE = Decimal('0.10')
+# Amounts are carried as integer cents and rounded once per charge line; the
+# tax rate in 1/10000ths keeps the per-line tax in integer arithmetic too
+TAX_RATE_BASIS_POINTS = int(TAX_RATE * 10000)
+
+# Output columns, in CSV order
+GUEST_FIELDS = [
+    'guest_id', 'first_name', 'last_name', 'email', 'date_of_birth', 'gender',
+    'country_of_residence', 'city_of_residence', 'nationality', 'family_status',
+    'primary_purpose_of_stay', 'travel_party_type', 'preferred_room_type',
+    'ski_skill_level', 'email_marketing_opt_in', 'sms_opt_in', 'loyalty_member',
+    'loyalty_tier', 'age_at_check_in', 'lifetime_bookings', 'lifetime_revenue_eur',
+    'first_booking_date', 'most_recent_booking_date'
+]
+# Per-line columns of the NumPy engine, with the booking's fields repeated on
+# each line; written out split into BOOKING_HEADER_FIELDS and CHARGE_FIELDS
+BOOKING_FIELDS = [
+    'line_id', 'booking_id', 'guest_id', 'check_in_date', 'check_out_date',
+    'nights', 'num_guests', 'num_adults', 'num_children', 'room_type',
+    'board_type', 'booking_status', 'booking_channel', 'booking_created_date',
+    'country', 'charge_date', 'charge_category', 'charge_item',
+    'unit_price_eur', 'quantity', 'line_subtotal_eur', 'tax_rate',
+    'line_tax_eur', 'line_total_eur', 'room_revenue_eur', 'fb_revenue_eur',
+    'activities_revenue_eur', 'total_revenue_eur', 'discount_eur', 'net_revenue_eur'
+]
+BOOKING_HEADER_FIELDS = [
+    'booking_id', 'guest_id', 'check_in_date', 'check_out_date', 'nights',
+    'num_guests', 'num_adults', 'num_children', 'room_type', 'board_type',
+    'booking_status', 'booking_channel', 'booking_created_date', 'country',
+    'room_revenue_eur', 'fb_revenue_eur', 'activities_revenue_eur',
+    'total_revenue_eur', 'discount_eur', 'net_revenue_eur'
+]
+CHARGE_FIELDS = [
+    'line_id', 'booking_id', 'charge_date', 'charge_category', 'charge_item',
+    'unit_price_eur', 'quantity', 'line_subtotal_eur', 'tax_rate',
+    'line_tax_eur', 'line_total_eur'
+]
+OCCUPANCY_FIELDS = [
+    'date', 'room_type', 'total_rooms', 'rooms_sold', 'rooms_out_of_service',
+    'rooms_blocked', 'occupancy_pct', 'room_revenue_eur', 'adr_eur', 'revpar_eur',
+    'weather_condition', 'avg_temperature_c', 'snow_depth_cm'
+]
+MARKETING_FIELDS = [
+    'date', 'channel', 'campaign_name', 'impressions', 'clicks', 'sessions',
+    'bookings', 'room_nights', 'total_revenue_eur', 'room_revenue_eur',
+    'marketing_cost_eur', 'cpc_eur', 'cpa_eur', 'roas', 'conversion_rate'
+]
+
+# Generated rows are tuples with one field per output column, in column
+# order, so writers can take them positionally. A booking keeps its header
+# once rather than repeating it on every charge line. BookingHeader and
+# ChargeLine hold typed values, which later stages use as is: dates are
+# datetimes, and decimal columns are integers in units of the column's scale
+# (cents, or 1/10000ths for tax_rate); write_booking formats them.
+GuestProfile = namedtuple('GuestProfile', GUEST_FIELDS)
+BookingHeader = namedtuple('BookingHeader', BOOKING_HEADER_FIELDS)
+ChargeLine = namedtuple('ChargeLine', CHARGE_FIELDS)
+Booking = namedtuple('Booking', ['header', 'lines'])
+BookingRequest = namedtuple('BookingRequest', ['booking_created', 'check_in', 'nights', 'room_type',
+                                               'board_type', 'booking_status', 'booking_channel'])
+OccupancyRecord = namedtuple('OccupancyRecord', OCCUPANCY_FIELDS)
+MarketingRecord = namedtuple('MarketingRecord', MARKETING_FIELDS)
+
+# Output file formats (file extensions); CSV can be gzip or zstd compressed
+# (see compressed_io), parquet needs pyarrow and is written in row groups
+OUTPUT_FORMATS = ['csv'] + compressed_io.COMPRESSED_CSV_FORMATS + ['parquet']
+PARQUET_BATCH_ROWS = 65536
+PARQUET_COMPRESSION = 'zstd'
+# Column types for --format parquet, matching database/schema.sql. Categorical
+# text columns are dictionary encoded; decimals are (precision, scale); any
+# column not listed is plain text.
+DATE_COLUMNS = {
+    'date', 'date_of_birth', 'first_booking_date', 'most_recent_booking_date',
+    'check_in_date', 'check_out_date', 'booking_created_date', 'charge_date'
+}
+INTEGER_COLUMNS = {
+    'age_at_check_in', 'lifetime_bookings', 'nights', 'num_guests', 'num_adults',
+    'num_children', 'total_rooms', 'rooms_sold', 'rooms_out_of_service',
+    'rooms_blocked', 'snow_depth_cm', 'impressions', 'clicks', 'sessions',
+    'bookings', 'room_nights'
+}
+BOOLEAN_COLUMNS = {'email_marketing_opt_in', 'sms_opt_in', 'loyalty_member'}
+CATEGORY_COLUMNS = {
+    'gender', 'country_of_residence', 'city_of_residence', 'nationality',
+    'family_status', 'primary_purpose_of_stay', 'travel_party_type',
+    'preferred_room_type', 'ski_skill_level', 'loyalty_tier', 'room_type',
+    'board_type', 'booking_status', 'booking_channel', 'country',
+    'charge_category', 'charge_item', 'weather_condition', 'channel',
+    'campaign_name'
+}
+DECIMAL_COLUMNS = {
+    'lifetime_revenue_eur': (12, 2), 'room_revenue_eur': (12, 2),
+    'fb_revenue_eur': (12, 2), 'activities_revenue_eur': (12, 2),
+    'total_revenue_eur': (12, 2), 'net_revenue_eur': (12, 2),
+    'discount_eur': (10, 2), 'unit_price_eur': (10, 2), 'quantity': (10, 2),
+    'line_subtotal_eur': (10, 2), 'line_tax_eur': (10, 2),
+    'line_total_eur': (10, 2), 'adr_eur': (10, 2), 'revpar_eur': (10, 2),
+    'marketing_cost_eur': (10, 2), 'cpa_eur': (10, 2), 'cpc_eur': (10, 4),
+    'roas': (10, 4), 'tax_rate': (5, 4), 'conversion_rate': (5, 4),
+    'occupancy_pct': (7, 2), 'avg_temperature_c': (5, 2)
+}
+# Categories of the NumPy engine's integer-coded columns; a code indexes its list
+CHARGE_CATEGORY_NAMES = ['Room', 'F&B'] + ACTIVITY_CATEGORIES
+CHARGE_ITEM_NAMES = ['Room Night'] + sorted({item for meals in BOARD_MEALS.values() for item in meals}) \
+    + [item for category in ACTIVITY_CATEGORIES for item in CHARGE_CATEGORIES[category]]
+COLUMN_CATEGORIES = {
+    'room_type': ROOM_TYPES, 'board_type': BOARD_TYPES, 'booking_status': BOOKING_STATUSES,
+    'booking_channel': BOOKING_CHANNELS, 'channel': BOOKING_CHANNELS,
+    'charge_category': CHARGE_CATEGORY_NAMES, 'charge_item': CHARGE_ITEM_NAMES
+}
+
 
 def generate_guest_id(index):
     """Generate unique guest ID"""
@@ -72,567 +232,1917 @@ def generate_line_id(booking_id, line_num):
     return f"{booking_id}-LINE-{str(line_num).zfill(3)}"
 
 
-def random_date(start, end):
+def to_cents(euros):
+    """Round a non-negative float amount in euros to whole cents, half up"""
+    return int(euros * 100 + 0.5)
+
+
+def divide_rounded(numerator, denominator):
+    """Integer division of numerator by a positive denominator, rounded half away from zero"""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def format_fixed(value, places=2):
+    """Format an integer count of 10**-places units (e.g. cents) as a decimal string.
+
+    Goes through a float, which is exact at this many places for any amount
+    below 2**53 units and much faster than integer digit arithmetic.
+    """
+    return '%.*f' % (places, value / 10 ** places)
+
+
+def parse_cents(value):
+    """Parse a two-decimal amount, as written by format_fixed, back into cents"""
+    return int(value.replace('.', ''))
+
+
+@lru_cache(maxsize=None)
+def shared(value):
+    """value, or an equal value returned before, so repeated dates and amounts share one object"""
+    return value
+
+
+@lru_cache(maxsize=None)
+def money_text(cents):
+    """format_fixed(cents), shared between all charge lines with the same amount"""
+    return format_fixed(cents)
+
+
+@lru_cache(maxsize=None)
+def tax_rate_text(basis_points):
+    """format_fixed(basis_points, 4), shared between all charge lines with the same rate"""
+    return format_fixed(basis_points, 4)
+
+
+@lru_cache(maxsize=None)
+def iso_text(value):
+    """value.isoformat(), shared between all rows with the same date"""
+    return value.isoformat()
+
+
+def random_date(start, end, rng=random):
     """Generate random date between start and end"""
     delta = end - start
-    days = random.randint(0, delta.days)
+    days = rng.randint(0, delta.days)
     return start + timedelta(days=days)
 
 
 def is_peak_season(date):
     """Check if date is in peak season (Dec-Mar for Livigno)"""
-    return date.month in [12, 1, 2, 3]
+    return date.month in PEAK_SEASON_MONTHS
 
 
-def get_weather_for_date(date):
+def get_weather_for_date(date, rng=random):
     """Generate weather based on season"""
     if is_peak_season(date):
         # Winter: more snow
-        weather = random.choices(
+        weather = rng.choices(
             ['Sunny', 'Snow', 'Blizzard', 'Overcast'],
             weights=[30, 40, 10, 20]
         )[0]
-        temp = random.randint(-10, 5)
-        snow_depth = random.randint(20, 150) if weather in ['Snow', 'Blizzard'] else random.randint(10, 80)
+        temp = rng.randint(-10, 5)
+        snow_depth = rng.randint(20, 150) if weather in ['Snow', 'Blizzard'] else rng.randint(10, 80)
     else:
         # Shoulder season
-        weather = random.choices(
+        weather = rng.choices(
             ['Sunny', 'Rain', 'Overcast'],
             weights=[50, 20, 30]
         )[0]
-        temp = random.randint(5, 15)
-        snow_depth = random.randint(0, 30)
+        temp = rng.randint(5, 15)
+        snow_depth = rng.randint(0, 30)
     
     return weather, temp, snow_depth
 
 
-def generate_guest_profiles():
-    """Generate guest profiles dataset"""
-    guests = []
+def iter_guest_profiles(rng=random, first_index=1, last_index=None):
+    """Yield guest profiles one at a time (guest indexes first_index..last_index)"""
+    if last_index is None:
+        last_index = NUM_GUESTS
     
-    for i in range(1, NUM_GUESTS + 1):
+    for i in range(first_index, last_index + 1):
         guest_id = generate_guest_id(i)
-        birth_year = random.randint(1950, 2005)
-        birth_month = random.randint(1, 12)
-        birth_day = random.randint(1, 28)
+        birth_year = rng.randint(1950, 2005)
+        birth_month = rng.randint(1, 12)
+        birth_day = rng.randint(1, 28)
         date_of_birth = datetime(birth_year, birth_month, birth_day).date()
         
-        guest = {
-            'guest_id': guest_id,
-            'first_name': f'Guest{i}',
-            'last_name': f'LastName{random.randint(1, 100)}',
-            'email': f'guest{i}@example.com',
-            'date_of_birth': date_of_birth.isoformat(),
-            'gender': random.choice(GENDERS),
-            'country_of_residence': random.choice(COUNTRIES),
-            'city_of_residence': f'City{random.randint(1, 50)}',
-            'nationality': random.choice(COUNTRIES),
-            'family_status': random.choice(FAMILY_STATUSES),
-            'primary_purpose_of_stay': random.choice(PURPOSE_OF_STAY),
-            'travel_party_type': random.choice(['Friends', 'Family', 'Couple', 'Corporate group']),
-            'preferred_room_type': random.choice(ROOM_TYPES),
-            'ski_skill_level': random.choice(SKI_SKILL_LEVELS),
-            'email_marketing_opt_in': random.choice([True, False]),
-            'sms_opt_in': random.choice([True, False]),
-            'loyalty_member': random.choice([True, False]),
-            'loyalty_tier': random.choice(LOYALTY_TIERS) if random.random() > 0.3 else 'None',
-            'age_at_check_in': None,  # Will be calculated
-            'lifetime_bookings': 0,  # Will be calculated
-            'lifetime_revenue_eur': '0.00',
-            'first_booking_date': None,
-            'most_recent_booking_date': None
-        }
-        guests.append(guest)
+        # Keyword arguments are evaluated in order, so the draws match the CSV order
+        yield GuestProfile(
+            guest_id=guest_id,
+            first_name=f'Guest{i}',
+            last_name=sys.intern(f'LastName{rng.randint(1, 100)}'),
+            email=f'guest{i}@example.com',
+            date_of_birth=iso_text(date_of_birth),
+            gender=rng.choice(GENDERS),
+            country_of_residence=rng.choice(COUNTRIES),
+            city_of_residence=sys.intern(f'City{rng.randint(1, 50)}'),
+            nationality=rng.choice(COUNTRIES),
+            family_status=rng.choice(FAMILY_STATUSES),
+            primary_purpose_of_stay=rng.choice(PURPOSE_OF_STAY),
+            travel_party_type=rng.choice(['Friends', 'Family', 'Couple', 'Corporate group']),
+            preferred_room_type=rng.choice(ROOM_TYPES),
+            ski_skill_level=rng.choice(SKI_SKILL_LEVELS),
+            email_marketing_opt_in=rng.choice([True, False]),
+            sms_opt_in=rng.choice([True, False]),
+            loyalty_member=rng.choice([True, False]),
+            loyalty_tier=rng.choice(LOYALTY_TIERS) if rng.random() > 0.3 else 'None',
+            age_at_check_in=None,  # Will be calculated
+            lifetime_bookings=0,  # Will be calculated
+            lifetime_revenue_eur='0.00',
+            first_booking_date=None,
+            most_recent_booking_date=None
+        )
+
+
+@stage_metrics.instrumented()
+def generate_guest_profiles(rng=random):
+    """Generate guest profiles dataset"""
+    return list(iter_guest_profiles(rng))
+
+
+# ============================================
+# ROOM ALLOCATION
+# ============================================
+
+# Statuses whose bookings hold a room for their nights; cancelled bookings do not
+ROOM_HOLDING_STATUSES = {'Stayed', 'No-show'}
+
+
+def room_fallbacks(room_type):
+    """Room types to offer when room_type is full, in order of preference.
+
+    Upgrades come first, cheapest first, then downgrades, dearest first.
+    """
+    price = ROOM_PRICE_BASE[room_type]
+    others = [rt for rt in ROOM_TYPES if rt != room_type]
+    upgrades = sorted((rt for rt in others if ROOM_PRICE_BASE[rt] >= price), key=ROOM_PRICE_BASE.get)
+    downgrades = sorted((rt for rt in others if ROOM_PRICE_BASE[rt] < price),
+                        key=ROOM_PRICE_BASE.get, reverse=True)
+    return [room_type] + upgrades + downgrades
+
+
+class RoomInventory:
+    """Rooms sold per room type and night, so stays are never overbooked.
+
+    Each room type has a segment tree over the nights of the calendar with
+    range add and range max: checking that a stay fits (its busiest night
+    still has a free room) and reserving it are both O(log nights). capacity
+    maps room type to rooms, ROOM_DISTRIBUTION by default. A hotel-wide tree
+    starts from the rooms out of service or blocked each night, as drawn by
+    draw_unavailable_rooms, so those nights sell fewer rooms in total.
+    """
+    
+    def __init__(self, capacity=None, unavailable=None):
+        self.capacity = dict(ROOM_DISTRIBUTION if capacity is None else capacity)
+        self.num_nights = (END_DATE - START_DATE).days + 1
+        self.size = 1 << (self.num_nights - 1).bit_length()
+        # sold[node] is the busiest night under node; added[node] is the count
+        # added to the node's whole range, which its children do not include
+        self.sold = {room_type: [0] * (2 * self.size) for room_type in ROOM_TYPES}
+        self.added = {room_type: [0] * (2 * self.size) for room_type in ROOM_TYPES}
+        self.hotel_sold = [0] * (2 * self.size)
+        self.hotel_added = [0] * (2 * self.size)
+        if unavailable is not None:
+            for night, (out_of_service, blocked) in enumerate(zip(*unavailable)):
+                self.hotel_sold[self.size + night] = out_of_service + blocked
+                self.hotel_added[self.size + night] = out_of_service + blocked
+            for node in range(self.size - 1, 0, -1):
+                self.hotel_sold[node] = max(self.hotel_sold[2 * node], self.hotel_sold[2 * node + 1])
+        self.reassigned = 0
+        self.rejected = 0
+    
+    def _busiest(self, sold, added, node, low, high, first, last):
+        if last <= low or high <= first:
+            return 0
+        if first <= low and high <= last:
+            return sold[node]
+        middle = (low + high) // 2
+        return added[node] + max(self._busiest(sold, added, 2 * node, low, middle, first, last),
+                                 self._busiest(sold, added, 2 * node + 1, middle, high, first, last))
+    
+    def _add(self, sold, added, node, low, high, first, last):
+        if last <= low or high <= first:
+            return
+        if first <= low and high <= last:
+            sold[node] += 1
+            added[node] += 1
+            return
+        middle = (low + high) // 2
+        self._add(sold, added, 2 * node, low, middle, first, last)
+        self._add(sold, added, 2 * node + 1, middle, high, first, last)
+        sold[node] = added[node] + max(sold[2 * node], sold[2 * node + 1])
+    
+    def rooms_sold(self, room_type, first, last):
+        """Most rooms of room_type sold on any night in [first, last)"""
+        return self._busiest(self.sold[room_type], self.added[room_type], 1, 0, self.size,
+                             first, last)
+    
+    def fits(self, room_type, first, last):
+        """Whether room_type has a free, available room every night in [first, last)"""
+        if self.rooms_sold(room_type, first, last) >= self.capacity.get(room_type, 0):
+            return False
+        # Rooms sold plus rooms out of service or blocked, hotel-wide
+        taken = self._busiest(self.hotel_sold, self.hotel_added, 1, 0, self.size, first, last)
+        return taken < sum(self.capacity.values())
+    
+    def reserve(self, room_type, first, last):
+        """Sell one room_type room for the nights [first, last)"""
+        self._add(self.sold[room_type], self.added[room_type], 1, 0, self.size, first, last)
+        self._add(self.hotel_sold, self.hotel_added, 1, 0, self.size, first, last)
     
-    return guests
+    def allocate(self, room_type, first, last):
+        """Reserve room_type for the nights [first, last), or the first fallback with space.
 
+        Nights are counted in days from START_DATE. Returns the room type
+        reserved, or None if every room type is full on some night of the stay.
+        """
+        for candidate in room_fallbacks(room_type):
+            if self.fits(candidate, first, last):
+                self.reserve(candidate, first, last)
+                if candidate != room_type:
+                    self.reassigned += 1
+                return candidate
+        self.rejected += 1
+        return None
 
-def generate_bookings_with_charges(guests):
-    """Generate bookings and charge line items"""
-    bookings_data = []
-    booking_summaries = {}  # Track booking-level totals
+
+def draw_unavailable_rooms(rng=random):
+    """Draw the rooms out of service and blocked each night, hotel-wide.
+
+    Returns (rooms_out_of_service, rooms_blocked), lists with one count per
+    night of the calendar. They are drawn before any booking so a
+    RoomInventory can keep them off sale, and written to daily occupancy.
+    """
+    rooms_out_of_service = []
+    rooms_blocked = []
+    for _ in range((END_DATE - START_DATE).days + 1):
+        rooms_out_of_service.append(rng.randint(0, 5) if rng.random() < 0.1 else 0)
+        rooms_blocked.append(rng.randint(0, 10) if rng.random() < 0.15 else 0)
+    return rooms_out_of_service, rooms_blocked
+
+
+def report_allocation(reassigned, rejected, num_bookings):
+    """Print how many bookings were moved to another room type or turned away.
+
+    Rejected requests do not use up a booking index, so a full hotel leaves
+    fewer than NUM_BOOKINGS bookings once the guests run out of requests, and
+    the bookings that hold no room (cancellations) are over-represented.
+    Warn on stderr when that happens rather than returning a short dataset
+    silently.
+    """
+    print(f"Allocated rooms: {reassigned} bookings reassigned to another room type, "
+          f"{rejected} rejected (hotel full)")
+    if num_bookings < NUM_BOOKINGS:
+        if rejected:
+            reason = f"{rejected} requests were rejected because the hotel was full; add rooms"
+        else:
+            reason = "the guests ran out of requests; raise NUM_GUESTS"
+        print(f"WARNING: only {num_bookings} of NUM_BOOKINGS={NUM_BOOKINGS} bookings were generated: "
+              f"{reason} or lower NUM_BOOKINGS", file=sys.stderr)
+
+
+def draw_booking_request(rng=random):
+    """Draw what a guest asks for: dates, room type, board, status and channel.
+
+    Returns a BookingRequest, or None if the stay would run past END_DATE.
+    """
+    booking_created = random_date(START_DATE - timedelta(days=90), START_DATE, rng)
+    check_in = random_date(START_DATE, END_DATE - timedelta(days=7), rng)
+    nights = rng.choices(STAY_LENGTHS, weights=STAY_LENGTH_WEIGHTS)[0]
     
-    # Assign some guests multiple bookings
-    guest_booking_counts = {g['guest_id']: random.choices([1, 2, 3, 4], weights=[60, 25, 10, 5])[0] 
-                           for g in guests}
+    if check_in + timedelta(days=nights) > END_DATE:
+        return None
     
-    booking_index = 1
+    # Keyword arguments are evaluated in order, so the draws keep their order
+    return BookingRequest(
+        booking_created=booking_created,
+        check_in=check_in,
+        nights=nights,
+        room_type=rng.choice(ROOM_TYPES),
+        board_type=rng.choice(BOARD_TYPES),
+        booking_status=rng.choices(BOOKING_STATUSES, weights=BOOKING_STATUS_WEIGHTS)[0],
+        booking_channel=rng.choice(BOOKING_CHANNELS)
+    )
+
+
+def allocate_room(request, inventory):
+    """Reserve the room of a stayed or no-show request in inventory.
+
+    Returns the request with the room type actually reserved, or None if no
+    room is free. Other statuses, or no inventory, leave the request as is.
+    """
+    if inventory is None or request.booking_status not in ROOM_HOLDING_STATUSES:
+        return request
+    first_night = (request.check_in - START_DATE).days
+    room_type = inventory.allocate(request.room_type, first_night, first_night + request.nights)
+    if room_type is None:
+        return None
+    return request._replace(room_type=room_type)
+
+
+def build_booking(guest, booking_id, request, rng=random):
+    """Generate a booking and its charge lines for an allocated BookingRequest.
+
+    The party, charge lines and totals are drawn from rng. Line numbers come
+    from a per-booking counter and the booking header, with its revenue
+    totals, is built once the booking's lines are complete, so the cost is
+    proportional to the booking's own lines.
+    """
+    guest_id = guest.guest_id
+    booking_created, check_in, nights, room_type, board_type, booking_status, booking_channel = request
+    check_out = check_in + timedelta(days=nights)
     
-    for guest in guests:
-        guest_id = guest['guest_id']
-        num_bookings = guest_booking_counts[guest_id]
+    max_guests = ROOM_CAPACITY.get(room_type, 2)
+    num_adults = rng.randint(1, max_guests)
+    num_children = rng.randint(0, max(0, max_guests - num_adults))
+    num_guests = num_adults + num_children
+    
+    # Initialize booking totals, in cents
+    summary = {
+        'room_revenue': 0,
+        'fb_revenue': 0,
+        'activities_revenue': 0,
+        'total_revenue': 0,
+        'discount': to_cents(rng.uniform(0, 50)) if rng.random() < 0.2 else 0
+    }
+    
+    lines = []
+    quantity = 1
+    
+    def add_line(charge_date, charge_category, charge_item, unit_price, revenue_key):
+        subtotal = unit_price * quantity
+        # Amounts are non-negative, so + 5000 rounds the tax half up
+        tax = (subtotal * TAX_RATE_BASIS_POINTS + 5000) // 10000
+        total = subtotal + tax
         
-        for _ in range(num_bookings):
-            if booking_index > NUM_BOOKINGS:
-                break
-                
-            booking_id = generate_booking_id(booking_index)
-            booking_created = random_date(START_DATE - timedelta(days=90), START_DATE)
-            check_in = random_date(START_DATE, END_DATE - timedelta(days=7))
-            nights = random.choices([1, 2, 3, 4, 5, 7, 14], weights=[10, 20, 25, 20, 15, 8, 2])[0]
-            check_out = check_in + timedelta(days=nights)
-            
-            if check_out > END_DATE:
-                continue
-            
-            room_type = random.choice(ROOM_TYPES)
-            board_type = random.choice(BOARD_TYPES)
-            booking_status = random.choices(
-                BOOKING_STATUSES,
-                weights=[85, 10, 5]  # Most bookings are stayed
-            )[0]
-            booking_channel = random.choice(BOOKING_CHANNELS)
-            
-            max_guests = ROOM_CAPACITY.get(room_type, 2)
-            num_adults = random.randint(1, max_guests)
-            num_children = random.randint(0, max(0, max_guests - num_adults))
-            num_guests = num_adults + num_children
-            
-            # Initialize booking totals
-            booking_summaries[booking_id] = {
-                'room_revenue': Decimal('0.00'),
-                'fb_revenue': Decimal('0.00'),
-                'activities_revenue': Decimal('0.00'),
-                'total_revenue': Decimal('0.00'),
-                'discount': Decimal(str(random.uniform(0, 50))) if random.random() < 0.2 else Decimal('0.00')
-            }
-            
-            # Generate room charges (one per night)
-            room_price_base = {
-                'Standard': 120,
-                'Deluxe': 180,
-                'Suite': 350,
-                'Family': 200,
-                'Premium': 250
-            }
-            
-            for night in range(nights):
-                charge_date = check_in + timedelta(days=night)
-                line_num = night + 1
-                line_id = generate_line_id(booking_id, line_num)
-                
-                # Room charge
-                base_price = room_price_base[room_type]
-                if is_peak_season(charge_date):
-                    price_multiplier = random.uniform(1.2, 1.5)
-                else:
-                    price_multiplier = random.uniform(0.8, 1.0)
-                
-                unit_price = Decimal(str(base_price * price_multiplier))
-                quantity = Decimal('1.00')
-                subtotal = unit_price * quantity
-                tax_rate = Decimal('0.10')
-                tax = subtotal * tax_rate
-                total = subtotal + tax
-                
-                booking_summaries[booking_id]['room_revenue'] += subtotal
-                booking_summaries[booking_id]['total_revenue'] += total
-                
-                bookings_data.append({
-                    'line_id': line_id,
-                    'booking_id': booking_id,
-                    'guest_id': guest_id,
-                    'check_in_date': check_in.isoformat(),
-                    'check_out_date': check_out.isoformat(),
-                    'nights': nights,
-                    'num_guests': num_guests,
-                    'num_adults': num_adults,
-                    'num_children': num_children,
-                    'room_type': room_type,
-                    'board_type': board_type,
-                    'booking_status': booking_status,
-                    'booking_channel': booking_channel,
-                    'booking_created_date': booking_created.isoformat(),
-                    'country': guest['country_of_residence'],
-                    'charge_date': charge_date.isoformat(),
-                    'charge_category': 'Room',
-                    'charge_item': 'Room Night',
-                    'unit_price_eur': str(unit_price),
-                    'quantity': str(quantity),
-                    'line_subtotal_eur': str(subtotal),
-                    'tax_rate': str(tax_rate),
-                    'line_tax_eur': str(tax),
-                    'line_total_eur': str(total),
-                    'room_revenue_eur': None,  # Will be filled
-                    'fb_revenue_eur': None,
-                    'activities_revenue_eur': None,
-                    'total_revenue_eur': None,
-                    'discount_eur': None,
-                    'net_revenue_eur': None
-                })
+        summary[revenue_key] += subtotal
+        summary['total_revenue'] += total
+        
+        lines.append(ChargeLine(
+            line_id=generate_line_id(booking_id, len(lines) + 1),
+            booking_id=booking_id,
+            charge_date=shared(charge_date),
+            charge_category=charge_category,
+            charge_item=charge_item,
+            unit_price_eur=shared(unit_price),
+            quantity=quantity * 100,
+            line_subtotal_eur=shared(subtotal),
+            tax_rate=TAX_RATE_BASIS_POINTS,
+            line_tax_eur=shared(tax),
+            line_total_eur=shared(total)
+        ))
+    
+    # Generate room charges (one per night)
+    for night in range(nights):
+        charge_date = check_in + timedelta(days=night)
+        
+        # Room charge
+        base_price = ROOM_PRICE_BASE[room_type]
+        if is_peak_season(charge_date):
+            price_multiplier = rng.uniform(*PEAK_PRICE_MULTIPLIER)
+        else:
+            price_multiplier = rng.uniform(*OFF_PEAK_PRICE_MULTIPLIER)
+        
+        unit_price = to_cents(base_price * price_multiplier)
+        add_line(charge_date, 'Room', 'Room Night', unit_price, 'room_revenue')
+    
+    # Generate F&B charges (if board type includes meals)
+    items = BOARD_MEALS[board_type]
+    if items:
+        for night in range(nights):
+            charge_date = check_in + timedelta(days=night)
+            for item in items:
+                unit_price = to_cents(rng.uniform(*MEAL_PRICE_RANGE) * num_guests)
+                add_line(charge_date, 'F&B', item, unit_price, 'fb_revenue')
+    
+    # Generate activity charges (ski-related, spa, etc.)
+    if booking_status == 'Stayed' and is_peak_season(check_in):
+        # Higher probability of ski activities in peak season
+        activity_probability = 0.7
+    else:
+        activity_probability = 0.3
+    
+    if rng.random() < activity_probability:
+        num_activities = rng.randint(1, 5)
+        for _ in range(num_activities):
+            charge_date = random_date(check_in, check_out - timedelta(days=1), rng)
             
-            # Generate F&B charges (if board type includes meals)
-            if board_type in ['B&B', 'Half-board', 'Full-board']:
-                for night in range(nights):
-                    charge_date = check_in + timedelta(days=night)
-                    line_num = len([b for b in bookings_data if b['booking_id'] == booking_id]) + 1
-                    line_id = generate_line_id(booking_id, line_num)
-                    
-                    if board_type == 'B&B':
-                        items = ['Breakfast Buffet']
-                    elif board_type == 'Half-board':
-                        items = ['Breakfast Buffet', 'Dinner Buffet']
-                    else:
-                        items = ['Breakfast Buffet', 'Lunch Buffet', 'Dinner Buffet']
-                    
-                    for item in items:
-                        unit_price = Decimal(str(random.uniform(15, 45) * num_guests))
-                        quantity = Decimal('1.00')
-                        subtotal = unit_price * quantity
-                        tax = subtotal * Decimal('0.10')
-                        total = subtotal + tax
-                        
-                        booking_summaries[booking_id]['fb_revenue'] += subtotal
-                        booking_summaries[booking_id]['total_revenue'] += total
-                        
-                        bookings_data.append({
-                            'line_id': line_id,
-                            'booking_id': booking_id,
-                            'guest_id': guest_id,
-                            'check_in_date': check_in.isoformat(),
-                            'check_out_date': check_out.isoformat(),
-                            'nights': nights,
-                            'num_guests': num_guests,
-                            'num_adults': num_adults,
-                            'num_children': num_children,
-                            'room_type': room_type,
-                            'board_type': board_type,
-                            'booking_status': booking_status,
-                            'booking_channel': booking_channel,
-                            'booking_created_date': booking_created.isoformat(),
-                            'country': guest['country_of_residence'],
-                            'charge_date': charge_date.isoformat(),
-                            'charge_category': 'F&B',
-                            'charge_item': item,
-                            'unit_price_eur': str(unit_price),
-                            'quantity': str(quantity),
-                            'line_subtotal_eur': str(subtotal),
-                            'tax_rate': '0.10',
-                            'line_tax_eur': str(tax),
-                            'line_total_eur': str(total),
-                            'room_revenue_eur': None,
-                            'fb_revenue_eur': None,
-                            'activities_revenue_eur': None,
-                            'total_revenue_eur': None,
-                            'discount_eur': None,
-                            'net_revenue_eur': None
-                        })
-                        line_num += 1
+            category = rng.choice(ACTIVITY_CATEGORIES)
+            charge_item = rng.choice(CHARGE_CATEGORIES[category])
             
-            # Generate activity charges (ski-related, spa, etc.)
-            if booking_status == 'Stayed' and is_peak_season(check_in):
-                # Higher probability of ski activities in peak season
-                activity_probability = 0.7
+            low, high, per_adult = ACTIVITY_PRICE_RANGES[category]
+            if per_adult:
+                unit_price = to_cents(rng.uniform(low, high) * num_adults)
             else:
-                activity_probability = 0.3
-            
-            if random.random() < activity_probability:
-                num_activities = random.randint(1, 5)
-                for _ in range(num_activities):
-                    charge_date = random_date(check_in, check_out - timedelta(days=1))
-                    line_num = len([b for b in bookings_data if b['booking_id'] == booking_id]) + 1
-                    line_id = generate_line_id(booking_id, line_num)
-                    
-                    category = random.choice(['SkiPass', 'EquipmentRental', 'Spa', 'AirportTransfer', 'Other'])
-                    charge_item = random.choice(CHARGE_CATEGORIES[category])
-                    
-                    if category == 'SkiPass':
-                        unit_price = Decimal(str(random.uniform(40, 80) * num_adults))
-                    elif category == 'EquipmentRental':
-                        unit_price = Decimal(str(random.uniform(25, 60) * num_adults))
-                    elif category == 'Spa':
-                        unit_price = Decimal(str(random.uniform(80, 200)))
-                    elif category == 'AirportTransfer':
-                        unit_price = Decimal(str(random.uniform(100, 250)))
-                    else:
-                        unit_price = Decimal(str(random.uniform(10, 50)))
-                    
-                    quantity = Decimal('1.00')
-                    subtotal = unit_price * quantity
-                    tax = subtotal * Decimal('0.10')
-                    total = subtotal + tax
-                    
-                    booking_summaries[booking_id]['activities_revenue'] += subtotal
-                    booking_summaries[booking_id]['total_revenue'] += total
-                    
-                    bookings_data.append({
-                        'line_id': line_id,
-                        'booking_id': booking_id,
-                        'guest_id': guest_id,
-                        'check_in_date': check_in.isoformat(),
-                        'check_out_date': check_out.isoformat(),
-                        'nights': nights,
-                        'num_guests': num_guests,
-                        'num_adults': num_adults,
-                        'num_children': num_children,
-                        'room_type': room_type,
-                        'board_type': board_type,
-                        'booking_status': booking_status,
-                        'booking_channel': booking_channel,
-                        'booking_created_date': booking_created.isoformat(),
-                        'country': guest['country_of_residence'],
-                        'charge_date': charge_date.isoformat(),
-                        'charge_category': category,
-                        'charge_item': charge_item,
-                        'unit_price_eur': str(unit_price),
-                        'quantity': str(quantity),
-                        'line_subtotal_eur': str(subtotal),
-                        'tax_rate': '0.10',
-                        'line_tax_eur': str(tax),
-                        'line_total_eur': str(total),
-                        'room_revenue_eur': None,
-                        'fb_revenue_eur': None,
-                        'activities_revenue_eur': None,
-                        'total_revenue_eur': None,
-                        'discount_eur': None,
-                        'net_revenue_eur': None
-                    })
+                unit_price = to_cents(rng.uniform(low, high))
             
-            booking_index += 1
+            add_line(charge_date, category, charge_item, unit_price, 'activities_revenue')
     
-    # Fill in booking-level summaries
-    for booking_id, summary in booking_summaries.items():
-        for row in bookings_data:
-            if row['booking_id'] == booking_id:
-                row['room_revenue_eur'] = str(summary['room_revenue'])
-                row['fb_revenue_eur'] = str(summary['fb_revenue'])
-                row['activities_revenue_eur'] = str(summary['activities_revenue'])
-                row['total_revenue_eur'] = str(summary['total_revenue'])
-                row['discount_eur'] = str(summary['discount'])
-                row['net_revenue_eur'] = str(summary['total_revenue'] - summary['discount'])
-    
-    return bookings_data
+    header = BookingHeader(
+        booking_id=booking_id,
+        guest_id=guest_id,
+        check_in_date=shared(check_in),
+        check_out_date=shared(check_out),
+        nights=nights,
+        num_guests=num_guests,
+        num_adults=num_adults,
+        num_children=num_children,
+        room_type=room_type,
+        board_type=board_type,
+        booking_status=booking_status,
+        booking_channel=booking_channel,
+        booking_created_date=shared(booking_created),
+        country=guest.country_of_residence,
+        room_revenue_eur=summary['room_revenue'],
+        fb_revenue_eur=summary['fb_revenue'],
+        activities_revenue_eur=summary['activities_revenue'],
+        total_revenue_eur=summary['total_revenue'],
+        discount_eur=summary['discount'],
+        net_revenue_eur=summary['total_revenue'] - summary['discount']
+    )
+    return Booking(header, lines)
 
 
-def generate_daily_occupancy(bookings_data):
-    """Generate daily occupancy from bookings"""
-    occupancy_data = []
-    current_date = START_DATE
+def iter_booking_requests(guests, rng=random, first_index=1, last_index=None, inventory=None):
+    """Yield (booking_index, guest, request) for every request that gets a room.
+
+    Each guest makes a BOOKINGS_PER_GUEST-weighted number of requests.
+    Booking indexes run from first_index and requests stop after last_index
+    (NUM_BOOKINGS by default), though the remaining guests are still
+    consumed. Rooms are allocated from inventory, a RoomInventory over
+    ROOM_DISTRIBUTION by default; stays past END_DATE and stays that do not
+    fit any room type are dropped without using up an index.
+    """
+    if last_index is None:
+        last_index = NUM_BOOKINGS
+    if inventory is None:
+        inventory = RoomInventory()
     
-    # Aggregate bookings by date
-    date_bookings = {}
-    for booking in bookings_data:
-        if booking['booking_status'] != 'Stayed':
+    booking_index = first_index
+    
+    for guest in guests:
+        if booking_index > last_index:
             continue
         
-        # Handle both date (YYYY-MM-DD) and datetime (YYYY-MM-DDTHH:MM:SS) formats
-        check_in_str = booking['check_in_date']
-        check_out_str = booking['check_out_date']
+        # Assign some guests multiple bookings
+        num_bookings = rng.choices(BOOKINGS_PER_GUEST, weights=BOOKINGS_PER_GUEST_WEIGHTS)[0]
         
-        # Parse date, handling both formats
-        if 'T' in check_in_str:
-            check_in = datetime.fromisoformat(check_in_str).date()
-        else:
-            check_in = datetime.strptime(check_in_str, '%Y-%m-%d').date()
-        
-        if 'T' in check_out_str:
-            check_out = datetime.fromisoformat(check_out_str).date()
-        else:
-            check_out = datetime.strptime(check_out_str, '%Y-%m-%d').date()
-        
-        room_type = booking['room_type']
-        
-        date = check_in
-        while date < check_out:
-            if date not in date_bookings:
-                date_bookings[date] = {}
-            if room_type not in date_bookings[date]:
-                date_bookings[date][room_type] = {
-                    'rooms_sold': 0,
-                    'revenue': Decimal('0.00')
-                }
+        for _ in range(num_bookings):
+            if booking_index > last_index:
+                break
             
-            date_bookings[date][room_type]['rooms_sold'] += 1
-            if booking['charge_category'] == 'Room':
-                date_bookings[date][room_type]['revenue'] += Decimal(booking['line_subtotal_eur'])
+            request = draw_booking_request(rng)
+            if request is not None:
+                request = allocate_room(request, inventory)
+            if request is None:
+                continue
             
-            date += timedelta(days=1)
+            yield booking_index, guest, request
+            booking_index += 1
+
+
+def iter_bookings_with_charges(guests, rng=random, first_index=1, last_index=None,
+                               inventory=None):
+    """Yield each Booking (header and charge lines), one booking at a time.
+
+    guests may be any iterable, so profiles can be streamed in as they are
+    generated. Requests come from iter_booking_requests, and each booking is
+    completed from the same rng before the next request is drawn.
+    """
+    requests = iter_booking_requests(guests, rng, first_index, last_index, inventory)
+    for booking_index, guest, request in requests:
+        yield build_booking(guest, generate_booking_id(booking_index), request, rng)
+
+
+@stage_metrics.instrumented(rows_in=True)
+def generate_bookings_with_charges(guests, rng=random, unavailable=None):
+    """Generate bookings with their charge lines, as a list of Booking records.
+
+    unavailable is the (out of service, blocked) schedule from
+    draw_unavailable_rooms to keep off sale; by default every room is for sale.
+    """
+    inventory = RoomInventory(unavailable=unavailable)
+    bookings = list(iter_bookings_with_charges(guests, rng, inventory=inventory))
+    report_allocation(inventory.reassigned, inventory.rejected, len(bookings))
+    return bookings
+
+
+def new_occupancy_index():
+    """Create empty per-room-type stay and revenue arrays over the calendar.
+
+    rooms_sold holds a difference array per room type: +1 on each stay's
+    check-in day and -1 on its check-out day, so a prefix sum gives rooms sold
+    per night. room_revenue holds room charges in cents per room type and
+    charge date.
+    """
+    num_days = (END_DATE - START_DATE).days + 1
+    return {
+        'rooms_sold': {room_type: [0] * (num_days + 1) for room_type in ROOM_TYPES},
+        'room_revenue': {room_type: [0] * num_days for room_type in ROOM_TYPES}
+    }
+
+
+def parse_iso_date(value):
+    """Parse a YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS string into a date"""
+    if 'T' in value:
+        return datetime.fromisoformat(value).date()
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def accumulate_occupancy(occupancy_index, booking):
+    """Add one booking's stay and room charges to the occupancy index"""
+    header = booking.header
+    if header.booking_status != 'Stayed':
+        return
+    
+    num_days = len(occupancy_index['room_revenue'][ROOM_TYPES[0]])
+    room_type = header.room_type
+    
+    # Clamp the stay to the calendar; the index has one spare slot at num_days
+    check_in = max((header.check_in_date - START_DATE).days, 0)
+    check_out = min((header.check_out_date - START_DATE).days, num_days)
+    if check_in < check_out:
+        rooms_sold = occupancy_index['rooms_sold'][room_type]
+        rooms_sold[check_in] += 1
+        rooms_sold[check_out] -= 1
+    
+    room_revenue = occupancy_index['room_revenue'][room_type]
+    for line in booking.lines:
+        if line.charge_category == 'Room':
+            day = (line.charge_date - START_DATE).days
+            if 0 <= day < num_days:
+                room_revenue[day] += line.line_subtotal_eur
+
+
+def merge_occupancy(occupancy_index, other):
+    """Add another occupancy index (e.g. from a shard) into occupancy_index"""
+    for key in ('rooms_sold', 'room_revenue'):
+        for room_type, values in other[key].items():
+            merged = occupancy_index[key][room_type]
+            for day, value in enumerate(values):
+                merged[day] += value
+
+
+def _occupancy_row(date_str, room_type, total_rooms, rooms_sold, rooms_out_of_service,
+                   rooms_blocked, room_revenue, weather, temp, snow_depth):
+    """Build one daily_occupancy record from room_revenue in cents"""
+    available_rooms = total_rooms - rooms_out_of_service - rooms_blocked
+    occupancy_pct = (rooms_sold / available_rooms * 100) if available_rooms > 0 else 0
+    adr = divide_rounded(room_revenue, rooms_sold) if rooms_sold > 0 else 0
+    revpar = divide_rounded(room_revenue, available_rooms) if available_rooms > 0 else 0
+    
+    return OccupancyRecord(
+        date=date_str,
+        room_type=room_type,
+        total_rooms=total_rooms,
+        rooms_sold=rooms_sold,
+        rooms_out_of_service=rooms_out_of_service,
+        rooms_blocked=rooms_blocked,
+        occupancy_pct=f"{occupancy_pct:.2f}",
+        room_revenue_eur=format_fixed(room_revenue),
+        adr_eur=format_fixed(adr),
+        revpar_eur=format_fixed(revpar),
+        weather_condition=weather,
+        avg_temperature_c=str(temp),
+        snow_depth_cm=str(snow_depth)
+    )
+
+
+def iter_daily_occupancy(occupancy_index, rng=random, unavailable=None):
+    """Yield the hotel-wide ('All') and per-room-type occupancy records per day.
+
+    unavailable is the draw_unavailable_rooms schedule the bookings were
+    allocated around; by default no rooms are out of service or blocked.
+    """
+    rooms_sold = {room_type: 0 for room_type in ROOM_TYPES}
+    num_days = (END_DATE - START_DATE).days + 1
+    rooms_out_of_service, rooms_blocked = unavailable or ([0] * num_days, [0] * num_days)
     
-    # Generate occupancy records
     current_date = START_DATE
+    day = 0
     while current_date <= END_DATE:
         date_str = current_date.date().isoformat()
-        weather, temp, snow_depth = get_weather_for_date(current_date)
-        
-        # Overall occupancy
-        total_rooms_sold = sum(
-            sum(rt_data['rooms_sold'] for rt_data in date_data.values())
-            for date_data in date_bookings.values()
-            if date_data
-        ) if current_date.date() in date_bookings else 0
+        weather, temp, snow_depth = get_weather_for_date(current_date, rng)
         
-        rooms_sold_today = sum(
-            rt_data['rooms_sold']
-            for rt_data in date_bookings.get(current_date.date(), {}).values()
-        )
-        
-        rooms_out_of_service = random.randint(0, 5) if random.random() < 0.1 else 0
-        rooms_blocked = random.randint(0, 10) if random.random() < 0.15 else 0
-        available_rooms = TOTAL_ROOMS - rooms_out_of_service - rooms_blocked
+        # Running prefix sum of the difference arrays
+        for room_type in ROOM_TYPES:
+            rooms_sold[room_type] += occupancy_index['rooms_sold'][room_type][day]
+        room_revenue = {
+            room_type: occupancy_index['room_revenue'][room_type][day]
+            for room_type in ROOM_TYPES
+        }
         
-        room_revenue = sum(
-            rt_data['revenue']
-            for rt_data in date_bookings.get(current_date.date(), {}).values()
+        # Out-of-service and blocked rooms are only tracked hotel-wide
+        yield _occupancy_row(
+            date_str, 'All', TOTAL_ROOMS, sum(rooms_sold.values()),
+            rooms_out_of_service[day], rooms_blocked[day], sum(room_revenue.values()),
+            weather, temp, snow_depth
         )
-        
-        occupancy_pct = (rooms_sold_today / available_rooms * 100) if available_rooms > 0 else 0
-        adr = (room_revenue / rooms_sold_today) if rooms_sold_today > 0 else Decimal('0.00')
-        revpar = (room_revenue / available_rooms) if available_rooms > 0 else Decimal('0.00')
-        
-        occupancy_data.append({
-            'date': date_str,
-            'room_type': 'All',
-            'total_rooms': TOTAL_ROOMS,
-            'rooms_sold': rooms_sold_today,
-            'rooms_out_of_service': rooms_out_of_service,
-            'rooms_blocked': rooms_blocked,
-            'occupancy_pct': f"{occupancy_pct:.2f}",
-            'room_revenue_eur': str(room_revenue),
-            'adr_eur': str(adr),
-            'revpar_eur': str(revpar),
-            'weather_condition': weather,
-            'avg_temperature_c': str(temp),
-            'snow_depth_cm': str(snow_depth)
-        })
+        for room_type in ROOM_TYPES:
+            yield _occupancy_row(
+                date_str, room_type, ROOM_DISTRIBUTION[room_type], rooms_sold[room_type],
+                0, 0, room_revenue[room_type], weather, temp, snow_depth
+            )
         
         current_date += timedelta(days=1)
-    
-    return occupancy_data
+        day += 1
 
 
-def generate_marketing_performance(bookings_data):
-    """Generate marketing performance data"""
-    marketing_data = []
-    current_date = START_DATE
+@stage_metrics.instrumented(rows_in=True)
+def generate_daily_occupancy(bookings, rng=random, unavailable=None):
+    """Generate daily occupancy from an iterable of Booking records"""
+    occupancy_index = new_occupancy_index()
+    for booking in bookings:
+        accumulate_occupancy(occupancy_index, booking)
+    return list(iter_daily_occupancy(occupancy_index, rng, unavailable))
+
+
+def accumulate_marketing(channel_performance, booking):
+    """Add one booking to the per-date, per-channel totals"""
+    header = booking.header
+    if header.booking_status != 'Stayed':
+        return
     
-    # Aggregate bookings by date and channel
-    channel_performance = {}
+    check_in = header.check_in_date.date()
+    channel = header.booking_channel
     
-    for booking in bookings_data:
-        if booking['booking_status'] != 'Stayed':
-            continue
-        
-        # Handle both date (YYYY-MM-DD) and datetime (YYYY-MM-DDTHH:MM:SS) formats
-        check_in_str = booking['check_in_date']
-        if 'T' in check_in_str:
-            check_in = datetime.fromisoformat(check_in_str).date()
-        else:
-            check_in = datetime.strptime(check_in_str, '%Y-%m-%d').date()
-        
-        channel = booking['booking_channel']
-        
-        if check_in not in channel_performance:
-            channel_performance[check_in] = {}
-        if channel not in channel_performance[check_in]:
-            channel_performance[check_in][channel] = {
-                'bookings': set(),
-                'room_nights': 0,
-                'revenue': Decimal('0.00')
-            }
-        
-        booking_id = booking['booking_id']
-        channel_performance[check_in][channel]['bookings'].add(booking_id)
-        channel_performance[check_in][channel]['revenue'] += Decimal(booking['line_total_eur'])
+    if check_in not in channel_performance:
+        channel_performance[check_in] = {}
+    if channel not in channel_performance[check_in]:
+        channel_performance[check_in][channel] = {
+            'bookings': 0,
+            'room_nights': 0,
+            'revenue': 0
+        }
     
-    # Generate marketing records
+    perf = channel_performance[check_in][channel]
+    perf['bookings'] += 1
+    perf['room_nights'] += header.nights
+    # The booking total is the sum of its line totals
+    perf['revenue'] += header.total_revenue_eur
+
+
+def marketing_cost_range(channel):
+    """Daily marketing spend range in euros for a channel (higher for paid channels)"""
+    if 'Paid' in channel or 'OTA' in channel or 'Ads' in channel:
+        return 100, 2000
+    if channel in ['Direct-Web', 'Direct-Phone']:
+        return 10, 100
+    return 50, 500
+
+
+def iter_marketing_performance(channel_performance, rng=random):
+    """Yield one marketing record per day and channel from the accumulated totals.
+
+    This is the marketing funnel of the default, streamed and sharded runs;
+    only --engine numpy uses generate_marketing_columnar instead.
+    """
     current_date = START_DATE
     while current_date <= END_DATE:
         date_str = current_date.date().isoformat()
         
         for channel in BOOKING_CHANNELS:
             perf = channel_performance.get(current_date.date(), {}).get(channel, {
-                'bookings': set(),
+                'bookings': 0,
                 'room_nights': 0,
-                'revenue': Decimal('0.00')
+                'revenue': 0
             })
             
-            bookings_count = len(perf['bookings'])
+            bookings_count = perf['bookings']
             room_nights = perf['room_nights']
             revenue = perf['revenue']
             
             # Generate funnel metrics
-            sessions = random.randint(50, 500) if bookings_count > 0 else random.randint(10, 100)
-            clicks = random.randint(int(sessions * 0.3), int(sessions * 0.7))
-            impressions = random.randint(clicks * 2, clicks * 10)
+            sessions = rng.randint(50, 500) if bookings_count > 0 else rng.randint(10, 100)
+            clicks = rng.randint(int(sessions * 0.3), int(sessions * 0.7))
+            impressions = rng.randint(clicks * 2, clicks * 10)
             
-            # Generate costs (higher for paid channels)
-            if 'Paid' in channel or 'OTA' in channel or 'Ads' in channel:
-                marketing_cost = Decimal(str(random.uniform(100, 2000)))
-            elif channel in ['Direct-Web', 'Direct-Phone']:
-                marketing_cost = Decimal(str(random.uniform(10, 100)))
-            else:
-                marketing_cost = Decimal(str(random.uniform(50, 500)))
+            # Generate costs in cents
+            marketing_cost = to_cents(rng.uniform(*marketing_cost_range(channel)))
             
-            cpc = (marketing_cost / clicks) if clicks > 0 else Decimal('0.00')
-            cpa = (marketing_cost / bookings_count) if bookings_count > 0 else Decimal('0.00')
-            roas = (revenue / marketing_cost) if marketing_cost > 0 else Decimal('0.00')
-            conversion_rate = (bookings_count / sessions) if sessions > 0 else Decimal('0.00')
+            # Ratios in 1/10000ths, the scale of their DECIMAL(_, 4) columns
+            cpc = divide_rounded(marketing_cost * 100, clicks) if clicks > 0 else 0
+            cpa = divide_rounded(marketing_cost, bookings_count) if bookings_count > 0 else 0
+            roas = divide_rounded(revenue * 10000, marketing_cost) if marketing_cost > 0 else 0
+            conversion_rate = divide_rounded(bookings_count * 10000, sessions) if sessions > 0 else 0
             
-            marketing_data.append({
-                'date': date_str,
-                'channel': channel,
-                'campaign_name': f'{channel} Campaign {current_date.strftime("%Y-%m")}',
-                'impressions': impressions,
-                'clicks': clicks,
-                'sessions': sessions,
-                'bookings': bookings_count,
-                'room_nights': room_nights,
-                'total_revenue_eur': str(revenue),
-                'room_revenue_eur': str(revenue * Decimal('0.7')),  # Approximate
-                'marketing_cost_eur': str(marketing_cost),
-                'cpc_eur': str(cpc),
-                'cpa_eur': str(cpa),
-                'roas': str(roas),
-                'conversion_rate': str(conversion_rate)
-            })
+            yield MarketingRecord(
+                date=date_str,
+                channel=channel,
+                campaign_name=f'{channel} Campaign {current_date.strftime("%Y-%m")}',
+                impressions=impressions,
+                clicks=clicks,
+                sessions=sessions,
+                bookings=bookings_count,
+                room_nights=room_nights,
+                total_revenue_eur=format_fixed(revenue),
+                room_revenue_eur=format_fixed(divide_rounded(revenue * 7, 10)),  # Approximate
+                marketing_cost_eur=format_fixed(marketing_cost),
+                cpc_eur=format_fixed(cpc, 4),
+                cpa_eur=format_fixed(cpa),
+                roas=format_fixed(roas, 4),
+                conversion_rate=format_fixed(conversion_rate, 4)
+            )
         
         current_date += timedelta(days=1)
+
+
+@stage_metrics.instrumented(rows_in=True)
+def generate_marketing_performance(bookings, rng=random):
+    """Generate marketing performance data from an iterable of Booking records"""
+    # Aggregate bookings by date and channel
+    channel_performance = {}
+    for booking in bookings:
+        accumulate_marketing(channel_performance, booking)
+    return list(iter_marketing_performance(channel_performance, rng))
+
+
+# ============================================
+# NUMPY ENGINE
+# ============================================
+
+def import_numpy():
+    """Import NumPy, which is only needed for --engine numpy"""
+    try:
+        import numpy
+    except ImportError:
+        raise SystemExit("The numpy engine requires NumPy: pip install numpy")
+    return numpy
+
+
+def _weights(np, weights):
+    """Normalize random.choices-style weights into probabilities"""
+    weights = np.asarray(weights, dtype=float)
+    return weights / weights.sum()
+
+
+def _is_peak_season_array(np, days):
+    """Vectorized is_peak_season for a datetime64[D] array"""
+    months = days.astype('datetime64[M]').astype(int) % 12 + 1
+    return np.isin(months, PEAK_SEASON_MONTHS)
+
+
+def _to_cents(np, values):
+    """Vectorized to_cents: round non-negative float euros to int64 cents, half up"""
+    return np.floor(values * 100 + 0.5).astype(np.int64)
+
+
+def _segment_offsets(np, counts):
+    """Return (owner, position) for a repeat of each index by counts.
+
+    owner[i] is the index that produced element i, and position[i] is its
+    0-based position within that index's run.
+    """
+    owner = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(owner)) - starts[owner]
+    return owner, position
+
+
+def _allocate_rooms(inventory, first_night, nights, room_type, holds_room, limit):
+    """Allocate rooms to candidate bookings in order until limit are kept.
+
+    Takes NumPy arrays of night offsets, stay lengths, requested room type
+    codes and whether each candidate holds a room. Returns the indexes of the
+    kept candidates and their room type codes, as lists.
+    """
+    kept = []
+    allocated = []
+    candidates = zip(first_night.tolist(), nights.tolist(), room_type.tolist(), holds_room.tolist())
+    for index, (first, stay, requested, holds) in enumerate(candidates):
+        if len(kept) == limit:
+            break
+        code = requested
+        if holds:
+            reserved = inventory.allocate(ROOM_TYPES[requested], first, first + stay)
+            if reserved is None:
+                continue
+            code = ROOM_TYPES.index(reserved)
+        kept.append(index)
+        allocated.append(code)
+    return kept, allocated
+
+
+@stage_metrics.instrumented(rows_in=True, rows_out=lambda columns: len(columns['line_id']))
+def generate_bookings_columnar(guests, seed=None, unavailable=None):
+    """Generate bookings and charge lines column-wise with NumPy.
+
+    Draws every booking attribute and charge line as arrays for all bookings
+    at once, using the same distributions as draw_booking_request and
+    build_booking (stay length, status and bookings-per-guest weights,
+    peak-season price multipliers, ROOM_CAPACITY limits). Rooms are
+    allocated from a RoomInventory in booking order, the one step that runs
+    per booking, keeping the unavailable rooms (see
+    generate_bookings_with_charges) off sale. Returns a dict of
+    BOOKING_FIELDS columns; amounts are rounded to cents per line and summed
+    as integers.
+    """
+    np = import_numpy()
+    rng = np.random.default_rng(seed)
+    
+    # Candidate bookings, the same per-guest counts as iter_bookings_with_charges
+    per_guest = rng.choice(BOOKINGS_PER_GUEST, size=len(guests),
+                           p=_weights(np, BOOKINGS_PER_GUEST_WEIGHTS))
+    guest_index = np.repeat(np.arange(len(guests)), per_guest)
+    
+    start = np.datetime64(START_DATE.date(), 'D')
+    end = np.datetime64(END_DATE.date(), 'D')
+    last_check_in = (END_DATE - timedelta(days=7) - START_DATE).days
+    check_in = start + rng.integers(0, last_check_in + 1, size=len(guest_index))
+    nights = rng.choice(STAY_LENGTHS, size=len(guest_index), p=_weights(np, STAY_LENGTH_WEIGHTS))
+    
+    # Drop stays that run past END_DATE, then allocate rooms until NUM_BOOKINGS fit
+    in_range = np.flatnonzero(check_in + nights <= end)
+    room_type = rng.integers(0, len(ROOM_TYPES), size=len(in_range))
+    booking_status = rng.choice(len(BOOKING_STATUSES), size=len(in_range),
+                                p=_weights(np, BOOKING_STATUS_WEIGHTS))
+    holds_room = np.isin(booking_status,
+                         [BOOKING_STATUSES.index(status) for status in ROOM_HOLDING_STATUSES])
+    inventory = RoomInventory(unavailable=unavailable)
+    allocated, room_type = _allocate_rooms(inventory, (check_in[in_range] - start).astype(int),
+                                           nights[in_range], room_type, holds_room, NUM_BOOKINGS)
+    report_allocation(inventory.reassigned, inventory.rejected, len(allocated))
+    room_type = np.array(room_type, dtype=np.int64)
+    booking_status = booking_status[allocated]
+    kept = in_range[allocated]
+    guest_index = guest_index[kept]
+    check_in = check_in[kept]
+    nights = nights[kept]
+    check_out = check_in + nights
+    num_bookings = len(kept)
+    
+    booking_created = start - rng.integers(0, 91, size=num_bookings)
+    board_type = rng.integers(0, len(BOARD_TYPES), size=num_bookings)
+    booking_channel = rng.integers(0, len(BOOKING_CHANNELS), size=num_bookings)
+    
+    max_guests = np.array([ROOM_CAPACITY.get(rt, 2) for rt in ROOM_TYPES])[room_type]
+    num_adults = rng.integers(1, max_guests + 1)
+    num_children = rng.integers(0, max_guests - num_adults + 1)
+    num_guests = num_adults + num_children
+    discount = np.where(rng.random(num_bookings) < 0.2,
+                        rng.uniform(0, 50, size=num_bookings), 0.0)
+    
+    item_code = {item: code for code, item in enumerate(CHARGE_ITEM_NAMES)}
+    
+    # Room charges: one per night
+    room_booking, room_night = _segment_offsets(np, nights)
+    room_date = check_in[room_booking] + room_night
+    room_multiplier = np.where(
+        _is_peak_season_array(np, room_date),
+        rng.uniform(*PEAK_PRICE_MULTIPLIER, size=len(room_date)),
+        rng.uniform(*OFF_PEAK_PRICE_MULTIPLIER, size=len(room_date))
+    )
+    base_price = np.array([ROOM_PRICE_BASE[rt] for rt in ROOM_TYPES], dtype=float)
+    room_price = base_price[room_type[room_booking]] * room_multiplier
+    
+    # F&B charges: each board type's meals, every night
+    meals_per_night = np.array([len(BOARD_MEALS[bt]) for bt in BOARD_TYPES])[board_type]
+    fb_booking, fb_position = _segment_offsets(np, nights * meals_per_night)
+    fb_meals = meals_per_night[fb_booking]
+    fb_date = check_in[fb_booking] + fb_position // fb_meals
+    meal_table = np.zeros((len(BOARD_TYPES), max(len(m) for m in BOARD_MEALS.values())), dtype=int)
+    for row, bt in enumerate(BOARD_TYPES):
+        for column, meal in enumerate(BOARD_MEALS[bt]):
+            meal_table[row, column] = item_code[meal]
+    fb_item = meal_table[board_type[fb_booking], fb_position % fb_meals]
+    fb_price = rng.uniform(*MEAL_PRICE_RANGE, size=len(fb_booking)) * num_guests[fb_booking]
+    
+    # Activity charges: higher probability for stayed peak-season bookings
+    activity_probability = np.where(
+        (booking_status == BOOKING_STATUSES.index('Stayed')) & _is_peak_season_array(np, check_in),
+        0.7, 0.3
+    )
+    has_activities = rng.random(num_bookings) < activity_probability
+    num_activities = np.where(has_activities, rng.integers(1, 6, size=num_bookings), 0)
+    act_booking, _ = _segment_offsets(np, num_activities)
+    act_date = check_in[act_booking] + rng.integers(0, nights[act_booking])
+    act_category = rng.integers(0, len(ACTIVITY_CATEGORIES), size=len(act_booking))
+    category_items = [CHARGE_CATEGORIES[category] for category in ACTIVITY_CATEGORIES]
+    items_per_category = np.array([len(c) for c in category_items])
+    item_table = np.zeros((len(category_items), items_per_category.max()), dtype=int)
+    for row, category_list in enumerate(category_items):
+        item_table[row, :len(category_list)] = [item_code[item] for item in category_list]
+    act_item = item_table[act_category,
+                          (rng.random(len(act_booking)) * items_per_category[act_category]).astype(int)]
+    low, high, per_adult = (np.array(values) for values in
+                            zip(*(ACTIVITY_PRICE_RANGES[c] for c in ACTIVITY_CATEGORIES)))
+    act_price = rng.uniform(low[act_category], high[act_category]) \
+        * np.where(per_adult[act_category], num_adults[act_booking], 1)
+    
+    # Assemble the line table: room, F&B then activity lines within each booking
+    line_booking = np.concatenate([room_booking, fb_booking, act_booking])
+    order = np.argsort(line_booking, kind='stable')
+    line_booking = line_booking[order]
+    line_date = np.concatenate([room_date, fb_date, act_date])[order]
+    line_category = np.concatenate([
+        np.zeros(len(room_booking), dtype=int),
+        np.ones(len(fb_booking), dtype=int),
+        act_category + 2
+    ])[order]
+    line_item = np.concatenate([
+        np.full(len(room_booking), item_code['Room Night']), fb_item, act_item
+    ])[order]
+    subtotal = _to_cents(np, np.concatenate([room_price, fb_price, act_price])[order])
+    tax = (subtotal * TAX_RATE_BASIS_POINTS + 5000) // 10000
+    total = subtotal + tax
+    lines_per_booking = np.bincount(line_booking, minlength=num_bookings)
+    _, line_position = _segment_offsets(np, lines_per_booking)
+    
+    # Booking-level summaries, in cents (bincount sums integers exactly in float64)
+    def booking_sum(values, mask=None):
+        weights = values if mask is None else np.where(mask, values, 0)
+        return np.bincount(line_booking, weights=weights, minlength=num_bookings).astype(np.int64)
+    
+    room_revenue = booking_sum(subtotal, line_category == 0)
+    fb_revenue = booking_sum(subtotal, line_category == 1)
+    activities_revenue = booking_sum(subtotal, line_category >= 2)
+    total_revenue = booking_sum(total)
+    discount = _to_cents(np, discount)
+    
+    # Typed columns (see COLUMN_CATEGORIES); booking-level values are
+    # expanded to lines by index, and the writers format them
+    booking_ids = np.array([generate_booking_id(i) for i in range(1, num_bookings + 1)], dtype=object)
+    guest_ids = np.array([g.guest_id for g in guests], dtype=object)[guest_index]
+    countries = np.array([g.country_of_residence for g in guests], dtype=object)[guest_index]
+    line_booking_ids = booking_ids[line_booking].tolist()
+    
+    return {
+        'line_id': [generate_line_id(booking_id, n) for booking_id, n in
+                    zip(line_booking_ids, (line_position + 1).tolist())],
+        'booking_id': line_booking_ids,
+        'guest_id': guest_ids[line_booking].tolist(),
+        'check_in_date': check_in[line_booking],
+        'check_out_date': check_out[line_booking],
+        'nights': nights[line_booking],
+        'num_guests': num_guests[line_booking],
+        'num_adults': num_adults[line_booking],
+        'num_children': num_children[line_booking],
+        'room_type': room_type[line_booking],
+        'board_type': board_type[line_booking],
+        'booking_status': booking_status[line_booking],
+        'booking_channel': booking_channel[line_booking],
+        'booking_created_date': booking_created[line_booking],
+        'country': countries[line_booking].tolist(),
+        'charge_date': line_date,
+        'charge_category': line_category,
+        'charge_item': line_item,
+        'unit_price_eur': subtotal,
+        'quantity': np.full(len(line_booking), 100),
+        'line_subtotal_eur': subtotal,
+        'tax_rate': np.full(len(line_booking), TAX_RATE_BASIS_POINTS),
+        'line_tax_eur': tax,
+        'line_total_eur': total,
+        'room_revenue_eur': room_revenue[line_booking],
+        'fb_revenue_eur': fb_revenue[line_booking],
+        'activities_revenue_eur': activities_revenue[line_booking],
+        'total_revenue_eur': total_revenue[line_booking],
+        'discount_eur': discount[line_booking],
+        'net_revenue_eur': (total_revenue - discount)[line_booking],
+    }
+
+
+def _booking_starts(np, columns):
+    """Index of each booking's first line in per-line columns"""
+    booking_ids = np.asarray(columns['booking_id'])
+    return np.flatnonzero(np.r_[True, booking_ids[1:] != booking_ids[:-1]])
+
+
+def is_typed_column(values):
+    """Whether values is a typed NumPy column (numbers or dates) rather than generated values"""
+    return hasattr(values, 'dtype') and values.dtype.kind in 'iuM'
+
+
+def format_column(name, values):
+    """Format one output column as a list of values for CSV.
+
+    Typed NumPy columns are formatted here, once per distinct value: dates
+    as ISO strings, integer codes as their COLUMN_CATEGORIES entry, and
+    decimals from units of the column's scale. Other columns pass through.
+    """
+    if not is_typed_column(values):
+        return values
+    np = import_numpy()
+    if values.dtype.kind == 'M':
+        if not len(values):
+            return []
+        first = values.min()
+        calendar = np.arange(first, values.max() + 1)
+        labels = np.array(calendar.astype(str), dtype=object)
+        return labels[(values - first).astype(np.int64)].tolist()
+    if name in COLUMN_CATEGORIES:
+        return np.array(COLUMN_CATEGORIES[name], dtype=object)[values].tolist()
+    if name in DECIMAL_COLUMNS:
+        places = DECIMAL_COLUMNS[name][1]
+        distinct, inverse = np.unique(values, return_inverse=True)
+        labels = np.array([format_fixed(value, places) for value in distinct.tolist()], dtype=object)
+        return labels[inverse].tolist()
+    return values.tolist()
+
+
+@stage_metrics.instrumented()
+def occupancy_index_from_columns(columns):
+    """Build the occupancy index (see new_occupancy_index) from typed per-line columns.
+
+    The vectorized equivalent of accumulate_occupancy over every booking.
+    """
+    np = import_numpy()
+    num_days = (END_DATE - START_DATE).days + 1
+    start = np.datetime64(START_DATE.date(), 'D')
+    stayed_code = BOOKING_STATUSES.index('Stayed')
+    
+    # Clamp each stayed booking to the calendar, as accumulate_occupancy does
+    first = _booking_starts(np, columns)
+    stayed = first[columns['booking_status'][first] == stayed_code]
+    room_type = columns['room_type'][stayed]
+    check_in = np.maximum((columns['check_in_date'][stayed] - start).astype(np.int64), 0)
+    check_out = np.minimum((columns['check_out_date'][stayed] - start).astype(np.int64), num_days)
+    in_calendar = check_in < check_out
+    rooms_sold = np.zeros((len(ROOM_TYPES), num_days + 1), dtype=np.int64)
+    np.add.at(rooms_sold, (room_type[in_calendar], check_in[in_calendar]), 1)
+    np.add.at(rooms_sold, (room_type[in_calendar], check_out[in_calendar]), -1)
     
-    return marketing_data
+    room_lines = np.flatnonzero((columns['booking_status'] == stayed_code)
+                                & (columns['charge_category'] == CHARGE_CATEGORY_NAMES.index('Room')))
+    day = (columns['charge_date'][room_lines] - start).astype(np.int64)
+    in_calendar = (day >= 0) & (day < num_days)
+    room_lines = room_lines[in_calendar]
+    room_revenue = np.zeros((len(ROOM_TYPES), num_days), dtype=np.int64)
+    np.add.at(room_revenue, (columns['room_type'][room_lines], day[in_calendar]),
+              columns['line_subtotal_eur'][room_lines])
+    
+    return {
+        'rooms_sold': {rt: rooms_sold[code].tolist() for code, rt in enumerate(ROOM_TYPES)},
+        'room_revenue': {rt: room_revenue[code].tolist() for code, rt in enumerate(ROOM_TYPES)}
+    }
+
+
+def _divide_rounded(np, numerator, denominator):
+    """Vectorized divide_rounded for non-negative numerators, 0 where denominator is 0"""
+    safe = np.where(denominator > 0, denominator, 1)
+    quotient, remainder = np.divmod(numerator, safe)
+    return np.where(denominator > 0, quotient + (remainder * 2 >= safe), 0)
+
+
+@stage_metrics.instrumented()
+def marketing_matrix(columns):
+    """Aggregate stayed bookings into (day, channel, campaign) matrices in one pass.
+
+    Takes the typed per-line columns of generate_bookings_columnar and
+    returns bookings, room nights and revenue in cents (the booking's line
+    totals), each an int64 array of shape (days, len(BOOKING_CHANNELS),
+    CAMPAIGNS_PER_CHANNEL) indexed by check-in day, channel and campaign.
+    Stayed bookings are attributed to their channel's campaigns in turn.
+    """
+    np = import_numpy()
+    num_days = (END_DATE - START_DATE).days + 1
+    first = _booking_starts(np, columns)
+    stayed = first[columns['booking_status'][first] == BOOKING_STATUSES.index('Stayed')]
+    day = (columns['check_in_date'][stayed] - np.datetime64(START_DATE.date(), 'D')).astype(np.int64)
+    channel = columns['booking_channel'][stayed]
+    nights = columns['nights'][stayed]
+    revenue = columns['total_revenue_eur'][stayed]
+    campaign = np.arange(len(stayed)) % CAMPAIGNS_PER_CHANNEL
+    
+    # Stays are inside the calendar, so every cell index is in range
+    shape = (num_days, len(BOOKING_CHANNELS), CAMPAIGNS_PER_CHANNEL)
+    cell = np.ravel_multi_index((day, channel, campaign), shape)
+    
+    def cell_sum(values):
+        totals = np.zeros(num_days * len(BOOKING_CHANNELS) * CAMPAIGNS_PER_CHANNEL, dtype=np.int64)
+        np.add.at(totals, cell, values)
+        return totals.reshape(shape)
+    
+    return {
+        'bookings': cell_sum(1),
+        'room_nights': cell_sum(nights),
+        'revenue': cell_sum(revenue),
+    }
+
+
+@stage_metrics.instrumented(rows_out=lambda columns: len(columns['date']))
+def generate_marketing_columnar(matrix, seed=None):
+    """Simulate the marketing funnel for the whole calendar x channel x campaign grid at once.
+
+    matrix is the output of marketing_matrix. Sessions, clicks, impressions
+    and costs are drawn as arrays with the same distributions as
+    iter_marketing_performance, each campaign with its own budget, and CPC,
+    CPA, ROAS and conversion rate are computed column-wise in integer units.
+    Returns a dict of typed MARKETING_FIELDS columns (as
+    generate_bookings_columnar), one row per day, channel and campaign in
+    date order.
+    """
+    np = import_numpy()
+    rng = np.random.default_rng(None if seed is None else [seed, 1])
+    bookings = matrix['bookings']
+    revenue = matrix['revenue']
+    shape = bookings.shape
+    
+    sessions = np.where(bookings > 0, rng.integers(50, 501, size=shape),
+                        rng.integers(10, 101, size=shape))
+    clicks = rng.integers((sessions * 3) // 10, (sessions * 7) // 10 + 1)
+    impressions = rng.integers(clicks * 2, clicks * 10 + 1)
+    low, high = (np.array(bounds, dtype=float) for bounds in
+                 zip(*(marketing_cost_range(channel) for channel in BOOKING_CHANNELS)))
+    marketing_cost = _to_cents(np, rng.uniform(low[:, None], high[:, None], size=shape))
+    
+    # Ratios in 1/10000ths, the scale of their DECIMAL(_, 4) columns
+    cpc = _divide_rounded(np, marketing_cost * 100, clicks)
+    cpa = _divide_rounded(np, marketing_cost, bookings)
+    roas = _divide_rounded(np, revenue * 10000, marketing_cost)
+    conversion_rate = _divide_rounded(np, bookings * 10000, sessions)
+    
+    days = np.arange(np.datetime64(START_DATE.date(), 'D'), np.datetime64(END_DATE.date(), 'D') + 1)
+    months = days.astype('datetime64[M]')
+    # One campaign keeps the record-by-record funnel's names
+    suffixes = [''] if CAMPAIGNS_PER_CHANNEL == 1 else \
+        [f' #{number}' for number in range(1, CAMPAIGNS_PER_CHANNEL + 1)]
+    campaign = np.array([[[f'{channel} Campaign {month}{suffix}' for suffix in suffixes]
+                          for channel in BOOKING_CHANNELS]
+                         for month in np.unique(months).astype(str)], dtype=object)
+    month_index = np.searchsorted(np.unique(months), months)
+    
+    return {
+        'date': np.repeat(days, len(BOOKING_CHANNELS) * CAMPAIGNS_PER_CHANNEL),
+        'channel': np.tile(np.repeat(np.arange(len(BOOKING_CHANNELS)), CAMPAIGNS_PER_CHANNEL),
+                           len(days)),
+        'campaign_name': campaign[month_index].reshape(-1).tolist(),
+        'impressions': impressions.reshape(-1),
+        'clicks': clicks.reshape(-1),
+        'sessions': sessions.reshape(-1),
+        'bookings': bookings.reshape(-1),
+        'room_nights': matrix['room_nights'].reshape(-1),
+        'total_revenue_eur': revenue.reshape(-1),
+        'room_revenue_eur': _divide_rounded(np, revenue * 7, np.full(shape, 10)).reshape(-1),  # Approximate
+        'marketing_cost_eur': marketing_cost.reshape(-1),
+        'cpc_eur': cpc.reshape(-1),
+        'cpa_eur': cpa.reshape(-1),
+        'roas': roas.reshape(-1),
+        'conversion_rate': conversion_rate.reshape(-1),
+    }
+
+
+def write_columns_csv(filename, columns, fieldnames):
+    """Write a dict of equal-length (typed or formatted) columns to a CSV file"""
+    with compressed_io.open_file(filename, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(zip(*(format_column(name, columns[name]) for name in fieldnames)))
+    count = len(columns[fieldnames[0]])
+    print(f"Generated {filename} with {count} rows")
+    return count
 
 
 def write_csv(filename, data, fieldnames):
-    """Write data to CSV file"""
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    print(f"Generated {filename} with {len(data)} rows")
+    """Write data to CSV file (any iterable of rows with values in fieldnames order)"""
+    count = 0
+    with compressed_io.open_file(filename, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        for row in data:
+            writer.writerow(row)
+            count += 1
+    print(f"Generated {filename} with {count} rows")
+    return count
 
 
-def main():
-    print("Generating synthetic hotel booking data...")
+# ============================================
+# PARQUET OUTPUT
+# ============================================
+
+def import_pyarrow():
+    """Import PyArrow, which is only needed for --format parquet"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet output requires PyArrow: pip install pyarrow")
+    return pyarrow
+
+
+def parquet_schema(pa, fieldnames):
+    """Arrow schema for fieldnames, typed as in database/schema.sql"""
+    fields = []
+    for name in fieldnames:
+        if name in DATE_COLUMNS:
+            column_type = pa.date32()
+        elif name in INTEGER_COLUMNS:
+            column_type = pa.int32()
+        elif name in BOOLEAN_COLUMNS:
+            column_type = pa.bool_()
+        elif name in DECIMAL_COLUMNS:
+            column_type = pa.decimal128(*DECIMAL_COLUMNS[name])
+        elif name in CATEGORY_COLUMNS:
+            column_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            column_type = pa.string()
+        fields.append(pa.field(name, column_type))
+    return pa.schema(fields)
+
+
+def parquet_date(value):
+    """A date column value (date, datetime or ISO string) as a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parse_iso_date(str(value))
+
+
+def parquet_values(name, values):
+    """Convert generated values (typed or strings) to Python values of name's type.
+
+    Integers in decimal columns are in units of the column's scale, as in the
+    typed records. Decimal strings are rounded half away from zero to the
+    column's scale, which is what PostgreSQL does when it loads the same
+    values from CSV.
+    """
+    if name in DATE_COLUMNS:
+        return [parquet_date(v) if v not in (None, '') else None for v in values]
+    if name in INTEGER_COLUMNS:
+        return [int(v) if v not in (None, '') else None for v in values]
+    if name in BOOLEAN_COLUMNS:
+        return [v if isinstance(v, bool) else v == 'True' for v in values]
+    if name in DECIMAL_COLUMNS:
+        scale = DECIMAL_COLUMNS[name][1]
+        unit = Decimal(1).scaleb(-scale)
+        
+        def to_decimal(value):
+            if isinstance(value, int):
+                return Decimal(value).scaleb(-scale)
+            return Decimal(str(value)).quantize(unit, ROUND_HALF_UP)
+        
+        return [to_decimal(v) if v not in (None, '') else None for v in values]
+    return [str(v) if v is not None else None for v in values]
+
+
+def parquet_array(pa, field, values):
+    """Arrow array for field from a typed NumPy column or a list of generated values.
+
+    NumPy columns convert without going through Python objects: integer
+    codes become dictionary indices into COLUMN_CATEGORIES, and decimals,
+    integers in units of the column's scale, become decimal128 buffers.
+    """
+    if is_typed_column(values):
+        if field.name in COLUMN_CATEGORIES:
+            return pa.DictionaryArray.from_arrays(pa.array(values, pa.int32()),
+                                                  pa.array(COLUMN_CATEGORIES[field.name], pa.string()))
+        if pa.types.is_decimal(field.type):
+            # A decimal128 value is a little-endian 128-bit integer count of
+            # 10**-scale: the low word, then the sign extended into the high word
+            np = import_numpy()
+            units = np.asarray(values, dtype=np.int64)
+            words = np.column_stack([units, units >> 63])
+            return pa.Array.from_buffers(field.type, len(units), [None, pa.py_buffer(words.tobytes())])
+        return pa.array(values, field.type)
+    values = parquet_values(field.name, values)
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, pa.string()).dictionary_encode()
+    return pa.array(values, field.type)
+
+
+class ParquetRowWriter:
+    """csv.writer-style writer that buffers rows (values in fieldnames order)
+    into Parquet row groups."""
     
-    # Generate guests
-    print("Generating guest profiles...")
-    guests = generate_guest_profiles()
-    guest_fields = list(guests[0].keys())
-    write_csv('data/guest_profiles.csv', guests, guest_fields)
+    def __init__(self, filename, fieldnames):
+        pa = import_pyarrow()
+        self.pa = pa
+        self.fieldnames = fieldnames
+        self.schema = parquet_schema(pa, fieldnames)
+        self.writer = pa.parquet.ParquetWriter(filename, self.schema,
+                                               compression=PARQUET_COMPRESSION)
+        self.rows = []
     
-    # Generate bookings
-    print("Generating bookings and charges...")
-    bookings = generate_bookings_with_charges(guests)
-    booking_fields = list(bookings[0].keys())
-    write_csv('data/bookings_with_charges.csv', bookings, booking_fields)
+    def writerow(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH_ROWS:
+            self.flush()
+    
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+    
+    def write_columns(self, columns):
+        """Write a dict of equal-length columns as one row group"""
+        arrays = [parquet_array(self.pa, field, columns[field.name]) for field in self.schema]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+    
+    def write_batch(self, batch):
+        """Write an Arrow record batch that already has this writer's schema"""
+        self.writer.write_batch(batch)
     
-    # Generate occupancy
+    def flush(self):
+        if self.rows:
+            self.write_columns(dict(zip(self.fieldnames, zip(*self.rows))))
+            self.rows = []
+    
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+@contextmanager
+def open_writer(filename, fieldnames, fmt='csv', write_header=True):
+    """Open filename for row-at-a-time writing in the given output format.
+
+    Yields a csv.writer, or a ParquetRowWriter with the same interface; rows
+    are sequences (such as the record namedtuples) in fieldnames order.
+    write_header only applies to CSV; headerless CSVs are shard parts.
+    """
+    if fmt == 'parquet':
+        writer = ParquetRowWriter(filename, fieldnames)
+        try:
+            yield writer
+        finally:
+            writer.close()
+        return
+    with compressed_io.open_file(filename, 'w') as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(fieldnames)
+        yield writer
+
+
+@stage_metrics.instrumented(name=lambda filename, *args, **kwargs: f'write {os.path.basename(filename)}')
+def write_rows(filename, data, fieldnames, fmt='csv'):
+    """Write an iterable of rows (values in fieldnames order) as CSV or Parquet"""
+    if fmt != 'parquet':
+        return write_csv(filename, data, fieldnames)
+    count = 0
+    with open_writer(filename, fieldnames, fmt) as writer:
+        for row in data:
+            writer.writerow(row)
+            count += 1
+    print(f"Generated {filename} with {count} rows")
+    return count
+
+
+@stage_metrics.instrumented(name=lambda filename, *args, **kwargs: f'write {os.path.basename(filename)}')
+def write_columns(filename, columns, fieldnames, fmt='csv'):
+    """Write a dict of equal-length columns as CSV or Parquet"""
+    if fmt != 'parquet':
+        return write_columns_csv(filename, columns, fieldnames)
+    count = len(columns[fieldnames[0]])
+    with open_writer(filename, fieldnames, fmt) as writer:
+        for start in range(0, count, PARQUET_BATCH_ROWS):
+            writer.write_columns({name: columns[name][start:start + PARQUET_BATCH_ROWS]
+                                  for name in fieldnames})
+    print(f"Generated {filename} with {count} rows")
+    return count
+
+
+def output_path(name, fmt='csv'):
+    """Path of a generated dataset under data/"""
+    return f'data/{name}.{fmt}'
+
+
+def booking_header_row(header):
+    """Format a typed BookingHeader as its bookings row"""
+    return (
+        header.booking_id, header.guest_id, iso_text(header.check_in_date),
+        iso_text(header.check_out_date), header.nights, header.num_guests, header.num_adults,
+        header.num_children, header.room_type, header.board_type, header.booking_status,
+        header.booking_channel, iso_text(header.booking_created_date), header.country,
+        format_fixed(header.room_revenue_eur), format_fixed(header.fb_revenue_eur),
+        format_fixed(header.activities_revenue_eur), format_fixed(header.total_revenue_eur),
+        format_fixed(header.discount_eur), format_fixed(header.net_revenue_eur)
+    )
+
+
+def charge_line_row(line):
+    """Format a typed ChargeLine as its booking_charges row"""
+    return (
+        line.line_id, line.booking_id, iso_text(line.charge_date), line.charge_category,
+        line.charge_item, money_text(line.unit_price_eur), money_text(line.quantity),
+        money_text(line.line_subtotal_eur), tax_rate_text(line.tax_rate),
+        money_text(line.line_tax_eur), money_text(line.line_total_eur)
+    )
+
+
+def write_booking(booking_writer, charge_writer, booking):
+    """Write a Booking as its bookings row and its booking_charges rows.
+
+    This is the only place the typed records are formatted; Parquet columns
+    are typed, so a ParquetRowWriter takes the records as they are.
+    """
+    if isinstance(booking_writer, ParquetRowWriter):
+        booking_writer.writerow(booking.header)
+        charge_writer.writerows(booking.lines)
+        return
+    booking_writer.writerow(booking_header_row(booking.header))
+    charge_writer.writerows(map(charge_line_row, booking.lines))
+
+
+@stage_metrics.instrumented(rows_out=sum)
+def write_booking_files(booking_filename, charge_filename, bookings, fmt='csv'):
+    """Write Booking records to the bookings and booking_charges files"""
+    num_bookings = 0
+    num_lines = 0
+    with open_writer(booking_filename, BOOKING_HEADER_FIELDS, fmt) as booking_writer, \
+            open_writer(charge_filename, CHARGE_FIELDS, fmt) as charge_writer:
+        for booking in bookings:
+            write_booking(booking_writer, charge_writer, booking)
+            num_bookings += 1
+            num_lines += len(booking.lines)
+    print(f"Generated {booking_filename} with {num_bookings} rows")
+    print(f"Generated {charge_filename} with {num_lines} rows")
+    return num_bookings, num_lines
+
+
+def booking_header_columns(columns):
+    """Take each booking's first line from per-line columns, as bookings.csv columns"""
+    np = import_numpy()
+    first = _booking_starts(np, columns)
+    return {name: np.asarray(columns[name])[first] for name in BOOKING_HEADER_FIELDS}
+
+
+def stream_guests_and_bookings(guest_writer, booking_writer, charge_writer, guests, bookings):
+    """Write guests and their booking lines to open writers as they are generated.
+
+    guests is an iterable of profiles and bookings a function turning an
+    iterable of guests into an iterable of Bookings, such as
+    iter_bookings_with_charges; each guest is written as bookings takes it.
+    Each booking's lines are folded into the occupancy/marketing totals as soon
+    as the booking is complete, so only the current booking and the per-day
+    aggregates are held in memory.
+    Returns (num_guests, num_bookings, num_lines, occupancy_index, channel_performance).
+    """
+    occupancy_index = new_occupancy_index()
+    channel_performance = {}
+    num_guests = 0
+    num_bookings = 0
+    num_lines = 0
+    
+    def written_guests():
+        nonlocal num_guests
+        for guest in guests:
+            guest_writer.writerow(guest)
+            num_guests += 1
+            yield guest
+    
+    for booking in bookings(written_guests()):
+        write_booking(booking_writer, charge_writer, booking)
+        accumulate_occupancy(occupancy_index, booking)
+        accumulate_marketing(channel_performance, booking)
+        num_bookings += 1
+        num_lines += len(booking.lines)
+    
+    return num_guests, num_bookings, num_lines, occupancy_index, channel_performance
+
+
+@stage_metrics.instrumented(rows_out=lambda result: result[0] + result[1])
+def stream_bookings(rng=random, fmt='csv', unavailable=None):
+    """Write guests, bookings and charges to disk as they are generated.
+
+    unavailable is as for generate_bookings_with_charges. Returns
+    (num_guests, num_bookings, occupancy_index, channel_performance).
+    """
+    print("Generating guest profiles, bookings and charges...")
+    inventory = RoomInventory(unavailable=unavailable)
+    with open_writer(output_path('guest_profiles', fmt), GUEST_FIELDS, fmt) as guest_writer, \
+            open_writer(output_path('bookings', fmt), BOOKING_HEADER_FIELDS, fmt) as booking_writer, \
+            open_writer(output_path('booking_charges', fmt), CHARGE_FIELDS, fmt) as charge_writer:
+        num_guests, num_bookings, num_lines, occupancy_index, channel_performance = \
+            stream_guests_and_bookings(
+                guest_writer, booking_writer, charge_writer, iter_guest_profiles(rng),
+                lambda guests: iter_bookings_with_charges(guests, rng, inventory=inventory))
+    report_allocation(inventory.reassigned, inventory.rejected, num_bookings)
+    print(f"Generated {output_path('guest_profiles', fmt)} with {num_guests} rows")
+    print(f"Generated {output_path('bookings', fmt)} with {num_bookings} rows")
+    print(f"Generated {output_path('booking_charges', fmt)} with {num_lines} rows")
+    return num_guests, num_bookings, occupancy_index, channel_performance
+
+
+def write_occupancy(occupancy_index, rng=random, fmt='csv', unavailable=None):
+    """Write daily occupancy from the accumulated occupancy index"""
     print("Generating daily occupancy...")
-    occupancy = generate_daily_occupancy(bookings)
-    occupancy_fields = list(occupancy[0].keys())
-    write_csv('data/daily_occupancy.csv', occupancy, occupancy_fields)
+    write_rows(output_path('daily_occupancy', fmt),
+               iter_daily_occupancy(occupancy_index, rng, unavailable), OCCUPANCY_FIELDS, fmt)
+
+
+def write_marketing(channel_performance, rng=random, fmt='csv'):
+    """Write marketing performance from the accumulated per-date, per-channel totals"""
+    print("Generating marketing performance...")
+    write_rows(output_path('marketing_performance', fmt),
+               iter_marketing_performance(channel_performance, rng), MARKETING_FIELDS, fmt)
+
+
+@stage_metrics.instrumented(rows_out=sum)
+def generate_streaming(rng=random, fmt='csv'):
+    """Generate all four datasets, writing rows to disk as they are produced"""
+    unavailable = draw_unavailable_rooms(rng)
+    num_guests, num_bookings, occupancy_index, channel_performance = \
+        stream_bookings(rng, fmt, unavailable)
+    write_occupancy(occupancy_index, rng, fmt, unavailable)
+    write_marketing(channel_performance, rng, fmt)
+    return num_guests, num_bookings
+
+
+def merge_marketing(channel_performance, other):
+    """Add the marketing totals of one shard into channel_performance"""
+    for date, channels in other.items():
+        merged = channel_performance.setdefault(date, {})
+        for channel, totals in channels.items():
+            if channel not in merged:
+                merged[channel] = {'bookings': 0, 'room_nights': 0, 'revenue': 0}
+            for key in ('bookings', 'room_nights', 'revenue'):
+                merged[channel][key] += totals[key]
+
+
+# A booking request packed for a shard: guest index, booking-created and
+# check-in days from START_DATE, nights, then room type, board, status and
+# channel as indexes into their lists
+PACKED_REQUEST_SIZE = 8
+
+
+def pack_request(guest_index, request):
+    """A guest's BookingRequest as PACKED_REQUEST_SIZE ints"""
+    return (guest_index, (request.booking_created - START_DATE).days,
+            (request.check_in - START_DATE).days, request.nights,
+            ROOM_TYPES.index(request.room_type), BOARD_TYPES.index(request.board_type),
+            BOOKING_STATUSES.index(request.booking_status),
+            BOOKING_CHANNELS.index(request.booking_channel))
+
+
+def unpack_requests(packed):
+    """Yield (guest_index, BookingRequest) from an array of packed requests"""
+    for offset in range(0, len(packed), PACKED_REQUEST_SIZE):
+        guest_index, created, check_in, nights, room_type, board_type, status, channel = \
+            packed[offset:offset + PACKED_REQUEST_SIZE]
+        yield guest_index, BookingRequest(
+            booking_created=START_DATE + timedelta(days=created),
+            check_in=START_DATE + timedelta(days=check_in),
+            nights=nights,
+            room_type=ROOM_TYPES[room_type],
+            board_type=BOARD_TYPES[board_type],
+            booking_status=BOOKING_STATUSES[status],
+            booking_channel=BOOKING_CHANNELS[channel]
+        )
+
+
+def guest_rng(seed, guest_index, stream):
+    """The RNG of one guest's 'profile' or 'bookings' in a sharded run"""
+    return random.Random(f'{seed}:{stream}:{guest_index}')
+
+
+def iter_shard_guests(seed, first_index, last_index):
+    """Yield guest profiles first_index..last_index, each drawn from its own RNG"""
+    for guest_index in range(first_index, last_index + 1):
+        yield from iter_guest_profiles(guest_rng(seed, guest_index, 'profile'),
+                                       guest_index, guest_index)
+
+
+def iter_planned_bookings(guests, first_guest, packed, seed, first_index):
+    """Yield the Booking of each packed request, numbered from first_index.
+
+    guests are the profiles of guest indexes first_guest onwards, and packed
+    holds their requests in guest order (see plan_shards). A guest's
+    bookings draw their party, lines and totals from the guest's own RNG.
+    """
+    requests = unpack_requests(packed)
+    pending = next(requests, None)
+    booking_index = first_index
+    
+    for guest_index, guest in enumerate(guests, first_guest):
+        if pending is None or pending[0] != guest_index:
+            continue
+        rng = guest_rng(seed, guest_index, 'bookings')
+        while pending is not None and pending[0] == guest_index:
+            yield build_booking(guest, generate_booking_id(booking_index), pending[1], rng)
+            booking_index += 1
+            pending = next(requests, None)
+
+
+def shard_path(shard_dir, dataset, shard, fmt='csv'):
+    """Path of one shard's part file of dataset"""
+    return os.path.join(shard_dir, f'{dataset}.{shard}.{fmt}')
+
+
+def plan_shards(num_shards, seed, shard_dir, fmt='csv', inventory=None):
+    """Split guests into num_shards shards, drawing and allocating their bookings up front.
+
+    Each shard gets a contiguous block of guest indexes. Booking requests are
+    drawn in guest order from one RNG and allocated against inventory, the
+    whole hotel (a new RoomInventory by default), as a single stream would,
+    so the shard count changes neither which bookings are made nor the room
+    mix. A shard receives its guests' requests packed into an array of ints
+    and numbers its bookings on from the shards before it, so IDs never
+    collide. Shards are yielded as they are planned: allocation is the only
+    sequential step, and a pool expands one shard while the next is planned.
+    """
+    if inventory is None:
+        inventory = RoomInventory()
+    rng = random.Random(f'{seed}:requests')
+    next_index = 1
+    for shard in range(num_shards):
+        guest_range = (1 + NUM_GUESTS * shard // num_shards, NUM_GUESTS * (shard + 1) // num_shards)
+        first_index = next_index
+        requests = array('i')
+        for booking_index, guest_index, request in iter_booking_requests(
+                range(guest_range[0], guest_range[1] + 1), rng, first_index, inventory=inventory):
+            requests.extend(pack_request(guest_index, request))
+            next_index = booking_index + 1
+        yield {
+            'shard': shard,
+            'seed': seed,
+            'guest_range': guest_range,
+            'first_booking': first_index,
+            'requests': requests,
+            'format': fmt,
+            'guest_path': shard_path(shard_dir, 'guest_profiles', shard, fmt),
+            'booking_path': shard_path(shard_dir, 'bookings', shard, fmt),
+            'charge_path': shard_path(shard_dir, 'booking_charges', shard, fmt),
+        }
+
+
+def generate_shard(shard):
+    """Generate one shard's guests and planned bookings into part files (headerless, for CSV).
+
+    Every guest draws its profile and its bookings from RNGs seeded with the
+    run's seed and the guest's index, so the output does not depend on the
+    shard count. Returns the stream_guests_and_bookings totals.
+    """
+    seed = shard['seed']
+    fmt = shard['format']
+    first_guest, last_guest = shard['guest_range']
+    with open_writer(shard['guest_path'], GUEST_FIELDS, fmt, write_header=False) as guest_writer, \
+            open_writer(shard['booking_path'], BOOKING_HEADER_FIELDS, fmt,
+                        write_header=False) as booking_writer, \
+            open_writer(shard['charge_path'], CHARGE_FIELDS, fmt, write_header=False) as charge_writer:
+        return stream_guests_and_bookings(
+            guest_writer, booking_writer, charge_writer,
+            iter_shard_guests(seed, first_guest, last_guest),
+            lambda guests: iter_planned_bookings(guests, first_guest, shard['requests'], seed,
+                                                 shard['first_booking'])
+        )
+
+
+@stage_metrics.instrumented(name=lambda filename, *args, **kwargs: f'concat {os.path.basename(filename)}')
+def concat_parts(filename, fieldnames, part_paths, fmt='csv'):
+    """Write a CSV header followed by the shard part files, in shard order.
+
+    Parquet parts are copied record batch by record batch into one file.
+    Compressed CSV parts are appended as they are, after the compressed
+    header: a file of concatenated gzip members or zstd frames is valid.
+    """
+    if fmt == 'parquet':
+        pa = import_pyarrow()
+        with open_writer(filename, fieldnames, fmt) as writer:
+            for path in part_paths:
+                for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_ROWS):
+                    writer.write_batch(batch)
+        return
+    with compressed_io.open_file(filename, 'w') as f:
+        csv.writer(f).writerow(fieldnames)
+    with open(filename, 'ab') as f:
+        for path in part_paths:
+            with open(path, 'rb') as part:
+                shutil.copyfileobj(part, f)
+
+
+@stage_metrics.instrumented(rows_out=lambda result: result[0] + result[1])
+def shard_bookings(num_shards, workers, seed, fmt='csv', unavailable=None):
+    """Generate guests and bookings in a process pool, from the shards plan_shards plans.
+
+    Shard outputs are concatenated in shard order and the per-shard totals are
+    merged, so the same seed always produces byte-identical files whatever the
+    number of workers and shards. unavailable is as for
+    generate_bookings_with_charges. Returns (num_guests, num_bookings,
+    occupancy_index, channel_performance).
+    """
+    occupancy_index = new_occupancy_index()
+    channel_performance = {}
+    num_guests = 0
+    num_bookings = 0
+    num_lines = 0
+    inventory = RoomInventory(unavailable=unavailable)
     
-    # Generate marketing
+    print(f"Generating guest profiles, bookings and charges in {num_shards} shards "
+          f"on {workers} workers (seed {seed})...")
+    with tempfile.TemporaryDirectory(dir='data') as shard_dir:
+        shards = plan_shards(num_shards, seed, shard_dir, fmt, inventory)
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap(generate_shard, shards):
+                shard_guests, shard_bookings, shard_lines, shard_occupancy, shard_marketing = result
+                num_guests += shard_guests
+                num_bookings += shard_bookings
+                num_lines += shard_lines
+                merge_occupancy(occupancy_index, shard_occupancy)
+                merge_marketing(channel_performance, shard_marketing)
+        
+        for dataset, fieldnames in [('guest_profiles', GUEST_FIELDS),
+                                    ('bookings', BOOKING_HEADER_FIELDS),
+                                    ('booking_charges', CHARGE_FIELDS)]:
+            concat_parts(output_path(dataset, fmt), fieldnames,
+                         [shard_path(shard_dir, dataset, shard, fmt) for shard in range(num_shards)],
+                         fmt)
+    print(f"Generated {output_path('guest_profiles', fmt)} with {num_guests} rows")
+    print(f"Generated {output_path('bookings', fmt)} with {num_bookings} rows")
+    print(f"Generated {output_path('booking_charges', fmt)} with {num_lines} rows")
+    report_allocation(inventory.reassigned, inventory.rejected, num_bookings)
+    return num_guests, num_bookings, occupancy_index, channel_performance
+
+
+# ============================================
+# CACHED STAGES
+# ============================================
+# Each stage writes its datasets and returns a picklable state for the stages
+# after it: the RNG state to continue from and the booking aggregates. Stage
+# keys fingerprint these functions and everything they reach (see stage_cache),
+# so only stages whose code, constants or upstream stages changed are rerun.
+
+def restored_rng(state):
+    """A random.Random continuing from a getstate() snapshot"""
+    rng = random.Random()
+    rng.setstate(state)
+    return rng
+
+
+@stage_metrics.instrumented()
+def aggregate_bookings(bookings):
+    """Fold Booking records into (occupancy_index, channel_performance)"""
+    occupancy_index = new_occupancy_index()
+    channel_performance = {}
+    for booking in bookings:
+        accumulate_occupancy(occupancy_index, booking)
+        accumulate_marketing(channel_performance, booking)
+    return occupancy_index, channel_performance
+
+
+def guests_stage(seed, fmt):
+    """Generate guest profiles from a fresh seeded RNG"""
+    print("Generating guest profiles...")
+    rng = random.Random(seed)
+    guests = generate_guest_profiles(rng)
+    write_rows(output_path('guest_profiles', fmt), guests, GUEST_FIELDS, fmt)
+    return {'rng': rng.getstate(), 'guests': guests}
+
+
+def bookings_stage(guests, fmt):
+    """Generate bookings and charges record by record for the guests stage's guests"""
+    print("Generating bookings and charges...")
+    rng = restored_rng(guests['rng'])
+    unavailable = draw_unavailable_rooms(rng)
+    bookings = generate_bookings_with_charges(guests['guests'], rng, unavailable)
+    num_bookings, _ = write_booking_files(output_path('bookings', fmt),
+                                          output_path('booking_charges', fmt), bookings, fmt)
+    occupancy_index, channel_performance = aggregate_bookings(bookings)
+    return {'rng': rng.getstate(), 'num_guests': len(guests['guests']), 'num_bookings': num_bookings,
+            'unavailable': unavailable, 'occupancy_index': occupancy_index,
+            'marketing': channel_performance}
+
+
+def columnar_bookings_stage(guests, seed, fmt):
+    """Generate bookings and charges with the NumPy engine, which has its own seeded RNG"""
+    print("Generating bookings and charges...")
+    rng = restored_rng(guests['rng'])
+    unavailable = draw_unavailable_rooms(rng)
+    columns = generate_bookings_columnar(guests['guests'], seed, unavailable)
+    num_bookings = write_columns(output_path('bookings', fmt), booking_header_columns(columns),
+                                 BOOKING_HEADER_FIELDS, fmt)
+    write_columns(output_path('booking_charges', fmt), columns, CHARGE_FIELDS, fmt)
+    return {'rng': rng.getstate(), 'num_guests': len(guests['guests']), 'num_bookings': num_bookings,
+            'unavailable': unavailable, 'occupancy_index': occupancy_index_from_columns(columns),
+            'marketing': marketing_matrix(columns)}
+
+
+def streamed_bookings_stage(seed, fmt):
+    """Generate guests, bookings and charges streaming to disk (see stream_bookings)"""
+    rng = random.Random(seed)
+    unavailable = draw_unavailable_rooms(rng)
+    num_guests, num_bookings, occupancy_index, channel_performance = \
+        stream_bookings(rng, fmt, unavailable)
+    return {'rng': rng.getstate(), 'num_guests': num_guests, 'num_bookings': num_bookings,
+            'unavailable': unavailable, 'occupancy_index': occupancy_index,
+            'marketing': channel_performance}
+
+
+def sharded_bookings_stage(seed, fmt, num_shards=1, workers=1):
+    """Generate guests, bookings and charges in shards (see shard_bookings)"""
+    unavailable = draw_unavailable_rooms(random.Random(f'{seed}:unavailable'))
+    num_guests, num_bookings, occupancy_index, channel_performance = \
+        shard_bookings(num_shards, workers, seed, fmt, unavailable)
+    return {'rng': random.Random(f'{seed}:aggregates').getstate(), 'num_guests': num_guests,
+            'num_bookings': num_bookings, 'unavailable': unavailable,
+            'occupancy_index': occupancy_index, 'marketing': channel_performance}
+
+
+def occupancy_stage(bookings, fmt):
+    """Write daily occupancy, continuing the RNG where the bookings stage left it"""
+    rng = restored_rng(bookings['rng'])
+    write_occupancy(bookings['occupancy_index'], rng, fmt, bookings['unavailable'])
+    return {'rng': rng.getstate()}
+
+
+def marketing_stage(bookings, occupancy, fmt):
+    """Write marketing performance, continuing the RNG where the occupancy stage left it"""
+    write_marketing(bookings['marketing'], restored_rng(occupancy['rng']), fmt)
+    return {}
+
+
+def columnar_marketing_stage(bookings, seed, fmt):
+    """Write marketing performance from the NumPy engine's (day, channel) matrices"""
     print("Generating marketing performance...")
-    marketing = generate_marketing_performance(bookings)
-    marketing_fields = list(marketing[0].keys())
-    write_csv('data/marketing_performance.csv', marketing, marketing_fields)
+    marketing = generate_marketing_columnar(bookings['marketing'], seed)
+    write_columns(output_path('marketing_performance', fmt), marketing, MARKETING_FIELDS, fmt)
+    return {}
+
+
+def run_stage(cache, name, datasets, function, upstream=(), options=None, **config):
+    """Run function(*upstream states, **config, **options) as a cached stage.
+
+    datasets are the names of the files the stage writes. config is part of
+    the stage key; options (worker and shard counts) must not change the output.
+    """
+    key = stage_cache.stage_key(name, config, [function], [stage.key for stage in upstream])
+    outputs = [output_path(dataset, config['fmt']) for dataset in datasets]
+    return cache.run(name, key, outputs,
+                     lambda: function(*[stage.state for stage in upstream], **config, **(options or {})))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic hotel booking data')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write rows to disk as they are generated instead of building '
+                             'each dataset in memory first')
+    parser.add_argument('--seed', type=int,
+                        help='Seed for reproducible output (random if omitted)')
+    parser.add_argument('--workers', type=int,
+                        help='Generate guests and bookings in N worker processes')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='Booking generator: record-per-row Python (default) or '
+                             'column-wise NumPy, which also vectorises the marketing funnel')
+    parser.add_argument('--shards', type=int,
+                        help='Number of shards to split guests into (defaults to --workers); '
+                             'the output does not depend on it')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help='Output file format (default: %(default)s); csv.gz and csv.zst '
+                             'stream compressed CSV, parquet writes typed, compressed columns '
+                             'with dictionary-encoded categoricals')
+    parser.add_argument('--compression-threads', type=int,
+                        help='Threads compressing csv.gz/csv.zst output (default: one per CPU); '
+                             'the output does not depend on it')
+    parser.add_argument('--force', action='store_true',
+                        help='Rerun every stage even if its cached output is current')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Neither reuse nor store stage outputs (the cache is only used '
+                             'with --seed)')
+    parser.add_argument('--cache-dir', default=stage_cache.DEFAULT_CACHE_DIR,
+                        help='Stage cache directory (default: %(default)s)')
+    parser.add_argument('--cache-size', type=int, default=stage_cache.DEFAULT_MAX_MB,
+                        help='Evict least recently used stages above this many MB '
+                             '(default: %(default)s)')
+    stage_metrics.add_arguments(parser)
+    args = parser.parse_args(argv)
+    fmt = args.format
+    if args.engine == 'numpy' and (args.stream or args.workers or args.shards):
+        parser.error('--engine numpy cannot be combined with --stream, --workers or --shards')
+    stage_metrics.configure_from_args('generate_data', args)
+    compressed_io.configure(args.compression_threads)
+    # Unseeded output is never reproduced, so there is nothing to reuse
+    cache = stage_cache.StageCache(args.cache_dir, args.cache_size * 1024 ** 2, force=args.force,
+                                   enabled=args.seed is not None and not args.no_cache)
+    
+    print("Generating synthetic hotel booking data...")
+    
+    seed = args.seed
+    booking_datasets = ['bookings', 'booking_charges']
+    if args.workers or args.shards:
+        workers = args.workers or 1
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        bookings = run_stage(cache, 'bookings', ['guest_profiles'] + booking_datasets,
+                             sharded_bookings_stage,
+                             options={'num_shards': args.shards or workers, 'workers': workers},
+                             seed=seed, fmt=fmt)
+    elif args.stream:
+        bookings = run_stage(cache, 'bookings', ['guest_profiles'] + booking_datasets,
+                             streamed_bookings_stage, seed=seed, fmt=fmt)
+    else:
+        guests = run_stage(cache, 'guests', ['guest_profiles'], guests_stage, seed=seed, fmt=fmt)
+        if args.engine == 'numpy':
+            bookings = run_stage(cache, 'bookings', booking_datasets, columnar_bookings_stage,
+                                 [guests], seed=seed, fmt=fmt)
+        else:
+            bookings = run_stage(cache, 'bookings', booking_datasets, bookings_stage, [guests], fmt=fmt)
+    
+    occupancy = run_stage(cache, 'occupancy', ['daily_occupancy'], occupancy_stage, [bookings], fmt=fmt)
+    if args.engine == 'numpy':
+        run_stage(cache, 'marketing', ['marketing_performance'], columnar_marketing_stage,
+                  [bookings], seed=seed, fmt=fmt)
+    else:
+        run_stage(cache, 'marketing', ['marketing_performance'], marketing_stage,
+                  [bookings, occupancy], fmt=fmt)
+    cache.report()
     
     print("\nData generation complete!")
-    print(f"Generated {len(guests)} guests, {len(set(b['booking_id'] for b in bookings))} bookings")
+    print(f"Generated {bookings.state['num_guests']} guests, {bookings.state['num_bookings']} bookings")
 
 
 if __name__ == '__main__':
-    import os
     # Get the directory where this script is located
     script_dir = os.path.dirname(os.path.abspath(__file__))
     # Get the project root (parent of scripts directory)
@@ -0,0 +1,228 @@
+"""
+Content-addressed cache of generator stage outputs
+A stage's key is a hash of its configuration (seed, format), the source of
+the functions that compute it together with every module-level function and
+constant they reach (calendar, row counts, price tables...), and the keys of
+the stages it reads from, so a stage is recomputed only when something it
+depends on changed. An entry holds the stage's output files, hard-linked
+where the filesystem allows, and a pickled state for the stages after it
+(RNG state, aggregates). Entries are evicted least recently used once the
+cache grows past its size limit.
+"""
+
+import ast
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sys
+import textwrap
+
+# Bump to invalidate every entry written by an older layout
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join('data', '.stage_cache')
+DEFAULT_MAX_MB = 10240
+STATE_FILE = 'state.pickle'
+
+
+def canonical(value):
+    """A JSON-stable form of a constant: containers element-wise, sets sorted, the rest by repr"""
+    if isinstance(value, dict):
+        return [[repr(key), canonical(item)] for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(item) for item in value)
+    return repr(value)
+
+
+def code_fingerprint(functions):
+    """Hash the source of functions and of everything they reference in their module.
+
+    Module-level functions and classes named in a function's source are
+    followed transitively, and the current value of every module-level
+    constant they name is recorded, so editing a stage's code or constants,
+    or overriding a constant at run time, changes the fingerprint.
+    """
+    sources = {}
+    constants = {}
+    pending = list(functions)
+    while pending:
+        function = inspect.unwrap(pending.pop())
+        module = sys.modules[function.__module__]
+        name = f'{module.__name__}.{function.__qualname__}'
+        if name in sources:
+            continue
+        try:
+            source = inspect.getsource(function)
+        except (OSError, TypeError):
+            # namedtuple record types have no source of their own
+            sources[name] = repr(getattr(function, '_fields', function))
+            continue
+        sources[name] = hashlib.sha256(source.encode()).hexdigest()
+        for node in ast.walk(ast.parse(textwrap.dedent(source))):
+            if not isinstance(node, ast.Name) or node.id not in vars(module):
+                continue
+            value = vars(module)[node.id]
+            if inspect.ismodule(value):
+                continue
+            if callable(value):
+                if getattr(value, '__module__', None) == module.__name__:
+                    pending.append(value)
+                continue
+            constants[f'{module.__name__}.{node.id}'] = canonical(value)
+    return {'source': sources, 'constants': constants}
+
+
+def stage_key(name, config, functions=(), upstream=()):
+    """Hex key of a stage from its configuration, its code and upstream keys.
+
+    config is any JSON-like value (values JSON cannot encode are keyed by
+    their repr); functions are the stage's entry points, fingerprinted with
+    code_fingerprint; upstream are the keys of the stages it reads from.
+    """
+    payload = {
+        'version': CACHE_VERSION,
+        'stage': name,
+        'config': config,
+        'code': code_fingerprint(functions),
+        'upstream': list(upstream),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def link_or_copy(source, target):
+    """Make target the same file as source (a hard link, or a copy across filesystems).
+
+    target is replaced atomically, so it is never seen half written. A target
+    that already is source (linked by an earlier cache hit) is left alone:
+    renaming a link over another link to the same file does nothing.
+    """
+    if os.path.exists(target) and os.path.samefile(source, target):
+        return
+    temporary = f'{target}.{os.getpid()}.tmp'
+    try:
+        try:
+            os.link(source, temporary)
+        except OSError:
+            shutil.copyfile(source, temporary)
+        os.replace(temporary, target)
+    finally:
+        remove_file(temporary)
+
+
+def remove_file(path):
+    """Remove path if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class StageResult:
+    """A stage's key and the state it left for later stages, unpickled on first use"""
+    
+    def __init__(self, key, state=None, state_path=None):
+        self.key = key
+        self._state = state
+        self._state_path = state_path
+    
+    @property
+    def state(self):
+        if self._state is None and self._state_path:
+            with open(self._state_path, 'rb') as f:
+                self._state = pickle.load(f)
+        return self._state
+
+
+class StageCache:
+    """Run generator stages, reusing the outputs of stages whose key is cached.
+
+    With enabled=False every stage runs and nothing is stored; force=True
+    runs every stage but still refreshes the cache.
+    """
+    
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 ** 2,
+                 force=False, enabled=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.force = force
+        self.enabled = enabled
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+    
+    def run(self, name, key, outputs, compute):
+        """Reuse the cached outputs of stage key, or run compute() and cache them.
+
+        outputs are the files the stage writes; compute() writes them and
+        returns the (picklable) state later stages need. Returns a StageResult.
+        """
+        entry = os.path.join(self.directory, key)
+        self.used.add(key)
+        if self.enabled and not self.force and os.path.exists(os.path.join(entry, STATE_FILE)):
+            for path in outputs:
+                link_or_copy(os.path.join(entry, os.path.basename(path)), path)
+            os.utime(entry)
+            self.hits += 1
+            print(f"Stage {name}: unchanged, reusing cached outputs ({key[:12]})")
+            return StageResult(key, state_path=os.path.join(entry, STATE_FILE))
+        
+        # Outputs may be hard links into the cache; unlink them so the stage
+        # writes new files instead of truncating cached ones
+        for path in outputs:
+            remove_file(path)
+        state = compute()
+        self.misses += 1
+        if self.enabled:
+            self.store(entry, outputs, state)
+            self.evict()
+        return StageResult(key, state=state)
+    
+    def store(self, entry, outputs, state):
+        """Save a stage's outputs and state as the entry directory, atomically"""
+        temporary = f'{entry}.{os.getpid()}.tmp'
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        for path in outputs:
+            link_or_copy(path, os.path.join(temporary, os.path.basename(path)))
+        with open(os.path.join(temporary, STATE_FILE), 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(temporary, entry)
+    
+    def entries(self):
+        """(last used time, bytes, key) of every cache entry"""
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for key in os.listdir(self.directory):
+            entry = os.path.join(self.directory, key)
+            if not os.path.exists(os.path.join(entry, STATE_FILE)):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            result.append((os.path.getmtime(entry), size, key))
+        return result
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes.
+
+        Entries used by this run are kept even if they alone exceed it.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key in self.used:
+                continue
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            total -= size
+            print(f"Evicted cached stage {key[:12]} ({size / 1024 ** 2:.1f} MB)")
+    
+    def report(self):
+        """Print how many stages were reused from the cache"""
+        if self.enabled:
+            print(f"Stage cache: {self.hits} reused, {self.misses} recomputed ({self.directory})")
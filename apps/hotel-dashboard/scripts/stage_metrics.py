@@ -0,0 +1,311 @@
+"""
+Stage instrumentation for the generator and ETL scripts
+Records wall time, CPU time, rows in/out, rows/sec, peak RSS and database
+round-trips for each instrumented stage, as JSON lines and/or a Prometheus
+textfile, and can profile each stage with cProfile or pyinstrument.
+Everything is off until configure() is called, so instrumented functions
+cost one attribute check when metrics are not requested.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+PROFILERS = ['cprofile', 'pyinstrument']
+# Prometheus metric name prefix and the per-stage series written to the textfile
+METRIC_PREFIX = 'hotel_pipeline_stage'
+PROMETHEUS_METRICS = [
+    ('wall_seconds', 'Wall clock seconds spent in the stage'),
+    ('cpu_seconds', 'CPU seconds used during the stage, including child processes'),
+    ('rows_in', 'Rows read by the stage'),
+    ('rows_out', 'Rows produced or written by the stage'),
+    ('peak_rss_bytes', 'Peak resident set size of the process while the stage ran'),
+    ('db_round_trips', 'Statements and commits sent to PostgreSQL by the stage'),
+    ('runs', 'Number of times the stage ran'),
+    ('last_run_timestamp_seconds', 'Unix time at which the stage last finished'),
+]
+
+_config = None
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def configure(job, jsonl=None, prometheus=None, profile_dir=None, profiler='cprofile'):
+    """Turn instrumentation on for this process.
+
+    jsonl is a file to append one JSON object per finished stage to ('-'
+    for stdout), prometheus a textfile rewritten by finish(), and
+    profile_dir a directory for one profile per stage. Does nothing if all
+    three are None. finish() runs at exit, including after an error.
+    """
+    global _config
+    if not (jsonl or prometheus or profile_dir):
+        return
+    if profiler == 'pyinstrument':
+        import_pyinstrument()
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+    _config = {
+        'job': job,
+        'jsonl': (sys.stdout if jsonl == '-' else open(jsonl, 'a', encoding='utf-8')) if jsonl else None,
+        'prometheus': prometheus and os.path.abspath(prometheus),
+        'profile_dir': profile_dir and os.path.abspath(profile_dir),
+        'profiler': profiler,
+        'totals': {},
+        'profiles': {},
+    }
+    atexit.register(finish)
+
+
+def add_arguments(parser):
+    """Add the --metrics, --prometheus-textfile and --profile options to a script's parser"""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--metrics', metavar='FILE',
+                       help="Append per-stage wall/CPU time, rows, rows/sec, peak RSS and database "
+                            "round-trips to FILE as JSON lines ('-' for stdout)")
+    group.add_argument('--prometheus-textfile', metavar='FILE',
+                       help='Write per-stage totals to FILE in the Prometheus text format, '
+                            "for node_exporter's textfile collector")
+    group.add_argument('--profile', metavar='DIR',
+                       help='Write a profile of each stage to DIR')
+    group.add_argument('--profiler', choices=PROFILERS, default='cprofile',
+                       help='Profiler for --profile (default: %(default)s); cprofile writes .prof '
+                            'files for pstats or snakeviz, pyinstrument writes HTML')
+
+
+def configure_from_args(job, args):
+    configure(job, args.metrics, args.prometheus_textfile, args.profile, args.profiler)
+
+
+def finish():
+    """Write the Prometheus textfile and close the JSON lines file"""
+    global _config
+    if _config is None:
+        return
+    if _config['prometheus']:
+        write_prometheus(_config['prometheus'], _config['job'], _config['totals'])
+    if _config['jsonl'] not in (None, sys.stdout):
+        _config['jsonl'].close()
+    _config = None
+
+
+def import_pyinstrument():
+    """Import pyinstrument, which is only needed for --profiler pyinstrument"""
+    try:
+        import pyinstrument
+    except ImportError:
+        raise SystemExit("--profiler pyinstrument requires pyinstrument: pip install pyinstrument")
+    return pyinstrument
+
+
+def count_round_trip():
+    """Count one statement or commit sent to the database by the current thread"""
+    _local.round_trips = getattr(_local, 'round_trips', 0) + 1
+
+
+def count_rows(rows_in=None, rows_out=None):
+    """Add to the rows read and/or written by the current thread's innermost stage"""
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        record = stack[-1]
+        if rows_in is not None:
+            record['rows_in'] = (record['rows_in'] or 0) + rows_in
+        if rows_out is not None:
+            record['rows_out'] = (record['rows_out'] or 0) + rows_out
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter; without /proc the peak is process-wide"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_bytes():
+    """Peak resident set size since the last reset_peak_rss()"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def cpu_seconds():
+    """CPU time of this process and its finished child processes (worker pools)"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def start_profile():
+    """Start profiling a stage, unless an enclosing stage in this thread is being profiled"""
+    if not _config['profile_dir'] or getattr(_local, 'profiling', False):
+        return None
+    try:
+        if _config['profiler'] == 'pyinstrument':
+            profiler = import_pyinstrument().Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except (RuntimeError, ValueError):
+        # Only one profiler can be active at a time on some Python versions
+        return None
+    _local.profiling = True
+    return profiler
+
+
+def stop_profile(name, profiler):
+    """Stop profiling and write the stage's profile; returns its path"""
+    _local.profiling = False
+    with _lock:
+        runs = _config['profiles'][name] = _config['profiles'].get(name, 0) + 1
+    stem = re.sub(r'[^\w.-]+', '_', f"{_config['job']}-{name}" + (f'-{runs}' if runs > 1 else ''))
+    if _config['profiler'] == 'pyinstrument':
+        profiler.stop()
+        path = os.path.join(_config['profile_dir'], f'{stem}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(_config['profile_dir'], f'{stem}.prof')
+        profiler.dump_stats(path)
+    return path
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """Record metrics for the enclosed block as stage name.
+
+    Yields the stage's record; rows_out (and rows_in, if not passed) can be
+    set on it directly or accumulated with count_rows(). Stages nest: an
+    inner stage's time and round-trips are also counted in the outer one.
+    """
+    if _config is None:
+        yield {'rows_in': rows_in, 'rows_out': None}
+        return
+    
+    stack = _local.__dict__.setdefault('stack', [])
+    if stack:
+        # The peak counter is about to be reset, so keep the parent's peak so far
+        stack[-1]['peak_rss_bytes'] = max(stack[-1]['peak_rss_bytes'], peak_rss_bytes())
+    record = {'rows_in': rows_in, 'rows_out': None, 'peak_rss_bytes': 0}
+    stack.append(record)
+    profiler = start_profile()
+    reset_peak_rss()
+    round_trips = getattr(_local, 'round_trips', 0)
+    cpu_start = cpu_seconds()
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield record
+    except BaseException as e:
+        status = f'error: {type(e).__name__}'
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        record['peak_rss_bytes'] = max(record['peak_rss_bytes'], peak_rss_bytes())
+        stack.pop()
+        if stack:
+            stack[-1]['peak_rss_bytes'] = max(stack[-1]['peak_rss_bytes'], record['peak_rss_bytes'])
+        rows = record['rows_out'] if record['rows_out'] is not None else record['rows_in']
+        event = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'job': _config['job'],
+            'stage': name,
+            'status': status,
+            'wall_seconds': round(wall, 6),
+            'cpu_seconds': round(cpu_seconds() - cpu_start, 6),
+            'rows_in': record['rows_in'],
+            'rows_out': record['rows_out'],
+            'rows_per_sec': round(rows / wall, 1) if rows is not None and wall > 0 else None,
+            'peak_rss_bytes': record['peak_rss_bytes'],
+            'db_round_trips': getattr(_local, 'round_trips', 0) - round_trips,
+        }
+        if profiler is not None:
+            event['profile'] = stop_profile(name, profiler)
+        emit(event)
+
+
+def rows_of(value):
+    """Row count of a stage argument or result: an int, or the length of a sized value"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def instrumented(name=None, rows_in=False, rows_out=rows_of):
+    """Decorator recording each call of a function as a stage.
+
+    The stage is named after the function, or by name: a string, or a
+    callable taking the call's arguments. With rows_in, the rows in are
+    rows_of() the first argument; rows_out is applied to the result unless
+    the function called count_rows() itself.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _config is None:
+                return func(*args, **kwargs)
+            stage_name = name(*args, **kwargs) if callable(name) else name or func.__name__
+            with stage(stage_name, rows_of(args[0]) if rows_in and args else None) as record:
+                result = func(*args, **kwargs)
+                if record['rows_out'] is None and rows_out is not None:
+                    record['rows_out'] = rows_out(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def emit(event):
+    """Write a finished stage to the JSON lines file and the Prometheus totals"""
+    with _lock:
+        if _config['jsonl']:
+            _config['jsonl'].write(json.dumps(event) + '\n')
+            _config['jsonl'].flush()
+        totals = _config['totals'].setdefault(event['stage'], dict.fromkeys(
+            ('wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out', 'peak_rss_bytes',
+             'db_round_trips', 'runs'), 0))
+        for key in ('wall_seconds', 'cpu_seconds', 'rows_in', 'rows_out', 'db_round_trips'):
+            totals[key] += event[key] or 0
+        totals['peak_rss_bytes'] = max(totals['peak_rss_bytes'], event['peak_rss_bytes'])
+        totals['runs'] += 1
+        totals['last_run_timestamp_seconds'] = time.time()
+
+
+def prometheus_label(value):
+    return re.sub(r'(["\\])', r'\\\1', value).replace('\n', '\\n')
+
+
+def write_prometheus(path, job, totals):
+    """Write per-stage totals in the Prometheus text format (for node_exporter's
+    textfile collector), replacing the file atomically"""
+    lines = []
+    for metric, description in PROMETHEUS_METRICS:
+        lines.append(f'# HELP {METRIC_PREFIX}_{metric} {description}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_{metric} gauge')
+        for name, values in sorted(totals.items()):
+            labels = f'job="{prometheus_label(job)}",stage="{prometheus_label(name)}"'
+            lines.append(f'{METRIC_PREFIX}_{metric}{{{labels}}} {values[metric]}')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: the scripts are plain modules, not a package, so their
+directory is put on sys.path as the benchmarks do.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
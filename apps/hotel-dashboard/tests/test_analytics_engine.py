@@ -0,0 +1,151 @@
+"""
+Behaviour tests for the in-process analytics engine, against the generated CSVs
+"""
+
+import csv
+import os
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pyarrow')
+
+import analytics_engine  # noqa: E402
+import generate_data  # noqa: E402
+
+START, END = analytics_engine.DEFAULT_START_DATE, analytics_engine.DEFAULT_END_DATE
+
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    """A small seeded dataset written by generate_data.main"""
+    directory = tmp_path_factory.mktemp('dataset')
+    os.makedirs(directory / 'data')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        generate_data.main(['--seed', '1', '--no-cache'])
+    finally:
+        os.chdir(cwd)
+    return str(directory / 'data')
+
+
+@pytest.fixture(scope='module')
+def dataset(data_dir):
+    return analytics_engine.Dataset(data_dir)
+
+
+def read_rows(data_dir, name):
+    with open(os.path.join(data_dir, f'{name}.csv'), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def day(value):
+    return datetime.fromisoformat(value).date()
+
+
+def in_range(value, start=START, end=END):
+    return day(start) <= day(value) <= day(end)
+
+
+@pytest.mark.parametrize('start, end', [(START, END), ('2025-01-01', '2025-01-31')])
+def test_revenue_by_channel_matches_csv(dataset, data_dir, start, end):
+    expected = {}
+    for row in read_rows(data_dir, 'bookings'):
+        if row['booking_status'] != 'Stayed' or not in_range(row['check_in_date'], start, end):
+            continue
+        totals = expected.setdefault(row['booking_channel'], {
+            'total_bookings': 0, 'nights': 0, 'room_revenue': Decimal(0), 'fb_revenue': Decimal(0),
+            'activities_revenue': Decimal(0), 'total_revenue': Decimal(0)})
+        totals['total_bookings'] += 1
+        totals['nights'] += int(row['nights'])
+        totals['room_revenue'] += Decimal(row['room_revenue_eur'])
+        totals['fb_revenue'] += Decimal(row['fb_revenue_eur'])
+        totals['activities_revenue'] += Decimal(row['activities_revenue_eur'])
+        totals['total_revenue'] += Decimal(row['net_revenue_eur'])
+    assert expected, "the range should hold stayed bookings"
+    
+    rows = analytics_engine.run_query(dataset, 'revenue.channel', start, end)
+    assert {row['dimension_value'] for row in rows} == set(expected)
+    assert [row['total_revenue'] for row in rows] == sorted(
+        (row['total_revenue'] for row in rows), reverse=True)
+    for row in rows:
+        totals = expected[row['dimension_value']]
+        for key in ('total_bookings', 'room_revenue', 'fb_revenue', 'activities_revenue',
+                    'total_revenue'):
+            assert row[key] == totals[key]
+        assert row['avg_nights'] == pytest.approx(totals['nights'] / totals['total_bookings'])
+
+
+def test_occupancy_by_month_matches_csv(dataset, data_dir):
+    expected = {}
+    for row in read_rows(data_dir, 'daily_occupancy'):
+        if row['room_type'] != 'All' or not in_range(row['date']):
+            continue
+        month = day(row['date']).replace(day=1)
+        totals = expected.setdefault(month, {'rooms_sold': 0, 'room_revenue': Decimal(0),
+                                             'occupancy_pct': [], 'adr': [], 'revpar': []})
+        totals['rooms_sold'] += int(row['rooms_sold'])
+        totals['room_revenue'] += Decimal(row['room_revenue_eur'])
+        totals['occupancy_pct'].append(float(row['occupancy_pct']))
+        totals['adr'].append(float(row['adr_eur']))
+        totals['revpar'].append(float(row['revpar_eur']))
+    
+    rows = analytics_engine.run_query(dataset, 'occupancy.month')
+    assert [row['month_start'] for row in rows] == sorted(expected)
+    for row in rows:
+        totals = expected[row['month_start']]
+        assert row['rooms_sold'] == totals['rooms_sold']
+        assert row['room_revenue'] == totals['room_revenue']
+        for key in ('occupancy_pct', 'adr', 'revpar'):
+            values = totals[key]
+            assert row[f'avg_{key}'] == pytest.approx(sum(values) / len(values))
+
+
+def test_marketing_by_channel_matches_csv(dataset, data_dir):
+    expected = {}
+    for row in read_rows(data_dir, 'marketing_performance'):
+        if not in_range(row['date']):
+            continue
+        totals = expected.setdefault(row['channel'], {
+            'total_impressions': 0, 'total_clicks': 0, 'total_bookings': 0,
+            'total_room_nights': 0, 'total_revenue': Decimal(0), 'total_cost': Decimal(0)})
+        totals['total_impressions'] += int(row['impressions'])
+        totals['total_clicks'] += int(row['clicks'])
+        totals['total_bookings'] += int(row['bookings'])
+        totals['total_room_nights'] += int(row['room_nights'])
+        totals['total_revenue'] += Decimal(row['total_revenue_eur'])
+        totals['total_cost'] += Decimal(row['marketing_cost_eur'])
+    
+    rows = analytics_engine.run_query(dataset, 'marketing.channel')
+    assert {row['channel'] for row in rows} == set(expected)
+    for row in rows:
+        totals = expected[row['channel']]
+        for key, value in totals.items():
+            assert row[key] == value
+        assert row['overall_roas'] == pytest.approx(float(totals['total_revenue'] / totals['total_cost']))
+
+
+def test_revenue_by_date_matches_charge_lines(dataset, data_dir):
+    stayed = {row['booking_id'] for row in read_rows(data_dir, 'bookings')
+              if row['booking_status'] == 'Stayed'}
+    keys = {'Room': 'room_revenue', 'F&B': 'fb_revenue'}
+    keys.update((category, 'activities_revenue') for category in analytics_engine.ACTIVITY_CATEGORIES)
+    expected = {}
+    for row in read_rows(data_dir, 'booking_charges'):
+        if row['booking_id'] not in stayed or not in_range(row['charge_date']):
+            continue
+        totals = expected.setdefault(day(row['charge_date']), {
+            'room_revenue': Decimal(0), 'fb_revenue': Decimal(0),
+            'activities_revenue': Decimal(0), 'total_revenue': Decimal(0)})
+        if row['charge_category'] in keys:
+            totals[keys[row['charge_category']]] += Decimal(row['line_subtotal_eur'])
+        totals['total_revenue'] += Decimal(row['line_subtotal_eur'])
+    
+    rows = analytics_engine.run_query(dataset, 'revenue.date')
+    assert [row['dimension_value'] for row in rows] == sorted(expected)
+    for row in rows:
+        for key, value in expected[row['dimension_value']].items():
+            assert row[key] == value
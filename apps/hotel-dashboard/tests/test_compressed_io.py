@@ -0,0 +1,84 @@
+"""
+Behaviour tests for the streaming gzip/zstd CSV I/O
+"""
+
+import gzip
+import io
+
+import pytest
+
+import compressed_io
+
+# Small blocks and chunks, so a few KB span many gzip members / zstd frames
+BLOCK_SIZE = 1000
+READ_CHUNK_SIZE = 4096
+ROWS = ''.join(f'LIV-2025-{n:06},GUEST-{n % 97:06},2025-01-{n % 28 + 1:02},{n * 37 % 1000}.50\r\n'
+               for n in range(2000))
+
+
+@pytest.fixture(params=['gz', 'zst'])
+def extension(request, monkeypatch):
+    if request.param == 'zst':
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(compressed_io, 'BLOCK_SIZE', BLOCK_SIZE)
+    monkeypatch.setattr(compressed_io, 'READ_CHUNK_SIZE', READ_CHUNK_SIZE)
+    return request.param
+
+
+def write(path, threads):
+    with compressed_io.open_file(str(path), 'w', threads=threads) as f:
+        for start in range(0, len(ROWS), 777):
+            f.write(ROWS[start:start + 777])
+    return path.read_bytes()
+
+
+def decompress(extension, data):
+    """Decompress every member or frame of data with the codec's own library"""
+    if extension == 'gz':
+        return gzip.decompress(data)
+    import pyarrow
+    return pyarrow.input_stream(pyarrow.BufferReader(data), compression='zstd').read()
+
+
+def test_round_trip_across_blocks(tmp_path, extension):
+    path = tmp_path / f'bookings.csv.{extension}'
+    data = write(path, threads=2)
+    assert decompress(extension, data) == ROWS.encode()
+    # One member or frame per block, whatever the thread count
+    assert write(path, threads=0) == data
+    if extension == 'gz':
+        assert data.count(b'\x1f\x8b\x08') >= len(ROWS) // BLOCK_SIZE
+    
+    with compressed_io.open_file(str(path), 'r') as f:
+        assert f.read() == ROWS
+    with compressed_io.open_file(str(path), 'r') as f:
+        assert sum(1 for _ in f) == ROWS.count('\n')
+
+
+def test_reads_concatenated_files(tmp_path, extension):
+    # As concat_parts appends shard parts after a compressed header
+    first, second = tmp_path / f'header.csv.{extension}', tmp_path / f'part.csv.{extension}'
+    with compressed_io.open_file(str(first), 'w') as f:
+        f.write('booking_id,guest_id\r\n')
+    write(second, threads=1)
+    path = tmp_path / f'joined.csv.{extension}'
+    path.write_bytes(first.read_bytes() + second.read_bytes())
+    with compressed_io.open_file(str(path), 'r') as f:
+        assert f.read() == 'booking_id,guest_id\r\n' + ROWS
+
+
+def test_seeks_forward_only(tmp_path, extension):
+    path = tmp_path / f'bookings.csv.{extension}'
+    write(path, threads=1)
+    data = ROWS.encode()
+    with compressed_io.open_file(str(path), 'rb') as f:
+        assert f.seek(12345) == 12345
+        assert f.read(100) == data[12345:12445]
+        assert f.seek(5000, io.SEEK_CUR) == 17445
+        assert f.read(10) == data[17445:17455]
+        with pytest.raises(io.UnsupportedOperation):
+            f.seek(0)
+        with pytest.raises(io.UnsupportedOperation):
+            f.seek(0, io.SEEK_END)
+        assert f.seek(len(data) + 10) == len(data)
+        assert f.read() == b''
@@ -0,0 +1,232 @@
+"""
+Behaviour tests for the booking generator
+"""
+
+import csv
+import io
+import os
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import generate_data
+
+
+def generate_bookings(rng=None):
+    """Guests and their bookings from the default (list) path, seed 1 by default"""
+    rng = rng or random.Random(1)
+    guests = generate_data.generate_guest_profiles(rng)
+    return generate_data.generate_bookings_with_charges(guests, rng)
+
+
+def test_line_ids_number_each_booking_from_one():
+    for booking in generate_bookings():
+        booking_id = booking.header.booking_id
+        assert [line.line_id for line in booking.lines] == [
+            generate_data.generate_line_id(booking_id, number)
+            for number in range(1, len(booking.lines) + 1)
+        ]
+        assert all(line.booking_id == booking_id for line in booking.lines)
+
+
+def test_booking_totals_match_charge_lines():
+    revenue_keys = {'Room': 'room_revenue_eur', 'F&B': 'fb_revenue_eur'}
+    for booking in generate_bookings():
+        header = booking.header
+        subtotals = {'room_revenue_eur': 0, 'fb_revenue_eur': 0, 'activities_revenue_eur': 0}
+        for line in booking.lines:
+            assert line.line_total_eur == line.line_subtotal_eur + line.line_tax_eur
+            key = revenue_keys.get(line.charge_category, 'activities_revenue_eur')
+            subtotals[key] += line.line_subtotal_eur
+        for key, subtotal in subtotals.items():
+            assert getattr(header, key) == subtotal
+        assert header.total_revenue_eur == sum(line.line_total_eur for line in booking.lines)
+        assert header.net_revenue_eur == header.total_revenue_eur - header.discount_eur
+        assert len([line for line in booking.lines if line.charge_category == 'Room']) == header.nights
+
+
+def test_to_cents_rounds_half_up():
+    # Halves exactly representable in binary, so the boundary itself is tested
+    assert generate_data.to_cents(0.125) == 13
+    assert generate_data.to_cents(0.375) == 38
+    assert generate_data.to_cents(2.5) == 250
+    assert generate_data.to_cents(0.124) == 12
+    assert generate_data.to_cents(0) == 0
+
+
+def test_divide_rounded_rounds_half_away_from_zero():
+    cases = {(5, 10): 1, (4, 10): 0, (15, 10): 2, (14, 10): 1, (-5, 10): -1,
+             (-4, 10): 0, (-15, 10): -2, (0, 10): 0, (7, 2): 4, (-7, 2): -4, (2, 3): 1}
+    for (numerator, denominator), expected in cases.items():
+        assert generate_data.divide_rounded(numerator, denominator) == expected
+
+
+def test_vectorized_rounding_matches_scalar():
+    np = pytest.importorskip('numpy')
+    euros = np.array([0.125, 0.375, 2.5, 0.124, 0.0, 12.345])
+    assert generate_data._to_cents(np, euros).tolist() == [generate_data.to_cents(value) for value in euros]
+    numerators = np.arange(0, 40)
+    denominators = np.array([0, 1, 2, 3, 4, 10, 20, 40] * 5)
+    expected = [generate_data.divide_rounded(int(n), int(d)) if d else 0
+                for n, d in zip(numerators, denominators)]
+    assert generate_data._divide_rounded(np, numerators, denominators).tolist() == expected
+
+
+def rooms_held_per_night(bookings):
+    """{(room_type, night): rooms} held by stayed and no-show bookings, counted naively"""
+    held = {}
+    for booking in bookings:
+        header = booking.header
+        if header.booking_status not in generate_data.ROOM_HOLDING_STATUSES:
+            continue
+        first = (header.check_in_date - generate_data.START_DATE).days
+        for night in range(first, first + header.nights):
+            held[header.room_type, night] = held.get((header.room_type, night), 0) + 1
+    return held
+
+
+def test_room_inventory_agrees_with_naive_count():
+    rng = random.Random(7)
+    capacity = {'Standard': 3, 'Deluxe': 2, 'Suite': 1, 'Family': 2, 'Premium': 0}
+    inventory = generate_data.RoomInventory(capacity)
+    held = {room_type: [0] * inventory.num_nights for room_type in generate_data.ROOM_TYPES}
+    for _ in range(2000):
+        first = rng.randrange(inventory.num_nights)
+        last = min(first + rng.choice(generate_data.STAY_LENGTHS), inventory.num_nights)
+        requested = rng.choice(generate_data.ROOM_TYPES)
+        free = [room_type for room_type in generate_data.room_fallbacks(requested)
+                if max(held[room_type][first:last]) < capacity[room_type]]
+        assert inventory.allocate(requested, first, last) == (free[0] if free else None)
+        if free:
+            for night in range(first, last):
+                held[free[0]][night] += 1
+    for room_type, nights in held.items():
+        assert max(nights) <= capacity[room_type]
+        assert inventory.rooms_sold(room_type, 0, inventory.num_nights) == max(nights)
+
+
+def test_generated_bookings_never_overbook(monkeypatch, capsys):
+    monkeypatch.setattr(generate_data, 'NUM_GUESTS', 4000)
+    monkeypatch.setattr(generate_data, 'NUM_BOOKINGS', 6000)
+    rng = random.Random(3)
+    bookings = generate_bookings(rng)
+    assert len(bookings) < 6000, "the hotel should fill up at this scale"
+    assert f"WARNING: only {len(bookings)} of NUM_BOOKINGS=6000" in capsys.readouterr().err
+    for (room_type, _), rooms in rooms_held_per_night(bookings).items():
+        assert rooms <= generate_data.ROOM_DISTRIBUTION[room_type]
+
+
+def test_daily_occupancy_never_exceeds_available_rooms(monkeypatch):
+    monkeypatch.setattr(generate_data, 'NUM_GUESTS', 4000)
+    monkeypatch.setattr(generate_data, 'NUM_BOOKINGS', 6000)
+    rng = random.Random(3)
+    guests = generate_data.generate_guest_profiles(rng)
+    unavailable = generate_data.draw_unavailable_rooms(rng)
+    bookings = generate_data.generate_bookings_with_charges(guests, rng, unavailable)
+    held = {}
+    for (_, night), rooms in rooms_held_per_night(bookings).items():
+        held[night] = held.get(night, 0) + rooms
+    for night, rooms in held.items():
+        assert rooms + unavailable[0][night] + unavailable[1][night] <= generate_data.TOTAL_ROOMS
+    
+    occupancy = generate_data.generate_daily_occupancy(bookings, rng, unavailable)
+    hotel = [row for row in occupancy if row.room_type == 'All']
+    assert any(row.rooms_out_of_service or row.rooms_blocked for row in hotel)
+    assert max(float(row.occupancy_pct) for row in hotel) > 90, "the hotel should fill up at this scale"
+    assert all(float(row.occupancy_pct) <= 100 for row in occupancy)
+
+
+def test_numpy_bookings_never_overbook(monkeypatch):
+    np = pytest.importorskip('numpy')
+    monkeypatch.setattr(generate_data, 'NUM_GUESTS', 4000)
+    monkeypatch.setattr(generate_data, 'NUM_BOOKINGS', 6000)
+    guests = generate_data.generate_guest_profiles(random.Random(3))
+    headers = generate_data.booking_header_columns(generate_data.generate_bookings_columnar(guests, 3))
+    start = np.datetime64(generate_data.START_DATE.date(), 'D')
+    num_nights = (generate_data.END_DATE - generate_data.START_DATE).days + 1
+    held = np.zeros((len(generate_data.ROOM_TYPES), num_nights), dtype=int)
+    holding = [generate_data.BOOKING_STATUSES.index(status) for status in generate_data.ROOM_HOLDING_STATUSES]
+    for room_type, status, check_in, nights in zip(headers['room_type'], headers['booking_status'],
+                                                    headers['check_in_date'], headers['nights']):
+        if status in holding:
+            first = int((np.datetime64(check_in, 'D') - start).astype(int))
+            held[room_type, first:first + nights] += 1
+    capacity = [generate_data.ROOM_DISTRIBUTION[room_type] for room_type in generate_data.ROOM_TYPES]
+    assert (held.max(axis=1) <= capacity).all()
+
+
+def test_marketing_matrix_matches_accumulate_marketing(monkeypatch):
+    np = pytest.importorskip('numpy')
+    monkeypatch.setattr(generate_data, 'CAMPAIGNS_PER_CHANNEL', 3)
+    guests = generate_data.generate_guest_profiles(random.Random(3))
+    columns = generate_data.generate_bookings_columnar(guests, 3)
+    matrix = generate_data.marketing_matrix(columns)
+    
+    channel_performance = {}
+    headers = generate_data.booking_header_columns(columns)
+    for status, check_in, channel, nights, revenue in zip(
+            headers['booking_status'], headers['check_in_date'], headers['booking_channel'],
+            headers['nights'], headers['total_revenue_eur']):
+        header = SimpleNamespace(
+            booking_status=generate_data.BOOKING_STATUSES[status],
+            check_in_date=datetime.fromisoformat(str(np.datetime64(check_in, 'D'))),
+            booking_channel=generate_data.BOOKING_CHANNELS[channel],
+            nights=int(nights), total_revenue_eur=int(revenue))
+        generate_data.accumulate_marketing(channel_performance, SimpleNamespace(header=header))
+    
+    expected = {key: np.zeros(matrix[key].shape[:2], dtype=np.int64)
+                for key in ('bookings', 'room_nights', 'revenue')}
+    for check_in, channels in channel_performance.items():
+        day = (check_in - generate_data.START_DATE.date()).days
+        for channel, totals in channels.items():
+            for key, values in expected.items():
+                values[day, generate_data.BOOKING_CHANNELS.index(channel)] = totals[key]
+    for key, values in expected.items():
+        assert matrix[key].shape[2] == 3
+        assert (matrix[key].sum(axis=2) == values).all()
+    
+    marketing = generate_data.generate_marketing_columnar(matrix, 3)
+    rows = list(zip(marketing['date'].tolist(), marketing['channel'].tolist(), marketing['campaign_name']))
+    assert len(set(rows)) == len(rows) == matrix['bookings'].size
+    assert marketing['bookings'].sum() == expected['bookings'].sum()
+
+
+def generate_files(directory, *argv):
+    """Run generate_data.main(argv) in directory; returns {file name: bytes} of its CSVs"""
+    os.makedirs(os.path.join(directory, 'data'))
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        generate_data.main(['--seed', '1', '--no-cache', *argv])
+    finally:
+        os.chdir(cwd)
+    data = os.path.join(directory, 'data')
+    return {name: open(os.path.join(data, name), 'rb').read() for name in sorted(os.listdir(data))}
+
+
+def test_sharded_output_depends_only_on_seed(tmp_path):
+    runs = [generate_files(tmp_path / f'{workers}x{shards}', '--workers', str(workers),
+                           '--shards', str(shards))
+            for workers, shards in [(1, 1), (2, 3), (2, 7)]]
+    assert len(runs[0]) == 5
+    for run in runs[1:]:
+        assert run == runs[0]
+    
+    # Sharding loses no bookings: the count is what one stream of requests gives
+    planned = sum(len(shard['requests']) // generate_data.PACKED_REQUEST_SIZE
+                  for shard in generate_data.plan_shards(1, 1, str(tmp_path)))
+    bookings = list(csv.DictReader(io.StringIO(runs[0]['bookings.csv'].decode())))
+    assert [row['booking_id'] for row in bookings] == [
+        generate_data.generate_booking_id(index) for index in range(1, planned + 1)]
+    
+    held = {}
+    for row in bookings:
+        if row['booking_status'] in generate_data.ROOM_HOLDING_STATUSES:
+            check_in = datetime.fromisoformat(row['check_in_date'])
+            for night in range(int(row['nights'])):
+                key = row['room_type'], check_in + timedelta(days=night)
+                held[key] = held.get(key, 0) + 1
+    for (room_type, _), rooms in held.items():
+        assert rooms <= generate_data.ROOM_DISTRIBUTION[room_type]
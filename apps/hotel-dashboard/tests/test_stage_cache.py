@@ -0,0 +1,45 @@
+"""
+Behaviour tests for the generator's stage cache
+"""
+
+import os
+
+import stage_cache
+
+
+def stage_files(directory):
+    """Every file under directory, relative to it"""
+    return sorted(os.path.relpath(os.path.join(root, name), directory)
+                  for root, _, names in os.walk(directory) for name in names)
+
+
+def test_hit_miss_and_force(tmp_path):
+    output = str(tmp_path / 'bookings.csv')
+    runs = []
+    
+    def compute():
+        runs.append(len(runs))
+        with open(output, 'w') as f:
+            f.write(f'run {len(runs)}\n')
+        return {'run': len(runs)}
+    
+    cache = stage_cache.StageCache(str(tmp_path / 'cache'))
+    key = stage_cache.stage_key('bookings', {'seed': 1})
+    assert cache.run('bookings', key, [output], compute).state == {'run': 1}
+    # The second hit finds the output already linked to the cached file
+    for _ in range(2):
+        assert cache.run('bookings', key, [output], compute).state == {'run': 1}
+        assert open(output).read() == 'run 1\n'
+    assert (cache.hits, cache.misses, len(runs)) == (2, 1, 1)
+    
+    forced = stage_cache.StageCache(str(tmp_path / 'cache'), force=True)
+    assert forced.run('bookings', key, [output], compute).state == {'run': 2}
+    assert open(output).read() == 'run 2\n'
+    assert cache.run('bookings', key, [output], compute).state == {'run': 2}
+    
+    other = stage_cache.stage_key('bookings', {'seed': 2})
+    assert cache.run('bookings', other, [output], compute).state == {'run': 3}
+    assert len(runs) == 3
+    assert not [name for name in stage_files(tmp_path) if name.endswith('.tmp')]
+    assert len(cache.entries()) == 2
+